@@ -0,0 +1,75 @@
+"""
+Export throughput against batches in flight and endpoint count.
+
+Starts stand-in collectors on several local ports, each answering after a fixed
+delay that stands in for network and collector latency, then pushes batches
+through ConcurrentSpanExporter over BalancedSpanExporter and reports spans/s
+per (endpoints, in-flight batches) combination. The collectors run in the
+benchmark's process and share its GIL, so the numbers understate what separate
+collectors allow:
+
+    python benchmarks/export_scaling.py --endpoints 1,2,4 --in-flight 1,2,4,8 --latency-ms 20
+"""
+
+import argparse
+import time
+
+from opentelemetry.sdk.trace import TracerProvider
+
+from value.internal.balancing import BalancedSpanExporter, ConcurrentSpanExporter
+from value.internal.standins import StandInCollector
+
+
+def make_batch(size: int) -> list:
+    tracer = TracerProvider(shutdown_on_exit=False).get_tracer("benchmark")
+    spans = []
+    for index in range(size):
+        span = tracer.start_span("value.action", attributes={"value.action.name": "search", "index": index})
+        span.end()
+        spans.append(span)
+    return spans
+
+
+def run(collectors: list[StandInCollector], in_flight: int, batch: list, batches: int) -> float:
+    exporter = ConcurrentSpanExporter(
+        BalancedSpanExporter([collector.endpoint for collector in collectors], channels_per_endpoint=2),
+        max_in_flight=in_flight,
+    )
+    started = time.perf_counter()
+    for _ in range(batches):
+        exporter.export(batch)
+    exporter.force_flush()
+    elapsed = time.perf_counter() - started
+    exporter.shutdown()
+    return batches * len(batch) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default="1,2,4", help="Comma-separated endpoint counts")
+    parser.add_argument("--in-flight", default="1,2,4,8", help="Comma-separated batches in flight")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Collector response delay")
+    parser.add_argument("--batch", type=int, default=512, help="Spans per batch")
+    parser.add_argument("--batches", type=int, default=100)
+    args = parser.parse_args()
+
+    endpoint_counts = [int(value) for value in args.endpoints.split(",")]
+    in_flight_counts = [int(value) for value in args.in_flight.split(",")]
+    collectors = [StandInCollector(max_workers=16).start() for _ in range(max(endpoint_counts))]
+    for collector in collectors:
+        collector.delay = args.latency_ms / 1000
+    batch = make_batch(args.batch)
+
+    print(f"{args.batch} spans per batch, {args.latency_ms:.0f} ms collector latency")
+    print(f"{'endpoints':>9} " + " ".join(f"{f'{count} in flight':>14}" for count in in_flight_counts))
+    try:
+        for endpoints in endpoint_counts:
+            rates = [run(collectors[:endpoints], count, batch, args.batches) for count in in_flight_counts]
+            print(f"{endpoints:>9} " + " ".join(f"{rate:>12,.0f}/s" for rate in rates))
+    finally:
+        for collector in collectors:
+            collector.stop()
+
+
+if __name__ == "__main__":
+    main()
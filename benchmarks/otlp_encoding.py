@@ -0,0 +1,83 @@
+"""
+OTLP encoding throughput and peak heap per batch, direct encoder against the stock one.
+
+Builds batches of value.action spans through the ActionEmitter and serializes
+them with OTLPSpanEncoder and with the SDK's encode_spans(...).SerializeToString(),
+reporting batches/s, output MB/s and the peak Python heap (tracemalloc) while
+encoding one batch. Protobuf messages live in upb arenas that tracemalloc does
+not see, so the stock encoder's peak is a lower bound:
+
+    python benchmarks/otlp_encoding.py --batch 512 --batches 200
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from value.internal.actions import ActionContext, ActionEmitter
+from value.internal.otlp_encoder import OTLPSpanEncoder
+from value.internal.span_processor import UserContextSpanProcessor
+
+
+def make_batch(size: int) -> list:
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(resource=Resource.create({"service.name": "benchmark"}), shutdown_on_exit=False)
+    provider.add_span_processor(UserContextSpanProcessor())
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    emitter = ActionEmitter(tracer=provider.get_tracer("value.actions"))
+    with ActionContext(emitter, anonymous_id="anon-1", user_id="user-1") as context:
+        for index in range(size):
+            context.send(
+                "llm_call",
+                **{
+                    "value.action.type": "llm",
+                    "value.action.llm.model": "gpt-4o",
+                    "value.action.llm.input_tokens": 100 + index % 50,
+                    "value.action.llm.output_tokens": 20,
+                    "query": f"question number {index}",
+                },
+            )
+    return list(exporter.get_finished_spans())
+
+
+def measure(encode, batch: list, batches: int) -> tuple[float, float, int]:
+    size = len(encode(batch))
+    started = time.perf_counter()
+    for _ in range(batches):
+        encode(batch)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    encode(batch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return batches / elapsed, size * batches / elapsed / 1e6, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=512, help="Spans per batch")
+    parser.add_argument("--batches", type=int, default=200)
+    args = parser.parse_args()
+
+    batch = make_batch(args.batch)
+    encoder = OTLPSpanEncoder()
+    encoders = {
+        "direct": encoder.encode,
+        "stock": lambda spans: encode_spans(spans).SerializeToString(),
+    }
+    print(f"{args.batch} action spans per batch, {len(encoder.encode(batch)) / 1e3:.1f} kB encoded")
+    print(f"{'encoder':>8} {'batches/s':>12} {'MB/s':>8} {'heap peak kB':>13}")
+    for name, encode in encoders.items():
+        rate, throughput, peak = measure(encode, batch, args.batches)
+        print(f"{name:>8} {rate:>12,.0f} {throughput:>8.1f} {peak / 1e3:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
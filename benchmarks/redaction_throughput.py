@@ -0,0 +1,87 @@
+"""
+Redaction throughput in MB/s on a synthetic prompt corpus.
+
+Builds RAG-style prompts (retrieved passages, chat turns and a JSON tool result)
+with a sprinkling of emails, phone numbers, card numbers and API keys, then
+compares the single-pass Redactor with the same rules applied as chained
+re.sub calls, the usual hand-written processor:
+
+    python benchmarks/redaction_throughput.py --prompts 2000 --prompt-kb 8 --pii-rate 0.02
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+
+from value.internal.redaction import BUILTIN_RULES, Redactor
+
+WORDS = (
+    "the agent retrieved context from the knowledge base about quarterly revenue forecasts and customer "
+    "onboarding steps including account verification billing disputes refund policy escalation paths "
+    "summarize answer question document section paragraph according to internal guidelines version 2 "
+    "order 1842 shipped on 2024-03-18 with 3 items totalling 129.99 USD"
+).split()
+
+PII = (
+    lambda rng: f"{rng.choice(['jane', 'john.doe', 'ops+alerts'])}@{rng.choice(['example.com', 'corp.co.uk'])}",
+    lambda rng: f"+1 {rng.randint(200, 999)}-555-{rng.randint(1000, 9999)}",
+    lambda rng: "4111 1111 1111 1111",
+    lambda rng: "sk-proj-" + "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789") for _ in range(32)),
+)
+
+
+def make_prompt(rng: random.Random, size: int, pii_rate: float) -> str:
+    tokens = []
+    length = 0
+    while length < size:
+        token = rng.choice(PII)(rng) if rng.random() < pii_rate else rng.choice(WORDS)
+        tokens.append(token)
+        length += len(token) + 1
+    text = " ".join(tokens)
+    tool_result = json.dumps({"order_id": rng.randint(10**9, 10**10), "ts": time.time_ns(), "score": rng.random()})
+    return f"System: answer using the passages.\nPassages:\n{text}\nTool result: {tool_result}\nUser: what happened?"
+
+
+def chained(patterns: list[tuple[str, re.Pattern]], text: str) -> str:
+    for name, pattern in patterns:
+        text = pattern.sub(f"[REDACTED:{name}]", text)
+    return text
+
+
+def measure(fn, corpus: list[str], repeat: int) -> float:
+    total = sum(len(text) for text in corpus) * repeat
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            fn(text)
+    return total / (time.perf_counter() - started) / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--prompts", type=int, default=2000)
+    parser.add_argument("--prompt-kb", type=float, default=8)
+    parser.add_argument("--pii-rate", type=float, default=0.02, help="Fraction of tokens that are PII")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    corpus = [make_prompt(rng, int(args.prompt_kb * 1024), args.pii_rate) for _ in range(args.prompts)]
+    redactor = Redactor()
+    patterns = [(name, re.compile(pattern)) for name, pattern in BUILTIN_RULES.items()]
+    attributes = {f"attribute.{index}": value for index, value in enumerate(["gpt-4o", "ok", 42, "search"] * 8)}
+
+    print(f"corpus: {len(corpus)} prompts, {sum(map(len, corpus)) / 1e6:.1f} MB")
+    print(f"single-pass redactor   {measure(redactor.redact, corpus, args.repeat):8.1f} MB/s")
+    print(f"chained re.sub         {measure(lambda text: chained(patterns, text), corpus, args.repeat):8.1f} MB/s")
+    started = time.perf_counter()
+    for _ in range(10000):
+        redactor.redact_attributes(attributes)
+    elapsed = (time.perf_counter() - started) / 10000
+    print(f"32 short attributes    {elapsed * 1e6:8.1f} us/span")
+
+
+if __name__ == "__main__":
+    main()
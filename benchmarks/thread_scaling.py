@@ -0,0 +1,80 @@
+"""
+Emission-path throughput against thread count.
+
+Runs the action send path (ActionEmitter -> UserContextSpanProcessor -> export
+processor) with a no-op exporter and reports actions/s per thread count, for the
+stock BatchSpanProcessor and the per-thread buffered processor. Run it on both a
+regular and a free-threaded (3.13t) interpreter to compare:
+
+    python benchmarks/thread_scaling.py --threads 1,2,4,8,16,32,64 --actions 20000
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+from value.internal.actions import ActionContext, ActionEmitter
+from value.internal.buffering import ThreadBufferedSpanProcessor
+from value.internal.span_processor import UserContextSpanProcessor
+
+
+class NullExporter(SpanExporter):
+    def export(self, spans):
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+PROCESSORS = {
+    "batch": lambda: BatchSpanProcessor(NullExporter(), max_queue_size=1 << 20),
+    "thread-buffered": lambda: ThreadBufferedSpanProcessor(NullExporter(), max_queue_size=1 << 20),
+}
+
+
+def run(processor_name: str, threads: int, actions_per_thread: int) -> float:
+    provider = TracerProvider(shutdown_on_exit=False)
+    provider.add_span_processor(UserContextSpanProcessor())
+    processor = PROCESSORS[processor_name]()
+    provider.add_span_processor(processor)
+    emitter = ActionEmitter(tracer=provider.get_tracer("benchmark"))
+    barrier = threading.Barrier(threads + 1)
+
+    def _worker(index: int) -> None:
+        barrier.wait()
+        with ActionContext(emitter, anonymous_id=f"anon-{index}", user_id=f"user-{index}") as context:
+            for _ in range(actions_per_thread):
+                context.send("benchmark_action", **{"value.action.type": "benchmark", "payload": "x" * 64})
+
+    workers = [threading.Thread(target=_worker, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    provider.shutdown()
+    return threads * actions_per_thread / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", default="1,2,4,8,16,32,64", help="Comma-separated thread counts")
+    parser.add_argument("--actions", type=int, default=20000, help="Actions per thread")
+    args = parser.parse_args()
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    print(f"{'threads':>8} " + " ".join(f"{name:>16}" for name in PROCESSORS))
+    for threads in (int(value) for value in args.threads.split(",")):
+        rates = [run(name, threads, args.actions) for name in PROCESSORS]
+        print(f"{threads:>8} " + " ".join(f"{rate:>14,.0f}/s" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ from .instrumentation import (
     is_library_available,
     uninstrument,
 )
+from .internal.delivery import DeliveryError
+from .internal.propagation import extract, inject, instrument_httpx
 
 __version__ = "0.1.6"
 __all__ = [
@@ -18,4 +20,8 @@ __all__ = [
     "is_library_available",
     "initialize_async",
     "initialize_sync",
+    "DeliveryError",
+    "inject",
+    "extract",
+    "instrument_httpx",
 ]
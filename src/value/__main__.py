@@ -0,0 +1,135 @@
+"""Command line tools: `python -m value <command>`."""
+
+import argparse
+import json
+import sys
+from typing import Optional
+
+
+def _ship(args: argparse.Namespace) -> int:
+    from .internal.ship import ship
+
+    report = ship(
+        directory=args.directory,
+        endpoint=args.endpoint,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint,
+        max_request_bytes=args.max_request_bytes,
+        delete=args.delete,
+        compression=not args.no_compression,
+    )
+    print(
+        f"Shipped {report.records} records from {report.files} files in {report.requests} requests "
+        f"({report.bytes / 1e6:.1f} MB, {report.bytes_per_second / 1e6:.1f} MB/s, {report.duration:.2f}s)"
+    )
+    if report.failed_files:
+        print(f"Failed files (resume with the same --checkpoint): {', '.join(report.failed_files)}")
+        return 1
+    return 0
+
+
+def _shipper(args: argparse.Namespace) -> int:
+    import signal
+
+    from .internal.shipper import Shipper, SpanRing
+
+    try:
+        ring = SpanRing.attach(args.ring)
+    except FileNotFoundError:
+        print(f"No span ring named {args.ring}", file=sys.stderr)
+        return 1
+    shipper = Shipper(
+        ring,
+        endpoint=args.endpoint,
+        max_request_bytes=args.max_request_bytes,
+        compression=not args.no_compression,
+        idle_timeout=args.idle_timeout,
+    )
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: shipper.stop_event.set())
+    shipper.run()
+    ring.close()
+    return 0
+
+
+def _action_mix(value: str) -> tuple[tuple[str, float], ...]:
+    mix = []
+    for item in value.split(","):
+        name, _, weight = item.strip().partition(":")
+        mix.append((name, float(weight or 1)))
+    return tuple(mix)
+
+
+def _loadgen(args: argparse.Namespace) -> int:
+    from .internal.loadgen import DEFAULT_ACTION_MIX, LoadgenOptions, run_loadgen
+
+    report = run_loadgen(
+        LoadgenOptions(
+            rate=args.rate,
+            duration=args.duration,
+            concurrency=args.concurrency,
+            mode=args.mode,
+            attribute_count=args.attributes,
+            attribute_bytes=args.attribute_bytes,
+            action_mix=args.mix or DEFAULT_ACTION_MIX,
+            endpoint=args.endpoint,
+        )
+    )
+    print(json.dumps(report.as_dict(), indent=2) if args.json else report.format())
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for all commands."""
+    parser = argparse.ArgumentParser(prog="python -m value", description="Value SDK command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ship_parser = commands.add_parser("ship", help="Replay otlp span files to an OTLP/gRPC endpoint")
+    ship_parser.add_argument("directory", help="Directory written by the file exporter (otlp format)")
+    ship_parser.add_argument("--endpoint", required=True, help="OTLP/gRPC endpoint, host:port or URL")
+    ship_parser.add_argument("--workers", type=int, default=4, help="Files shipped in parallel (default: 4)")
+    ship_parser.add_argument("--checkpoint", help="Checkpoint file used to resume interrupted runs")
+    ship_parser.add_argument(
+        "--max-request-bytes", type=int, default=3 * 1024 * 1024, help="Upper bound for one request"
+    )
+    ship_parser.add_argument("--delete", action="store_true", help="Delete files once fully shipped")
+    ship_parser.add_argument("--no-compression", action="store_true", help="Disable gzip on the wire")
+    ship_parser.set_defaults(handler=_ship)
+
+    shipper_parser = commands.add_parser(
+        "shipper", help="Export spans written to a shared-memory ring by application processes"
+    )
+    shipper_parser.add_argument("--ring", required=True, help="Shared memory name of the span ring")
+    shipper_parser.add_argument("--endpoint", required=True, help="OTLP/gRPC endpoint, host:port or URL")
+    shipper_parser.add_argument(
+        "--max-request-bytes", type=int, default=3 * 1024 * 1024, help="Upper bound for one request"
+    )
+    shipper_parser.add_argument(
+        "--idle-timeout", type=float, default=300.0, help="Exit after this many seconds without spans"
+    )
+    shipper_parser.add_argument("--no-compression", action="store_true", help="Disable gzip on the wire")
+    shipper_parser.set_defaults(handler=_shipper)
+
+    loadgen_parser = commands.add_parser("loadgen", help="Drive a client with synthetic actions and report costs")
+    loadgen_parser.add_argument("--rate", type=float, default=1000, help="Target actions/s, 0 for unthrottled")
+    loadgen_parser.add_argument("--duration", type=float, default=10, help="Run time in seconds (default: 10)")
+    loadgen_parser.add_argument("--concurrency", type=int, default=8, help="Concurrent senders (default: 8)")
+    loadgen_parser.add_argument("--mode", choices=("async", "sync"), default="async", help="Client to drive")
+    loadgen_parser.add_argument("--attributes", type=int, default=4, help="Custom attributes per action")
+    loadgen_parser.add_argument("--attribute-bytes", type=int, default=64, help="Size of each attribute value")
+    loadgen_parser.add_argument("--mix", type=_action_mix, help="Action mix, e.g. search:0.7,checkout:0.3")
+    loadgen_parser.add_argument("--endpoint", help="Export to this OTLP endpoint instead of a stand-in collector")
+    loadgen_parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    loadgen_parser.set_defaults(handler=_loadgen)
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Run a command line tool and return its exit code."""
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,30 @@
 """SDK client implementations."""
 
-from typing import Any, Optional
+import asyncio
+import tracemalloc
+from collections.abc import Mapping
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Optional
 
 from opentelemetry import trace
 
 from .internal._api import SyncValueControlPlaneAPI, ValueControlPlaneAPI
 from .internal.actions import ActionContext, ActionEmitter
 from .internal.config import load_config_from_env
-from .internal.tracing import initialize_tracing
+from .internal.delivery import DeliveryTracker
+from .internal.executors import ContextPreservingExecutor, bind_context
+from .internal.propagation import extract
+from .internal.quotas import EmissionQuota, QuotaRule
+from .internal.remote_config import RemoteConfigPoller, RuntimeConfig, RuntimeSettings
+from .internal.shutdown import ShutdownHooks, ShutdownReport, register_shutdown_hooks
+from .internal.tracing import TracingPipeline, initialize_tracing, register_tracing
 
 
-class AsyncValueClient:
-    """Asynchronous client for the Value Control SDK."""
+class _ValueClientBase:
+    """State and setup shared by the synchronous and asynchronous clients."""
+
+    # Delivery receipts are awaitables on the async client, concurrent.futures.Future otherwise
+    _awaitable_receipts = False
 
     def __init__(
         self,
@@ -23,15 +36,13 @@ class AsyncValueClient:
     ):
         config = load_config_from_env()
         self.secret = secret
+        self._config = config
 
         self._otel_endpoint = otel_endpoint or config.otel_endpoint
         self._service_name = service_name
         self._backend_url = backend_url or config.backend_url
         self._enable_console_export = enable_console_export or config.enable_console_export
 
-        # Setup internal API client
-        self._api_client = ValueControlPlaneAPI(secret=self.secret, base_url=self._backend_url)
-
         # Agent context attributes
         self.organization_id = None
         self.workspace_id = None
@@ -39,16 +50,23 @@ class AsyncValueClient:
         self.agent_id = None
         self.value_attributes = {}
         self._tracer = None
+        self._pipeline: Optional[TracingPipeline] = None
         self.actions_emitter = None
-
-    @property
-    def api_client(self) -> ValueControlPlaneAPI:
-        return self._api_client
+        self._delivery_tracker = DeliveryTracker()
+        self._runtime = RuntimeConfig() if config.remote_config else None
+        self._config_poller: Optional[RemoteConfigPoller] = None
+        self._quota: Optional[EmissionQuota] = None
+        self._shutdown_hooks: Optional[ShutdownHooks] = None
 
     @property
     def tracer(self) -> Optional[trace.Tracer]:
         return self._tracer
 
+    @property
+    def runtime_settings(self) -> Optional[RuntimeSettings]:
+        """Settings currently applied from the control plane (None unless VALUE_REMOTE_CONFIG is set)."""
+        return self._runtime.settings if self._runtime is not None else None
+
     def action_context(self, anonymous_id: str, user_id: Optional[str] = None, **kwargs: Any) -> Any:
         """Create an action context for sending multiple actions."""
         return ActionContext(
@@ -61,9 +79,46 @@ class AsyncValueClient:
     def action(self) -> ActionEmitter:
         return self.actions_emitter
 
-    async def initialize(self) -> None:
-        """Initialize tracer, actions_emitter, and fetch agent context from backend."""
-        agent_info = await self._api_client.get_agent_info()
+    def action_context_from(self, carrier: Mapping[str, str], **kwargs: Any) -> ActionContext:
+        """
+        Continue an action context propagated from another service.
+
+        Restores user_id/anonymous_id from the carrier's baggage and parents spans
+        created inside the context under the remote span (see value.inject).
+
+        Args:
+            carrier: Incoming HTTP or message headers
+            **kwargs: Additional action_context arguments
+
+        Returns:
+            An action context continuing the remote one
+        """
+        remote = extract(carrier)
+        return ActionContext(
+            emitter=self.actions_emitter,
+            anonymous_id=remote.anonymous_id,
+            user_id=remote.user_id,
+            parent_context=remote.context,
+            **kwargs,
+        )
+
+    def wrap_executor(self, executor: Executor) -> ContextPreservingExecutor:
+        """
+        Wrap a thread or process pool so submitted calls keep the current action context.
+
+        Spans created by the calls are attributed to the submitting action context's
+        user_id/anonymous_id and parented under the submitting span.
+
+        Args:
+            executor: A concurrent.futures executor
+
+        Returns:
+            An executor submitting to the wrapped one
+        """
+        return ContextPreservingExecutor(executor)
+
+    def _setup(self, agent_info: Mapping[str, Any]) -> None:
+        """Record the agent context fetched from the backend and start tracing, quotas and actions."""
         self.organization_id = agent_info.get("organization_id", "unknown")
         self.workspace_id = agent_info.get("workspace_id", "unknown")
         self.agent_name = agent_info.get("name", "unknown")
@@ -75,17 +130,101 @@ class AsyncValueClient:
             "value.agent.id": self.agent_id,
         }
 
-        self._tracer = initialize_tracing(
+        self._pipeline = self._setup_tracing()
+        self._tracer = self._pipeline.tracer
+        if self._config.profile_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._shutdown_hooks = register_shutdown_hooks(
+            self._shutdown_tracing, handle_sigterm=self._config.handle_sigterm
+        )
+        if self._config.quota_rate > 0:
+            self._quota = EmissionQuota(
+                QuotaRule(
+                    key=self._config.quota_key,
+                    rate=self._config.quota_rate,
+                    burst=self._config.quota_burst,
+                    overflow=self._config.quota_overflow,
+                    sample_ratio=self._config.quota_sample_ratio,
+                    max_keys=self._config.quota_max_keys,
+                ),
+                tracer=self._tracer,
+                report_interval=self._config.quota_report_interval,
+            ).start()
+        self.actions_emitter = ActionEmitter(
+            tracer=self._tracer,
+            event_actions=self._config.event_actions,
+            delivery_tracker=self._delivery_tracker,
+            awaitable_receipts=self._awaitable_receipts,
+            latency_analyzer=self._pipeline.latency_analyzer,
+            redactor=self._pipeline.redactor,
+            profile_actions=self._config.profile_actions,
+            profile_memory=self._config.profile_memory,
+            runtime=self._runtime,
+            overload=self._pipeline.overload,
+            quota=self._quota,
+        )
+        self._start_remote_config()
+
+    def _setup_tracing(self) -> TracingPipeline:
+        """Build the client's tracing pipeline, or register against the process's shared one."""
+        if self._config.shared_pipeline:
+            pipeline = register_tracing(
+                endpoint=self._otel_endpoint,
+                service_name=self._service_name,
+                console_export=self._enable_console_export,
+                attributes=self.value_attributes,
+                config=self._config,
+                runtime=self._runtime,
+            )
+            # Receipts are resolved by the shared exporter, so they go to its tracker
+            self._delivery_tracker = pipeline.delivery_tracker
+            return pipeline
+        return initialize_tracing(
             endpoint=self._otel_endpoint,
             service_name=self._service_name,
             console_export=self._enable_console_export,
             attributes=self.value_attributes,
+            delivery_tracker=self._delivery_tracker,
+            config=self._config,
+            runtime=self._runtime,
         )
-        self.actions_emitter = ActionEmitter(tracer=self._tracer)
 
+    def _start_remote_config(self) -> None:
+        """Start polling the control plane for runtime settings (with VALUE_REMOTE_CONFIG)."""
+        if self._runtime is None or self._config_poller is not None:
+            return
+        # The poller thread gets its own synchronous API client, closed when it stops
+        self._config_poller = RemoteConfigPoller(
+            SyncValueControlPlaneAPI(secret=self.secret, base_url=self._backend_url),
+            self._runtime,
+            interval=self._config.remote_config_interval,
+            long_poll=self._config.remote_config_long_poll,
+        ).start()
+
+    def _shutdown_tracing(self, timeout: Optional[float] = None) -> Optional[ShutdownReport]:
+        """Flush and shut down the tracing pipeline (used by the atexit/SIGTERM hooks)."""
+        if self._pipeline is None:
+            return None
+        if self._quota is not None:
+            # Stopping exports the last over-quota report before the pipeline flushes
+            self._quota.stop()
+        return self._pipeline.shutdown(timeout=self._config.shutdown_timeout if timeout is None else timeout)
+
+    def _close_tracing(self, timeout: Optional[float] = None) -> Optional[ShutdownReport]:
+        """Stop the config poller, shut down tracing and unregister the shutdown hooks (blocking)."""
+        if self._config_poller is not None:
+            self._config_poller.stop()
+        report = self._shutdown_tracing(timeout)
+        if self._shutdown_hooks is not None:
+            self._shutdown_hooks.remove()
+            self._shutdown_hooks = None
+        return report
+
+
+class AsyncValueClient(_ValueClientBase):
+    """Asynchronous client for the Value Control SDK."""
 
-class ValueClient:
-    """Synchronous client for the Value Control SDK."""
+    _awaitable_receipts = True
 
     def __init__(
         self,
@@ -95,68 +234,122 @@ class ValueClient:
         backend_url: Optional[str] = None,
         enable_console_export: bool = False,
     ):
-        config = load_config_from_env()
-        self.secret = secret
+        super().__init__(secret, service_name, otel_endpoint, backend_url, enable_console_export)
+        # Setup internal API client
+        self._api_client = ValueControlPlaneAPI(secret=self.secret, base_url=self._backend_url)
 
-        self._otel_endpoint = otel_endpoint or config.otel_endpoint
-        self._service_name = service_name
-        self._backend_url = backend_url or config.backend_url
-        self._enable_console_export = enable_console_export or config.enable_console_export
+    @property
+    def api_client(self) -> ValueControlPlaneAPI:
+        return self._api_client
+
+    def run_in_executor(self, executor: Optional[Executor], func: Callable[..., Any], *args: Any) -> asyncio.Future:
+        """
+        Like loop.run_in_executor, but func runs under the current action context.
+
+        Args:
+            executor: A thread or process pool executor (None uses the loop's default executor)
+            func: The function to run
+            *args: Positional arguments for func
+
+        Returns:
+            An asyncio future resolving to func's result
+        """
+        loop = asyncio.get_running_loop()
+        if executor is None:
+            return loop.run_in_executor(None, bind_context(func), *args)
+        return loop.run_in_executor(self.wrap_executor(executor), func, *args)
+
+    async def initialize(self) -> None:
+        """Initialize tracer, actions_emitter, and fetch agent context from backend."""
+        self._setup(await self._api_client.get_agent_info())
+
+    async def aclose(self, timeout: Optional[float] = None) -> Optional[ShutdownReport]:
+        """
+        Flush pending spans and release the client's resources.
+
+        Export processors are flushed in parallel under one overall deadline, then
+        the control plane HTTP client is closed.
+
+        Args:
+            timeout: Overall flush deadline in seconds (defaults to VALUE_SHUTDOWN_TIMEOUT)
+
+        Returns:
+            A report of flushed and lost spans, or None if the client was never initialized
+        """
+        report = await asyncio.to_thread(self._close_tracing, timeout)
+        await self._api_client.aclose()
+        return report
+
+    async def __aenter__(self) -> "AsyncValueClient":
+        if self._pipeline is None:
+            await self.initialize()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
 
+
+class ValueClient(_ValueClientBase):
+    """Synchronous client for the Value Control SDK."""
+
+    def __init__(
+        self,
+        secret: str,
+        service_name: str = "value-control-agent",
+        otel_endpoint: Optional[str] = None,
+        backend_url: Optional[str] = None,
+        enable_console_export: bool = False,
+    ):
+        super().__init__(secret, service_name, otel_endpoint, backend_url, enable_console_export)
         # Setup internal API client (sync version)
         self._api_client = SyncValueControlPlaneAPI(secret=self.secret, base_url=self._backend_url)
 
-        # Agent context attributes
-        self.organization_id = None
-        self.workspace_id = None
-        self.agent_name = None
-        self.agent_id = None
-        self.value_attributes = {}
-        self._tracer = None
-        self.actions_emitter = None
-
     @property
     def api_client(self) -> SyncValueControlPlaneAPI:
         return self._api_client
 
-    @property
-    def tracer(self) -> Optional[trace.Tracer]:
-        return self._tracer
+    def run_in_executor(self, executor: Executor, func: Callable[..., Any], *args: Any) -> Future:
+        """
+        Submit func to a thread or process pool under the current action context.
 
-    def action_context(self, anonymous_id: str, user_id: Optional[str] = None, **kwargs: Any) -> Any:
-        """Create an action context for sending multiple actions."""
-        return ActionContext(
-            emitter=self.actions_emitter,
-            anonymous_id=anonymous_id,
-            user_id=user_id,
-            **kwargs,
-        )
+        Args:
+            executor: A thread or process pool executor
+            func: The function to run
+            *args: Positional arguments for func
 
-    def action(self) -> ActionEmitter:
-        return self.actions_emitter
+        Returns:
+            A future resolving to func's result
+        """
+        return self.wrap_executor(executor).submit(func, *args)
 
     def initialize(self) -> None:
         """Initialize tracer, actions_emitter, and fetch agent context from backend."""
-        agent_info = self._api_client.get_agent_info()
-        self.organization_id = agent_info.get("organization_id", "unknown")
-        self.workspace_id = agent_info.get("workspace_id", "unknown")
-        self.agent_name = agent_info.get("name", "unknown")
-        self.agent_id = agent_info.get("id", "unknown")
+        self._setup(self._api_client.get_agent_info())
 
-        self.value_attributes = {
-            "value.agent.organization_id": self.organization_id,
-            "value.agent.workspace_id": self.workspace_id,
-            "value.agent.name": self.agent_name,
-            "value.agent.id": self.agent_id,
-        }
+    def close(self, timeout: Optional[float] = None) -> Optional[ShutdownReport]:
+        """
+        Flush pending spans and release the client's resources.
 
-        self._tracer = initialize_tracing(
-            endpoint=self._otel_endpoint,
-            service_name=self._service_name,
-            console_export=self._enable_console_export,
-            attributes=self.value_attributes,
-        )
-        self.actions_emitter = ActionEmitter(tracer=self._tracer)
+        Export processors are flushed in parallel under one overall deadline, then
+        the control plane HTTP client is closed.
+
+        Args:
+            timeout: Overall flush deadline in seconds (defaults to VALUE_SHUTDOWN_TIMEOUT)
+
+        Returns:
+            A report of flushed and lost spans, or None if the client was never initialized
+        """
+        report = self._close_tracing(timeout)
+        self._api_client.close()
+        return report
+
+    def __enter__(self) -> "ValueClient":
+        if self._pipeline is None:
+            self.initialize()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
 
 
 def initialize_sync(
@@ -28,6 +28,19 @@ class ValueControlPlaneAPI:
             "X-Agent-Secret": secret,
             "Content-Type": "application/json",
         }
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def get_agent_info(self) -> dict[str, Any]:
         """
@@ -39,13 +52,39 @@ class ValueControlPlaneAPI:
         Raises:
             httpx.HTTPError: On API request failure
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(
-                f"{self.base_url}/api/v1/agent_instance/info",
-                headers=self._headers,
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._get_client().get(
+            f"{self.base_url}/api/v1/agent_instance/info",
+            headers=self._headers,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def get_runtime_config(
+        self, etag: Optional[str] = None, wait: float = 0.0
+    ) -> tuple[Optional[str], Optional[dict[str, Any]]]:
+        """
+        Fetch the agent's runtime telemetry settings if they changed since etag.
+
+        Args:
+            etag: ETag of the settings already held (sent as If-None-Match)
+            wait: Seconds the server may hold the request open waiting for a change (long poll)
+
+        Returns:
+            The (etag, settings) pair, with settings None when they are unchanged
+
+        Raises:
+            httpx.HTTPError: On API request failure
+        """
+        response = await self._get_client().get(
+            f"{self.base_url}/api/v1/agent_instance/config",
+            headers=_conditional_headers(self._headers, etag),
+            params={"wait": wait} if wait else None,
+            timeout=self.timeout + wait,
+        )
+        if response.status_code == 304:
+            return etag, None
+        response.raise_for_status()
+        return response.headers.get("ETag"), response.json()
 
 
 class SyncValueControlPlaneAPI:
@@ -71,6 +110,19 @@ class SyncValueControlPlaneAPI:
             "X-Agent-Secret": secret,
             "Content-Type": "application/json",
         }
+        self._client: Optional[httpx.Client] = None
+
+    def _get_client(self) -> httpx.Client:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(timeout=self.timeout)
+        return self._client
+
+    def close(self) -> None:
+        """Close the underlying HTTP client."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
 
     def get_agent_info(self) -> dict[str, Any]:
         """
@@ -82,10 +134,43 @@ class SyncValueControlPlaneAPI:
         Raises:
             httpx.HTTPError: On API request failure
         """
-        with httpx.Client(timeout=self.timeout) as client:
-            response = client.get(
-                f"{self.base_url}/api/v1/agent_instance/info",
-                headers=self._headers,
-            )
-            response.raise_for_status()
-            return response.json()
+        response = self._get_client().get(
+            f"{self.base_url}/api/v1/agent_instance/info",
+            headers=self._headers,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def get_runtime_config(
+        self, etag: Optional[str] = None, wait: float = 0.0
+    ) -> tuple[Optional[str], Optional[dict[str, Any]]]:
+        """
+        Fetch the agent's runtime telemetry settings if they changed since etag.
+
+        Args:
+            etag: ETag of the settings already held (sent as If-None-Match)
+            wait: Seconds the server may hold the request open waiting for a change (long poll)
+
+        Returns:
+            The (etag, settings) pair, with settings None when they are unchanged
+
+        Raises:
+            httpx.HTTPError: On API request failure
+        """
+        response = self._get_client().get(
+            f"{self.base_url}/api/v1/agent_instance/config",
+            headers=_conditional_headers(self._headers, etag),
+            params={"wait": wait} if wait else None,
+            timeout=self.timeout + wait,
+        )
+        if response.status_code == 304:
+            return etag, None
+        response.raise_for_status()
+        return response.headers.get("ETag"), response.json()
+
+
+def _conditional_headers(headers: dict[str, str], etag: Optional[str]) -> dict[str, str]:
+    """Return the request headers, with If-None-Match when an ETag is held."""
+    if etag is None:
+        return headers
+    return {**headers, "If-None-Match": etag}
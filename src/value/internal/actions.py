@@ -1,36 +1,98 @@
 """Action emitter for creating custom OpenTelemetry spans."""
 
+import asyncio
+import heapq
+import itertools
 import json
-from contextvars import ContextVar
-from typing import Any, Optional
+import logging
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Optional
 
+from opentelemetry import context as otel_context
 from opentelemetry import trace
+from opentelemetry.context import Context
 
 from .config import VALUE_ACTION_ATTRIBUTES
+from .delivery import DeliveryError, DeliveryTracker
+from .latency import LatencyAnalyzerSpanProcessor, LatencyBreakdown, LatencyTracker
+from .normalization import MAX_STRING, Budget, normalize, to_attribute_value
+from .overload import DROP_PAYLOADS, ESSENTIAL_ONLY, PAYLOAD_KWARGS, ROLLUP_ACTIONS, ActionRollup, OverloadController
+from .profiling import Snapshot, finish_profile, start_profile
+from .quotas import EmissionQuota
+from .redaction import Redactor
+from .remote_config import RuntimeConfig
 from .span_processor import reset_user_context, set_user_context
 
+_STANDARD_ATTRIBUTES = frozenset(VALUE_ACTION_ATTRIBUTES)
+
+logger = logging.getLogger(__name__)
+
 _current_action_context: ContextVar[Optional["ActionContext"]] = ContextVar("_current_action_context", default=None)
 
 
 class ActionEmitter:
     """Emitter for creating custom actions (OpenTelemetry spans)."""
 
-    def __init__(self, tracer: trace.Tracer):
+    def __init__(
+        self,
+        tracer: trace.Tracer,
+        event_actions: Iterable[str] = (),
+        delivery_tracker: Optional[DeliveryTracker] = None,
+        awaitable_receipts: bool = False,
+        latency_analyzer: Optional[LatencyAnalyzerSpanProcessor] = None,
+        profile_actions: bool = False,
+        profile_memory: bool = False,
+        redactor: Optional[Redactor] = None,
+        runtime: Optional[RuntimeConfig] = None,
+        overload: Optional[OverloadController] = None,
+        quota: Optional[EmissionQuota] = None,
+    ):
         """
         Initialize the action emitter.
 
         Args:
             tracer: OpenTelemetry tracer instance
+            event_actions: Action names that are recorded as events on the active span by default
+            delivery_tracker: Tracker resolving delivery receipts (required for receipt=True)
+            awaitable_receipts: Return asyncio futures instead of concurrent.futures.Future receipts
+            latency_analyzer: Analyzer computing a latency breakdown for every action context
+            profile_actions: Record CPU time and GC deltas on action contexts and timed actions by default
+            profile_memory: Also record the tracemalloc peak of profiled blocks (when tracemalloc is tracing)
+            redactor: Redactor scrubbing PII from action attributes before they are recorded
+            runtime: Control plane settings disabling actions and bounding their attributes
+            overload: Controller whose degradation level drops payloads, rolls up and sheds actions
+            quota: Per-key quota rolling up or sampling the actions of keys sending too many
         """
         self._tracer = tracer
+        self._event_actions = frozenset(event_actions)
+        self._delivery_tracker = delivery_tracker
+        self._awaitable_receipts = awaitable_receipts
+        self._latency_analyzer = latency_analyzer
+        self._profile_actions = profile_actions
+        self._profile_memory = profile_memory
+        self._redactor = redactor
+        self._runtime = runtime
+        self._overload = overload
+        self._quota = quota
+        self._rollup: Optional[ActionRollup] = None
+        if overload is not None:
+            self._rollup = ActionRollup(tracer)
+            overload.add_tick_callback(self._rollup.flush)
 
     def send(
         self,
         action_name: str,
         anonymous_id: str,
         user_id: Optional[str] = None,
+        as_event: Optional[bool] = None,
+        receipt: bool = False,
         **kwargs: Any,
-    ) -> None:
+    ) -> Optional[Any]:
         """
         Send an action immediately as an OpenTelemetry span.
 
@@ -43,32 +105,116 @@ class ActionEmitter:
             action_name: Name of the action
             anonymous_id: Anonymous ID (required if not in a start() context)
             user_id: User ID (optional)
+            as_event: Record the action as an event on the active span instead of a new span.
+                Defaults to True for action names configured as event actions.
+            receipt: Return a delivery receipt resolved when the action's batch is exported
             **kwargs: Additional attributes for the action
+
+        Returns:
+            A delivery receipt when receipt=True (a concurrent.futures.Future, or an
+            awaitable on the async client), otherwise None
         """
         current_context = _current_action_context.get()
+        if current_context:
+            anonymous_id, user_id = current_context._anonymous_id, current_context._user_id
+        if not self._admit(action_name, kwargs, receipt, anonymous_id, user_id):
+            return self._dropped_receipt() if receipt else None
+        return self._send_action(
+            action_name=action_name,
+            anonymous_id=anonymous_id,
+            user_id=user_id,
+            as_event=as_event,
+            receipt=receipt,
+            **kwargs,
+        )
+
+    @contextmanager
+    def timed(
+        self,
+        action_name: str,
+        anonymous_id: str,
+        user_id: Optional[str] = None,
+        profile: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> Iterator[trace.Span]:
+        """
+        Record an action spanning a block of code.
+
+        The value.action span is current while the block runs, so spans created in
+        it become its children. Within an action context, user_id and anonymous_id
+        are inherited from the context.
 
+        Args:
+            action_name: Name of the action
+            anonymous_id: Anonymous ID (required if not in an action context)
+            user_id: User ID (optional)
+            profile: Record value.profile.* CPU time and GC deltas (defaults to VALUE_PROFILE_ACTIONS)
+            **kwargs: Additional attributes for the action
+
+        Yields:
+            The action span
+        """
+        current_context = _current_action_context.get()
         if current_context:
-            self._send_action(
-                action_name=action_name,
-                anonymous_id=current_context._anonymous_id,
-                user_id=current_context._user_id,
-                **kwargs,
-            )
+            anonymous_id, user_id = current_context._anonymous_id, current_context._user_id
+        if not self._admit(action_name, kwargs, False, anonymous_id, user_id):
+            # The block still runs; it just records nothing
+            yield trace.INVALID_SPAN
+            return
+        attributes = self._build_attributes(action_name, anonymous_id, user_id, kwargs)
+        with self._tracer.start_as_current_span(name="value.action", attributes=attributes) as span:
+            snapshot = start_profile(self._profile_memory) if self._should_profile(profile) else None
+            try:
+                yield span
+            finally:
+                if snapshot is not None:
+                    span.set_attributes(finish_profile(snapshot))
+
+    def _admit(
+        self,
+        action_name: str,
+        kwargs: dict[str, Any],
+        receipt: bool,
+        anonymous_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Return False if the action is not recorded on its own.
+
+        That is the case when the runtime settings disable it, when its key is over
+        quota (and it is not sampled), or when the overload controller rolls it up
+        into counts or sheds it. The overload controller always records error and
+        billing actions, and sheds actions awaiting a receipt rather than rolling them up.
+        """
+        if self._runtime is not None and self._runtime.settings.drops(action_name):
+            return False
+        if self._quota is not None:
+            context = _current_action_context.get()
+            context_attributes = context._attributes if context is not None else None
+            if not self._quota.admit(action_name, user_id, anonymous_id, kwargs, context_attributes):
+                return False
+        overload = self._overload
+        if overload is None or overload.level < ROLLUP_ACTIONS or overload.keeps(action_name, kwargs):
+            return True
+        if overload.level < ESSENTIAL_ONLY and not receipt:
+            overload.rolled_up += 1
+            self._rollup.add(action_name)
         else:
-            self._send_action(
-                action_name=action_name,
-                anonymous_id=anonymous_id,
-                user_id=user_id,
-                **kwargs,
-            )
+            overload.shed += 1
+        return False
+
+    def _should_profile(self, profile: Optional[bool]) -> bool:
+        return self._profile_actions if profile is None else profile
 
     def _send_action(
         self,
         action_name: str,
         anonymous_id: str,
         user_id: Optional[str] = None,
+        as_event: Optional[bool] = None,
+        receipt: bool = False,
         **kwargs: Any,
-    ) -> None:
+    ) -> Optional[Any]:
         """
         Internal method to send an action.
 
@@ -76,15 +222,151 @@ class ActionEmitter:
             action_name: Name of the action
             anonymous_id: Anonymous ID for the action
             user_id: User ID for the action
+            as_event: Record the action as an event on the active span
+            receipt: Return a delivery receipt for the action
             **kwargs: Additional attributes for the action
+
+        Returns:
+            A delivery receipt when receipt=True, otherwise None
+        """
+        standard_attrs = self._build_attributes(action_name, anonymous_id, user_id, kwargs)
+        future = self._new_receipt() if receipt else None
+
+        if as_event is None:
+            as_event = action_name in self._event_actions
+        if as_event:
+            # Annotate the active span when there is one; otherwise fall back to a standalone span
+            current_span = trace.get_current_span()
+            if current_span.is_recording():
+                current_span.add_event("value.action", attributes=standard_attrs)
+                if future is not None:
+                    # The event ships with the span it annotates
+                    self._register_receipt(current_span, future)
+                    return self._receipt_handle(future)
+                return None
+
+        # The action span is a leaf, so it is never made current: that saves a context attach/detach per send
+        span = self._tracer.start_span(name="value.action", attributes=standard_attrs)
+        if future is not None:
+            self._register_receipt(span, future)
+        span.end()
+        return self._receipt_handle(future) if future is not None else None
+
+    def _new_receipt(self) -> Future:
+        """Allocate an unregistered delivery receipt."""
+        if self._delivery_tracker is None:
+            raise ValueError("Delivery receipts require an ActionEmitter created with a delivery_tracker")
+        return Future()
+
+    def _register_receipt(self, span: trace.Span, future: Future) -> None:
+        """
+        Register a receipt on the span carrying its action.
+
+        A span that is not sampled never reaches the exporter, so its receipt
+        fails right away instead of staying pending until shutdown.
+        """
+        span_context = span.get_span_context()
+        if span.is_recording() and span_context.trace_flags.sampled:
+            self._delivery_tracker.register(span_context.span_id, future)
+        else:
+            future.set_exception(DeliveryError("Action not recorded: its span was sampled out"))
+
+    def _dropped_receipt(self) -> Any:
+        """Return an already failed receipt for an action that was not recorded."""
+        future = self._new_receipt()
+        future.set_exception(DeliveryError("Action not recorded: disabled, over quota or shed under load"))
+        return self._receipt_handle(future)
+
+    def _receipt_handle(self, future: Future) -> Any:
+        """Return the caller-facing handle for a receipt (awaitable on the async client)."""
+        if self._awaitable_receipts:
+            return asyncio.wrap_future(future)
+        return future
+
+    def _send_batch(
+        self,
+        anonymous_id: str,
+        user_id: Optional[str],
+        context_attributes: dict[str, Any],
+        actions: list[tuple[int, dict[str, Any], Optional[Future]]],
+        parent: Optional[Context] = None,
+    ) -> None:
+        """
+        Send coalesced actions as a single value.action.batch span.
+
+        Attributes shared by every action (user_id, anonymous_id and the context
+        attributes) are stored once on the span; each action becomes a value.action
+        event carrying only its own attributes.
+
+        Args:
+            anonymous_id: Anonymous ID shared by the actions
+            user_id: User ID shared by the actions
+            context_attributes: Attributes of the enclosing action context
+            actions: (timestamp_ns, attributes, receipt) tuples, attributes built with _build_attributes
+            parent: Context the batch span is started in (defaults to the current context)
+        """
+        batch_attrs: dict[str, Any] = {"value.action.batch.size": len(actions)}
+        if user_id:
+            batch_attrs["value.action.user_id"] = user_id
+        if anonymous_id:
+            batch_attrs["value.action.anonymous_id"] = anonymous_id
+        if context_attributes:
+            context_json = json.dumps(normalize(context_attributes))
+            batch_attrs["value.action.context_attributes"] = (
+                self._redactor.redact(context_json) if self._redactor is not None else context_json
+            )
+
+        span = self._tracer.start_span(
+            name="value.action.batch", context=parent, attributes=batch_attrs, start_time=actions[0][0]
+        )
+        for timestamp, attributes, future in actions:
+            span.add_event("value.action", attributes=attributes, timestamp=timestamp)
+            if future is not None:
+                self._register_receipt(span, future)
+        span.end()
+
+    def _build_attributes(
+        self,
+        action_name: str,
+        anonymous_id: Optional[str],
+        user_id: Optional[str],
+        kwargs: dict[str, Any],
+    ) -> dict[str, Any]:
         """
+        Split action kwargs into value.action.* attributes and JSON-encoded user attributes.
+
+        Values are normalized on the way: standard attributes become native attribute
+        types, user attributes are bounded (arrays summarized, containers capped, and
+        all of them together held to one MAX_TOTAL budget). With
+        a redactor, PII is scrubbed from the result, the user attributes JSON in one scan.
+        Runtime settings may lower the per-string bound, and prompt/response payloads are
+        left out while the overload controller drops payloads.
+        """
+        limit = self._runtime.settings.max_attribute_length if self._runtime is not None else 0
+        max_string = limit or MAX_STRING
+        if (
+            self._overload is not None
+            and self._overload.level >= DROP_PAYLOADS
+            and not PAYLOAD_KWARGS.isdisjoint(kwargs)
+        ):
+            kwargs = {key: value for key, value in kwargs.items() if key not in PAYLOAD_KWARGS}
         standard_attrs = {}
         non_standard_attrs = {}
+        budget = Budget()
+        truncated = 0
         for key, value in kwargs.items():
-            if key in VALUE_ACTION_ATTRIBUTES:
+            if key in _STANDARD_ATTRIBUTES:
+                value = to_attribute_value(value, max_string=max_string)
+                if limit and type(value) is str and len(value) > limit:
+                    value = value[:limit]
                 standard_attrs[key] = value
+            elif budget.remaining <= 0:
+                truncated += 1
             else:
-                non_standard_attrs[key] = value
+                budget.remaining -= len(key) + 3
+                non_standard_attrs[key] = normalize(value, max_string=max_string, budget=budget)
+        if truncated:
+            non_standard_attrs["__truncated__"] = truncated
 
         if user_id:
             standard_attrs["value.action.user_id"] = user_id
@@ -93,9 +375,64 @@ class ActionEmitter:
 
         standard_attrs["value.action.name"] = action_name
         standard_attrs["value.action.user_attributes"] = json.dumps(non_standard_attrs)
+        if self._redactor is not None:
+            return self._redactor.redact_attributes(standard_attrs)
+        return standard_attrs
+
+
+class _FlushScheduler:
+    """
+    One daemon thread running the delayed flushes of every coalescing action context.
+
+    Entries are [deadline, sequence, callback] lists in a heap; cancelling one
+    clears its callback, and it is discarded when it reaches the top.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._heap: list[list] = []
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> list:
+        """Run callback on the scheduler thread after delay seconds; returns the entry to cancel."""
+        entry = [time.monotonic() + delay, next(self._sequence), callback]
+        with self._condition:
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="value-coalesce-flush", daemon=True)
+                self._thread.start()
+            elif self._heap[0] is entry:
+                self._condition.notify()
+        return entry
+
+    @staticmethod
+    def cancel(entry: list) -> None:
+        """Cancel a scheduled callback (a no-op if it already ran)."""
+        entry[2] = None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._heap and self._heap[0][2] is None:
+                        heapq.heappop(self._heap)
+                        continue
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    remaining = self._heap[0][0] - time.monotonic()
+                    if remaining <= 0:
+                        callback = heapq.heappop(self._heap)[2]
+                        break
+                    self._condition.wait(remaining)
+            try:
+                callback()
+            except Exception:
+                logger.exception("Exception while flushing coalesced actions")
+
 
-        with self._tracer.start_as_current_span(name="value.action", attributes=standard_attrs):
-            pass
+_flush_scheduler = _FlushScheduler()
 
 
 class ActionContext:
@@ -106,6 +443,11 @@ class ActionContext:
         emitter: ActionEmitter,
         anonymous_id: str,
         user_id: Optional[str] = None,
+        coalesce: bool = False,
+        coalesce_max_actions: int = 50,
+        coalesce_max_age: float = 5.0,
+        parent_context: Optional[Context] = None,
+        profile: Optional[bool] = None,
         **kwargs: Any,
     ):
         """
@@ -115,6 +457,14 @@ class ActionContext:
             emitter: The ActionEmitter instance
             anonymous_id: Anonymous ID for the action context
             user_id: User ID for the action context
+            coalesce: Buffer sends and export them as one value.action.batch span on exit
+            coalesce_max_actions: Flush the buffer early once it holds this many actions
+            coalesce_max_age: Flush the buffer once its oldest action is this many seconds old, from the
+                shared flush thread if no further send comes (0 flushes on every send)
+            parent_context: OpenTelemetry context (e.g. extracted from a remote carrier) made
+                current while the context is active, so spans continue the remote trace
+            profile: Record value.profile.* CPU time and GC deltas of the context on its
+                value.action.context summary span (defaults to VALUE_PROFILE_ACTIONS)
             **kwargs: Additional attributes for the context
         """
         self._emitter = emitter
@@ -124,33 +474,159 @@ class ActionContext:
         self._token = None
         self._action_sent = False
         self._user_context_tokens = None
+        self._coalesce = coalesce
+        self._coalesce_max_actions = coalesce_max_actions
+        self._coalesce_max_age_ns = int(coalesce_max_age * 1e9)
+        self._pending: list[tuple[int, dict[str, Any], Optional[Future]]] = []
+        # The age cap is also enforced by the shared flush scheduler, so sends and flushes can come from two threads
+        self._pending_lock = threading.Lock()
+        self._pending_context: Optional[Context] = None
+        self._scheduled_flush: Optional[list] = None
+        self._parent_context = parent_context
+        self._parent_token = None
+        self._latency: Optional[tuple[LatencyTracker, Token]] = None
+        self._profile = profile
+        self._profile_snapshot: Optional[Snapshot] = None
+        self._started = 0
 
     def __enter__(self) -> Any:
         """Enter the context and set user context."""
+        if self._parent_context is not None:
+            self._parent_token = otel_context.attach(self._parent_context)
         self._token = _current_action_context.set(self)
         self._user_context_tokens = set_user_context(user_id=self._user_id, anonymous_id=self._anonymous_id)
+        if self._emitter is not None:
+            if self._emitter._latency_analyzer is not None:
+                self._latency = self._emitter._latency_analyzer.begin()
+            if self._emitter._should_profile(self._profile):
+                self._started = time.time_ns()
+                self._profile_snapshot = start_profile(self._emitter._profile_memory)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Exit the context and reset user context."""
+        """Exit the context, flush coalesced actions and reset user context."""
+        self.flush()
+        self._emit_summary()
         if self._user_context_tokens:
             reset_user_context(*self._user_context_tokens)
         if self._token:
             _current_action_context.reset(self._token)
+        if self._parent_token is not None:
+            otel_context.detach(self._parent_token)
+            self._parent_token = None
         return False
 
-    def send(self, action_name: str, **kwargs: Any) -> None:
+    def send(
+        self,
+        action_name: str,
+        as_event: Optional[bool] = None,
+        receipt: bool = False,
+        **kwargs: Any,
+    ) -> Optional[Any]:
         """
         Send an action within this context.
 
         Args:
             action_name: Name of the action
+            as_event: Record the action as an event on the active span instead of a new span
+            receipt: Return a delivery receipt resolved when the action's batch is exported
             **kwargs: Additional attributes for the action
+
+        Returns:
+            A delivery receipt when receipt=True, otherwise None
         """
         self._action_sent = True
-        self._emitter.send(
+        if as_event is None:
+            as_event = action_name in self._emitter._event_actions
+        if self._coalesce and not as_event:
+            if not self._emitter._admit(action_name, kwargs, receipt, self._anonymous_id, self._user_id):
+                return self._emitter._dropped_receipt() if receipt else None
+            now = time.time_ns()
+            future = self._emitter._new_receipt() if receipt else None
+            attributes = self._emitter._build_attributes(action_name, None, None, kwargs)
+            with self._pending_lock:
+                if not self._pending:
+                    self._pending_context = otel_context.get_current()
+                    if self._coalesce_max_age_ns > 0:
+                        self._scheduled_flush = _flush_scheduler.schedule(self._coalesce_max_age_ns / 1e9, self.flush)
+                self._pending.append((now, attributes, future))
+                full = (
+                    len(self._pending) >= self._coalesce_max_actions
+                    or now - self._pending[0][0] >= self._coalesce_max_age_ns
+                )
+            if full:
+                self.flush()
+            return self._emitter._receipt_handle(future) if future is not None else None
+
+        return self._emitter.send(
             action_name=action_name,
             anonymous_id=self._anonymous_id,
             user_id=self._user_id,
+            as_event=as_event,
+            receipt=receipt,
             **kwargs,
         )
+
+    def _emit_summary(self) -> None:
+        """Export the value.action.context summary span of a profiled or analyzed context."""
+        attributes: dict[str, Any] = {}
+        if self._profile_snapshot is not None:
+            attributes.update(finish_profile(self._profile_snapshot))
+            self._profile_snapshot = None
+        started = self._started
+        if self._latency is not None:
+            tracker, token = self._latency
+            attributes.update(self._emitter._latency_analyzer.end(tracker, token).to_attributes())
+            started = tracker.started
+        if attributes:
+            span = self._emitter._tracer.start_span("value.action.context", attributes=attributes, start_time=started)
+            span.end()
+
+    def timed(self, action_name: str, profile: Optional[bool] = None, **kwargs: Any) -> Any:
+        """
+        Record an action spanning a block of code within this context.
+
+        Args:
+            action_name: Name of the action
+            profile: Record value.profile.* CPU time and GC deltas on the action span
+            **kwargs: Additional attributes for the action
+
+        Returns:
+            A context manager yielding the action span
+        """
+        return self._emitter.timed(
+            action_name, anonymous_id=self._anonymous_id, user_id=self._user_id, profile=profile, **kwargs
+        )
+
+    def latency_breakdown(self) -> Optional[LatencyBreakdown]:
+        """
+        Return where this context's wall time went (requires VALUE_LATENCY_ANALYSIS).
+
+        Inside the context this is a snapshot up to now; after exit it is the final
+        breakdown that was also exported on the value.action.context summary span.
+
+        Returns:
+            The breakdown, or None when latency analysis is disabled
+        """
+        if self._latency is None:
+            return None
+        tracker = self._latency[0]
+        return tracker.breakdown or tracker.compute()
+
+    def flush(self) -> None:
+        """Export any coalesced actions buffered in this context."""
+        with self._pending_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            parent, self._pending_context = self._pending_context, None
+            if self._scheduled_flush is not None:
+                _flush_scheduler.cancel(self._scheduled_flush)
+                self._scheduled_flush = None
+        self._emitter._send_batch(
+            anonymous_id=self._anonymous_id,
+            user_id=self._user_id,
+            context_attributes=self._attributes,
+            actions=pending,
+            parent=parent,
+        )
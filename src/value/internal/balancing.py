@@ -0,0 +1,264 @@
+"""Concurrent export over a pool of channels to several endpoints, with health-based balancing and failover."""
+
+import logging
+import threading
+import time
+from collections.abc import Sequence
+from typing import Optional
+
+import grpc
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from .otlp_encoder import OTLPSpanEncoder
+from .resilience import CircuitBreaker
+from .ship import open_channel, raw_export_call
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest request in an endpoint's latency average
+_LATENCY_ALPHA = 0.2
+
+
+class _Endpoint:
+    """One endpoint's channels, breaker and load; mutated under the exporter's lock."""
+
+    def __init__(self, address: str, channels: int, compression: bool, breaker: CircuitBreaker):
+        self.address = address
+        self.channels = [open_channel(address, compression=compression, dedicated=True) for _ in range(channels)]
+        self.calls = [raw_export_call(channel) for channel in self.channels]
+        self.breaker = breaker
+        self.in_flight = 0
+        self.latency = 0.0
+        self.next_call = 0
+        self.exported = 0
+        self.failed = 0
+
+    def score(self) -> float:
+        # Expected wait: requests ahead of this one times the recent latency
+        return (self.in_flight + 1) * (self.latency or 1e-3)
+
+
+class BalancedSpanExporter(SpanExporter):
+    """
+    OTLP/gRPC span exporter spreading batches over several endpoints.
+
+    Each endpoint has its own pool of channels (separate connections, used
+    round-robin) and its own circuit breaker. A batch is encoded once and sent to
+    the healthy endpoint with the lowest expected wait, (in-flight requests + 1)
+    times its average latency; if that request fails, it fails over to the next
+    best endpoint. Endpoints whose breaker is open are skipped until their
+    backoff expires and a probe request succeeds. export() is thread-safe, so
+    concurrent callers keep requests in flight on several channels at once.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[str],
+        channels_per_endpoint: int = 1,
+        timeout: float = 10.0,
+        compression: bool = False,
+        failure_threshold: int = 2,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+    ):
+        """
+        Initialize the exporter.
+
+        Args:
+            endpoints: OTLP/gRPC endpoints as host:port or URLs (https:// uses TLS)
+            channels_per_endpoint: Channels, each with its own connection, per endpoint
+            timeout: Seconds allowed for one export request
+            compression: Gzip-compress requests
+            failure_threshold: Consecutive failures that take an endpoint out of rotation
+            backoff_base: Seconds before a failed endpoint is probed again (doubling per trip)
+            backoff_max: Upper bound for the probe backoff
+        """
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self._endpoints = [
+            _Endpoint(
+                address,
+                max(channels_per_endpoint, 1),
+                compression,
+                CircuitBreaker(failure_threshold=failure_threshold, backoff_base=backoff_base, backoff_max=backoff_max),
+            )
+            for address in endpoints
+        ]
+        self._timeout = timeout
+        self._encoder = OTLPSpanEncoder()
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def endpoint_stats(self) -> list[dict]:
+        """Return each endpoint's health and load, for diagnostics."""
+        with self._lock:
+            return [
+                {
+                    "endpoint": endpoint.address,
+                    "state": endpoint.breaker.state,
+                    "in_flight": endpoint.in_flight,
+                    "latency": endpoint.latency,
+                    "exported": endpoint.exported,
+                    "failed": endpoint.failed,
+                }
+                for endpoint in self._endpoints
+            ]
+
+    def _acquire(self, tried: list[_Endpoint]) -> Optional[tuple[_Endpoint, object]]:
+        """Pick the healthy, least-loaded endpoint not tried yet and reserve one of its channels."""
+        with self._lock:
+            candidates = sorted(
+                (endpoint for endpoint in self._endpoints if endpoint not in tried), key=_Endpoint.score
+            )
+            for endpoint in candidates:
+                # Asked last, so a half-open breaker only lets its probe through for the chosen endpoint
+                if endpoint.breaker.allow_request():
+                    call = endpoint.calls[endpoint.next_call % len(endpoint.calls)]
+                    endpoint.next_call += 1
+                    endpoint.in_flight += 1
+                    return endpoint, call
+        return None
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Send the batch to the best healthy endpoint, failing over to the others."""
+        if self._shutdown:
+            return SpanExportResult.FAILURE
+        payload = self._encoder.encode(spans)
+        tried: list[_Endpoint] = []
+        while True:
+            acquired = self._acquire(tried)
+            if acquired is None:
+                return SpanExportResult.FAILURE
+            endpoint, call = acquired
+            tried.append(endpoint)
+            started = time.monotonic()
+            try:
+                call(payload, timeout=self._timeout)
+            except grpc.RpcError as error:
+                logger.warning("Export to %s failed: %s", endpoint.address, error.code())
+                with self._lock:
+                    endpoint.in_flight -= 1
+                    endpoint.failed += 1
+                endpoint.breaker.record_failure()
+                continue
+            elapsed = time.monotonic() - started
+            with self._lock:
+                endpoint.in_flight -= 1
+                endpoint.exported += 1
+                endpoint.latency = (
+                    elapsed
+                    if not endpoint.latency
+                    else endpoint.latency + _LATENCY_ALPHA * (elapsed - endpoint.latency)
+                )
+            endpoint.breaker.record_success()
+            return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        """Close every channel."""
+        self._shutdown = True
+        for endpoint in self._endpoints:
+            for channel in endpoint.channels:
+                channel.close()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Nothing is buffered."""
+        return True
+
+
+class ConcurrentSpanExporter(SpanExporter):
+    """
+    Span exporter wrapper keeping up to max_in_flight batches exporting at once.
+
+    export() hands the batch to one of max_in_flight worker threads and returns
+    as soon as one is free, so the single worker of a batch span processor is no
+    longer bound to one request at a time; when every worker is busy it blocks,
+    which applies backpressure to the processor's queue. Results are handled by
+    the wrapped exporter chain (counting, delivery receipts, spooling), which
+    therefore must be thread-safe.
+    """
+
+    def __init__(self, exporter: SpanExporter, max_in_flight: int = 4, shutdown_timeout: float = 30.0):
+        """
+        Initialize the wrapper and start its workers.
+
+        Args:
+            exporter: Thread-safe exporter chain running on the workers
+            max_in_flight: Batches exported concurrently
+            shutdown_timeout: Seconds shutdown() waits for queued and in-flight batches
+        """
+        self._exporter = exporter
+        self._max_in_flight = max_in_flight
+        self._shutdown_timeout = shutdown_timeout
+        self._condition = threading.Condition()
+        self._pending: list[Sequence[ReadableSpan]] = []
+        self._busy = 0
+        self._shutdown = False
+        self._workers = [
+            threading.Thread(target=self._work, name=f"value-export-{index}", daemon=True)
+            for index in range(max_in_flight)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Queue the batch for the next free worker, waiting while all of them are busy."""
+        with self._condition:
+            while not self._shutdown and self._busy + len(self._pending) >= self._max_in_flight:
+                self._condition.wait()
+            if self._shutdown:
+                return SpanExportResult.FAILURE
+            self._pending.append(spans)
+            self._condition.notify_all()
+        return SpanExportResult.SUCCESS
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._shutdown:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                spans = self._pending.pop(0)
+                self._busy += 1
+            try:
+                self._exporter.export(spans)
+            except Exception:
+                logger.exception("Exception while exporting spans")
+            finally:
+                with self._condition:
+                    self._busy -= 1
+                    self._condition.notify_all()
+
+    def _wait_idle(self, deadline: float) -> bool:
+        with self._condition:
+            while self._pending or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Wait for the batches in flight, then flush the wrapped exporter."""
+        deadline = time.monotonic() + timeout_millis / 1000
+        if not self._wait_idle(deadline):
+            return False
+        return self._exporter.force_flush(max(int((deadline - time.monotonic()) * 1000), 0))
+
+    def shutdown(self) -> None:
+        """Finish the queued batches within shutdown_timeout, stop the workers and shut down the wrapped exporter."""
+        with self._condition:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            self._condition.notify_all()
+        deadline = time.monotonic() + self._shutdown_timeout
+        for worker in self._workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+        with self._condition:
+            # Past the deadline, batches not yet picked up are abandoned; stuck requests are left to their timeout
+            abandoned, self._pending = self._pending, []
+        if abandoned:
+            logger.warning("Abandoned %d batches not exported before shutdown", len(abandoned))
+        self._exporter.shutdown()
@@ -0,0 +1,230 @@
+"""Batch span processor with per-thread buffers handed off to the export worker in bulk."""
+
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from collections.abc import Sequence
+from typing import Callable, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter
+
+logger = logging.getLogger(__name__)
+
+
+class _ThreadBuffer:
+    """Spans ended by one thread; the lock is only contended when the worker drains it."""
+
+    __slots__ = ("lock", "spans", "thread")
+
+    def __init__(self, thread: threading.Thread):
+        self.lock = threading.Lock()
+        self.spans: list[ReadableSpan] = []
+        self.thread = weakref.ref(thread)
+
+    def take(self) -> list[ReadableSpan]:
+        with self.lock:
+            spans, self.spans = self.spans, []
+        return spans
+
+
+class ThreadBufferedSpanProcessor(SpanProcessor):
+    """
+    Batch span processor that buffers ended spans per thread.
+
+    Each emitting thread appends to its own buffer under its own, normally
+    uncontended, lock. Full buffers are handed to the shared queue as one list, so
+    the shared lock is taken once per buffer_size spans instead of once per span.
+    The export worker also drains partially filled buffers every schedule_delay,
+    so spans of idle threads are not held back. Memory is bounded by buffer_size
+    per thread plus max_queue_size in the shared queue.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        buffer_size: int = 64,
+        max_queue_size: int = 2048,
+        max_export_batch_size: int = 512,
+        schedule_delay: float = 1.0,
+        on_drop: Optional[Callable[[Sequence[ReadableSpan]], None]] = None,
+    ):
+        """
+        Initialize the processor and start its export worker.
+
+        Args:
+            exporter: Exporter receiving the batches
+            buffer_size: Spans a thread buffers before handing them off
+            max_queue_size: Spans the shared queue holds before new hand-offs are dropped
+            max_export_batch_size: Maximum spans per export call
+            schedule_delay: Seconds between drains of partially filled buffers
+            on_drop: Called with spans dropped because the queue was full
+        """
+        self._exporter = exporter
+        self._buffer_size = buffer_size
+        self._max_queue_size = max_queue_size
+        self._max_export_batch_size = max_export_batch_size
+        self._schedule_delay = schedule_delay
+        self._on_drop = on_drop
+        self._local = threading.local()
+        self._buffers: list[_ThreadBuffer] = []
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._ready: deque[list[ReadableSpan]] = deque()
+        self._queued = 0
+        self._flush_requested = 0
+        self._flush_completed = 0
+        self._shutdown = False
+        self._worker = threading.Thread(target=self._work, name="value-buffered-export", daemon=True)
+        self._worker.start()
+
+    @property
+    def max_queue_size(self) -> int:
+        """Spans the shared queue holds before new hand-offs are dropped."""
+        return self._max_queue_size
+
+    def on_start(self, span: ReadableSpan, parent_context: Optional[Context] = None) -> None:
+        """Called when a span is started."""
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Buffer an ended span in the calling thread's buffer."""
+        if self._shutdown or not span.context.trace_flags.sampled:
+            return
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._register_thread()
+        with buffer.lock:
+            buffer.spans.append(span)
+            if len(buffer.spans) < self._buffer_size:
+                return
+            spans, buffer.spans = buffer.spans, []
+        self._hand_off(spans)
+
+    def _register_thread(self) -> _ThreadBuffer:
+        buffer = self._local.buffer = _ThreadBuffer(threading.current_thread())
+        with self._lock:
+            self._buffers.append(buffer)
+        return buffer
+
+    def _hand_off(self, spans: list[ReadableSpan]) -> None:
+        dropped: list[ReadableSpan] = []
+        with self._lock:
+            room = self._max_queue_size - self._queued
+            if room < len(spans):
+                dropped = spans[max(room, 0) :]
+                spans = spans[: max(room, 0)]
+            if spans:
+                self._ready.append(spans)
+                self._queued += len(spans)
+                if self._queued >= self._max_export_batch_size:
+                    self._condition.notify()
+        if dropped:
+            logger.debug("Export queue full, dropping %d spans", len(dropped))
+            if self._on_drop is not None:
+                self._on_drop(dropped)
+
+    def _drain_buffers(self) -> None:
+        """Hand off every thread's partially filled buffer and forget exited threads."""
+        with self._lock:
+            buffers = list(self._buffers)
+        exited = []
+        for buffer in buffers:
+            spans = buffer.take()
+            if spans:
+                self._hand_off(spans)
+            thread = buffer.thread()
+            if thread is None or not thread.is_alive():
+                # Take again: the thread may have appended between the first take and exiting
+                spans = buffer.take()
+                if spans:
+                    self._hand_off(spans)
+                exited.append(buffer)
+        if exited:
+            with self._lock:
+                self._buffers = [buffer for buffer in self._buffers if buffer not in exited]
+
+    def _next_batch(self) -> list[ReadableSpan]:
+        """Pop up to max_export_batch_size spans from the queue; caller holds the lock."""
+        batch: list[ReadableSpan] = []
+        while self._ready and len(batch) < self._max_export_batch_size:
+            spans = self._ready.popleft()
+            room = self._max_export_batch_size - len(batch)
+            if len(spans) > room:
+                self._ready.appendleft(spans[room:])
+                spans = spans[:room]
+            batch.extend(spans)
+        self._queued -= len(batch)
+        return batch
+
+    def _work(self) -> None:
+        last_drain = time.monotonic()
+        while True:
+            with self._lock:
+                deadline = last_drain + self._schedule_delay
+                while (
+                    not self._shutdown
+                    and self._flush_requested == self._flush_completed
+                    and self._queued < self._max_export_batch_size
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                flush_target = self._flush_requested
+                stop = self._shutdown
+                # Woken early because hand-offs filled a batch: leave the thread buffers alone
+                drain = stop or flush_target != self._flush_completed or time.monotonic() >= deadline
+            self._export_queued()
+            if drain:
+                # Drain after exporting so the thread buffers find room in the queue
+                last_drain = time.monotonic()
+                self._drain_buffers()
+                self._export_queued()
+            with self._lock:
+                if flush_target != self._flush_completed:
+                    self._flush_completed = flush_target
+                    self._condition.notify_all()
+            if stop:
+                return
+
+    def _export_queued(self) -> None:
+        while True:
+            with self._lock:
+                batch = self._next_batch()
+            if batch:
+                try:
+                    self._exporter.export(batch)
+                except Exception:
+                    logger.exception("Exception while exporting spans")
+            if len(batch) < self._max_export_batch_size:
+                return
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Export everything buffered by any thread, waiting at most timeout_millis."""
+        deadline = time.monotonic() + timeout_millis / 1000
+        with self._lock:
+            if self._shutdown:
+                return True
+            self._flush_requested += 1
+            target = self._flush_requested
+            self._condition.notify_all()
+            while self._flush_completed < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def shutdown(self) -> None:
+        """Export everything buffered, stop the worker and shut down the exporter."""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            self._condition.notify_all()
+        self._worker.join()
+        self._exporter.shutdown()
@@ -10,18 +10,155 @@ class SDKConfig:
     """Configuration for the Value SDK."""
 
     otel_endpoint: str = "https://value.valmi.io"
+    otel_endpoints: tuple[str, ...] = ()
     backend_url: Optional[str] = "https://value.valmi.io"
     service_name: str = "value-control-agent"
     enable_console_export: bool = False
+    event_actions: tuple[str, ...] = ()
+    shutdown_timeout: float = 5.0
+    handle_sigterm: bool = False
+    export_timeout: float = 2.0
+    export_spool_size: int = 2048
+    export_concurrency: int = 1
+    export_channels: int = 1
+    export_compression: bool = False
+    breaker_failure_threshold: int = 3
+    breaker_backoff_base: float = 1.0
+    breaker_backoff_max: float = 60.0
+    priority_lanes: bool = False
+    lane_queue_size: int = 2048
+    action_lane_queue_size: int = 2048
+    lane_max_total_spans: int = 4096
+    thread_buffers: bool = False
+    thread_buffer_size: int = 64
+    latency_analysis: bool = False
+    latency_max_spans: int = 1000
+    profile_actions: bool = False
+    profile_memory: bool = False
+    stack_profiling: bool = False
+    stack_profile_threshold: float = 1.0
+    stack_profile_interval: float = 0.05
+    stack_profile_max_cpu: float = 1.0
+    filter_drop_spans: tuple[str, ...] = ()
+    filter_drop_scopes: tuple[str, ...] = ()
+    filter_drop_attributes: tuple[str, ...] = ()
+    filter_truncate_attributes: tuple[str, ...] = ("*",)
+    filter_max_attribute_length: int = 0
+    filter_collapse_spans: tuple[str, ...] = ()
+    redaction: bool = False
+    redaction_rules: tuple[str, ...] = ("email", "secret", "card", "phone")
+    redaction_skip_attributes: tuple[str, ...] = ()
+    payload_offload: bool = False
+    payload_max_inline_bytes: int = 8192
+    payload_preview_chars: int = 256
+    payload_dedupe_attributes: tuple[str, ...] = ()
+    payload_blob_dir: Optional[str] = "value-blobs"
+    direct_encoding: bool = False
+    shared_pipeline: bool = False
+    exporter: str = "otlp"
+    file_export_dir: str = "value-spans"
+    file_export_format: str = "otlp"
+    file_export_max_bytes: int = 64 * 1024 * 1024
+    file_export_max_age: float = 300.0
+    shipper_ring: str = ""
+    shipper_ring_bytes: int = 16 * 1024 * 1024
+    remote_config: bool = False
+    remote_config_interval: float = 30.0
+    remote_config_long_poll: float = 0.0
+    overload_control: bool = False
+    overload_interval: float = 1.0
+    overload_max_level: int = 4
+    overload_recover_ticks: int = 5
+    overload_cpu_threshold: float = 0.9
+    overload_instrumentation_ratio: float = 0.1
+    overload_keep_actions: tuple[str, ...] = ()
+    quota_rate: float = 0.0
+    quota_burst: int = 0
+    quota_key: str = "user_id"
+    quota_overflow: str = "rollup"
+    quota_sample_ratio: float = 0.01
+    quota_max_keys: int = 10000
+    quota_report_interval: float = 10.0
+
+
+def _split_env(name: str) -> tuple[str, ...]:
+    """Read a comma-separated environment variable into a tuple of non-empty values."""
+    return tuple(item.strip() for item in os.getenv(name, "").split(",") if item.strip())
 
 
 def load_config_from_env() -> SDKConfig:
     """Load SDK configuration from environment variables."""
     return SDKConfig(
         otel_endpoint=os.getenv("VALUE_OTEL_ENDPOINT", "https://value.valmi.io"),
+        otel_endpoints=_split_env("VALUE_OTEL_ENDPOINTS"),
         backend_url=os.getenv("VALUE_BACKEND_URL", "https://value.valmi.io"),
         service_name=os.getenv("VALUE_SERVICE_NAME", "value-control-agent"),
         enable_console_export=os.getenv("VALUE_CONSOLE_EXPORT", "false").lower() == "true",
+        event_actions=_split_env("VALUE_EVENT_ACTIONS"),
+        shutdown_timeout=float(os.getenv("VALUE_SHUTDOWN_TIMEOUT", "5.0")),
+        handle_sigterm=os.getenv("VALUE_HANDLE_SIGTERM", "false").lower() == "true",
+        export_timeout=float(os.getenv("VALUE_EXPORT_TIMEOUT", "2.0")),
+        export_spool_size=int(os.getenv("VALUE_EXPORT_SPOOL_SIZE", "2048")),
+        export_concurrency=int(os.getenv("VALUE_EXPORT_CONCURRENCY", "1")),
+        export_channels=int(os.getenv("VALUE_EXPORT_CHANNELS", "1")),
+        export_compression=os.getenv("VALUE_EXPORT_COMPRESSION", "false").lower() == "true",
+        breaker_failure_threshold=int(os.getenv("VALUE_BREAKER_FAILURE_THRESHOLD", "3")),
+        breaker_backoff_base=float(os.getenv("VALUE_BREAKER_BACKOFF_BASE", "1.0")),
+        breaker_backoff_max=float(os.getenv("VALUE_BREAKER_BACKOFF_MAX", "60.0")),
+        priority_lanes=os.getenv("VALUE_PRIORITY_LANES", "false").lower() == "true",
+        lane_queue_size=int(os.getenv("VALUE_LANE_QUEUE_SIZE", "2048")),
+        action_lane_queue_size=int(os.getenv("VALUE_ACTION_LANE_QUEUE_SIZE", "2048")),
+        lane_max_total_spans=int(os.getenv("VALUE_LANE_MAX_TOTAL_SPANS", "4096")),
+        thread_buffers=os.getenv("VALUE_THREAD_BUFFERS", "false").lower() == "true",
+        thread_buffer_size=int(os.getenv("VALUE_THREAD_BUFFER_SIZE", "64")),
+        latency_analysis=os.getenv("VALUE_LATENCY_ANALYSIS", "false").lower() == "true",
+        latency_max_spans=int(os.getenv("VALUE_LATENCY_MAX_SPANS", "1000")),
+        profile_actions=os.getenv("VALUE_PROFILE_ACTIONS", "false").lower() == "true",
+        profile_memory=os.getenv("VALUE_PROFILE_MEMORY", "false").lower() == "true",
+        stack_profiling=os.getenv("VALUE_STACK_PROFILING", "false").lower() == "true",
+        stack_profile_threshold=float(os.getenv("VALUE_STACK_PROFILE_THRESHOLD", "1.0")),
+        stack_profile_interval=float(os.getenv("VALUE_STACK_PROFILE_INTERVAL", "0.05")),
+        stack_profile_max_cpu=float(os.getenv("VALUE_STACK_PROFILE_MAX_CPU", "1.0")),
+        filter_drop_spans=_split_env("VALUE_FILTER_DROP_SPANS"),
+        filter_drop_scopes=_split_env("VALUE_FILTER_DROP_SCOPES"),
+        filter_drop_attributes=_split_env("VALUE_FILTER_DROP_ATTRIBUTES"),
+        filter_truncate_attributes=_split_env("VALUE_FILTER_TRUNCATE_ATTRIBUTES") or ("*",),
+        filter_max_attribute_length=int(os.getenv("VALUE_FILTER_MAX_ATTRIBUTE_LENGTH", "0")),
+        filter_collapse_spans=_split_env("VALUE_FILTER_COLLAPSE_SPANS"),
+        redaction=os.getenv("VALUE_REDACTION", "false").lower() == "true",
+        redaction_rules=_split_env("VALUE_REDACTION_RULES") or ("email", "secret", "card", "phone"),
+        redaction_skip_attributes=_split_env("VALUE_REDACTION_SKIP_ATTRIBUTES"),
+        payload_offload=os.getenv("VALUE_PAYLOAD_OFFLOAD", "false").lower() == "true",
+        payload_max_inline_bytes=int(os.getenv("VALUE_PAYLOAD_MAX_INLINE_BYTES", "8192")),
+        payload_preview_chars=int(os.getenv("VALUE_PAYLOAD_PREVIEW_CHARS", "256")),
+        payload_dedupe_attributes=_split_env("VALUE_PAYLOAD_DEDUPE_ATTRIBUTES"),
+        payload_blob_dir=os.getenv("VALUE_PAYLOAD_BLOB_DIR", "value-blobs") or None,
+        direct_encoding=os.getenv("VALUE_DIRECT_ENCODING", "false").lower() == "true",
+        shared_pipeline=os.getenv("VALUE_SHARED_PIPELINE", "false").lower() == "true",
+        exporter=os.getenv("VALUE_EXPORTER", "otlp").lower(),
+        file_export_dir=os.getenv("VALUE_FILE_EXPORT_DIR", "value-spans"),
+        file_export_format=os.getenv("VALUE_FILE_EXPORT_FORMAT", "otlp").lower(),
+        file_export_max_bytes=int(os.getenv("VALUE_FILE_EXPORT_MAX_BYTES", str(64 * 1024 * 1024))),
+        file_export_max_age=float(os.getenv("VALUE_FILE_EXPORT_MAX_AGE", "300.0")),
+        shipper_ring=os.getenv("VALUE_SHIPPER_RING", ""),
+        shipper_ring_bytes=int(os.getenv("VALUE_SHIPPER_RING_BYTES", str(16 * 1024 * 1024))),
+        remote_config=os.getenv("VALUE_REMOTE_CONFIG", "false").lower() == "true",
+        remote_config_interval=float(os.getenv("VALUE_REMOTE_CONFIG_INTERVAL", "30.0")),
+        remote_config_long_poll=float(os.getenv("VALUE_REMOTE_CONFIG_LONG_POLL", "0.0")),
+        overload_control=os.getenv("VALUE_OVERLOAD_CONTROL", "false").lower() == "true",
+        overload_interval=float(os.getenv("VALUE_OVERLOAD_INTERVAL", "1.0")),
+        overload_max_level=int(os.getenv("VALUE_OVERLOAD_MAX_LEVEL", "4")),
+        overload_recover_ticks=int(os.getenv("VALUE_OVERLOAD_RECOVER_TICKS", "5")),
+        overload_cpu_threshold=float(os.getenv("VALUE_OVERLOAD_CPU_THRESHOLD", "0.9")),
+        overload_instrumentation_ratio=float(os.getenv("VALUE_OVERLOAD_INSTRUMENTATION_RATIO", "0.1")),
+        overload_keep_actions=_split_env("VALUE_OVERLOAD_KEEP_ACTIONS"),
+        quota_rate=float(os.getenv("VALUE_QUOTA_RATE", "0")),
+        quota_burst=int(os.getenv("VALUE_QUOTA_BURST", "0")),
+        quota_key=os.getenv("VALUE_QUOTA_KEY", "user_id"),
+        quota_overflow=os.getenv("VALUE_QUOTA_OVERFLOW", "rollup").lower(),
+        quota_sample_ratio=float(os.getenv("VALUE_QUOTA_SAMPLE_RATIO", "0.01")),
+        quota_max_keys=int(os.getenv("VALUE_QUOTA_MAX_KEYS", "10000")),
+        quota_report_interval=float(os.getenv("VALUE_QUOTA_REPORT_INTERVAL", "10.0")),
     )
 
 
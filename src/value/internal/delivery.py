@@ -0,0 +1,139 @@
+"""Delivery receipts for actions, resolved when the exporter acknowledges their batch."""
+
+import threading
+from collections.abc import Sequence
+from concurrent.futures import Future
+from typing import Optional
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+
+class DeliveryError(Exception):
+    """Raised through a delivery receipt when its action could not be exported."""
+
+
+class DeliveryTracker:
+    """
+    Registry of outstanding delivery receipts keyed by span ID.
+
+    Futures are only allocated for sends that ask for a receipt, so the export
+    path pays a single truthiness check when no receipts are outstanding.
+    """
+
+    def __init__(self):
+        """Initialize an empty tracker."""
+        self._pending: dict[int, list[Future]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, span_id: int, future: Optional[Future] = None) -> Future:
+        """
+        Register a receipt that resolves when the span with span_id is exported.
+
+        Args:
+            span_id: ID of the span carrying the action
+            future: Existing future to register (a new one is created if omitted)
+
+        Returns:
+            The registered future
+        """
+        if future is None:
+            future = Future()
+        with self._lock:
+            self._pending.setdefault(span_id, []).append(future)
+        return future
+
+    def resolve(self, spans: Sequence[ReadableSpan], result: SpanExportResult) -> None:
+        """
+        Resolve receipts for an exported batch.
+
+        Args:
+            spans: The spans of the batch handed to the exporter
+            result: The exporter's result for the batch
+        """
+        with self._lock:
+            futures = [
+                future
+                for span in spans
+                if span.context is not None
+                for future in self._pending.pop(span.context.span_id, ())
+            ]
+        for future in futures:
+            if result is SpanExportResult.SUCCESS:
+                future.set_result(True)
+            else:
+                future.set_exception(DeliveryError("Exporter failed to deliver the batch containing this action"))
+
+    def fail(self, spans: Sequence[ReadableSpan], reason: str) -> None:
+        """
+        Fail receipts for spans that were dropped before reaching the exporter.
+
+        Args:
+            spans: The dropped spans
+            reason: Human readable reason for the failure
+        """
+        with self._lock:
+            futures = [
+                future
+                for span in spans
+                if span.context is not None
+                for future in self._pending.pop(span.context.span_id, ())
+            ]
+        for future in futures:
+            future.set_exception(DeliveryError(reason))
+
+    def fail_all(self, reason: str) -> None:
+        """
+        Fail every outstanding receipt.
+
+        Args:
+            reason: Human readable reason for the failure
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for futures in pending.values():
+            for future in futures:
+                future.set_exception(DeliveryError(reason))
+
+    def __len__(self) -> int:
+        """Return the number of spans with outstanding receipts."""
+        return len(self._pending)
+
+
+class TrackingSpanExporter(SpanExporter):
+    """Span exporter wrapper that resolves delivery receipts from export results."""
+
+    def __init__(self, exporter: SpanExporter, tracker: DeliveryTracker, fail_on_error: bool = True):
+        """
+        Initialize the tracking exporter.
+
+        Args:
+            exporter: The exporter that actually ships spans
+            tracker: Tracker holding the receipts to resolve
+            fail_on_error: Fail receipts when an export fails. Disable when a retry layer
+                sits on top and reports dropped spans to the tracker itself.
+        """
+        self._exporter = exporter
+        self._tracker = tracker
+        self._fail_on_error = fail_on_error
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Export spans and resolve any receipts waiting on them."""
+        try:
+            result = self._exporter.export(spans)
+        except Exception:
+            if self._fail_on_error and self._tracker._pending:
+                self._tracker.resolve(spans, SpanExportResult.FAILURE)
+            raise
+        if self._tracker._pending and (self._fail_on_error or result is SpanExportResult.SUCCESS):
+            self._tracker.resolve(spans, result)
+        return result
+
+    def shutdown(self) -> None:
+        """Shut down the wrapped exporter and fail receipts that can no longer be delivered."""
+        self._exporter.shutdown()
+        self._tracker.fail_all("Exporter shut down before the action was delivered")
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Force flush the wrapped exporter."""
+        return self._exporter.force_flush(timeout_millis)
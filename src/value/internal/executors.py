@@ -0,0 +1,134 @@
+"""Executor wrappers that carry the action context into thread and process pools."""
+
+import contextvars
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import NonRecordingSpan, SpanContext, TraceFlags
+
+from .actions import ActionContext, _current_action_context
+from .normalization import normalize
+from .span_processor import _user_context
+
+# (anonymous_id, user_id, context attributes) of the submitting action context
+ActionIds = tuple[str, Optional[str], dict[str, Any]]
+# (user context attributes, trace_id, span_id, trace_flags, action context ids); plain values so it pickles cheaply
+Carrier = tuple[Optional[dict[str, str]], int, int, int, Optional[ActionIds]]
+
+
+def capture_carrier() -> Carrier:
+    """Capture the user context, the action context's IDs and the current span as a picklable carrier."""
+    span_context = trace.get_current_span().get_span_context()
+    action_context = _current_action_context.get()
+    action_ids = None
+    if action_context is not None:
+        # Context attributes are normalized so arbitrary kwargs cannot break pickling
+        action_ids = (action_context._anonymous_id, action_context._user_id, normalize(action_context._attributes))
+    return (
+        _user_context.get(),
+        span_context.trace_id,
+        span_context.span_id,
+        int(span_context.trace_flags),
+        action_ids,
+    )
+
+
+class ContextCall:
+    """
+    Picklable callable that runs a function under a captured carrier.
+
+    Used for process pools, where ContextVars cannot be copied: the child process
+    restores the user context, parents its spans under the submitting span and
+    makes a detached action context current, so emitter sends in the child use
+    the submitting context's user_id/anonymous_id and attributes.
+    """
+
+    __slots__ = ("fn", "carrier")
+
+    def __init__(self, fn: Callable[..., Any], carrier: Carrier):
+        self.fn = fn
+        self.carrier = carrier
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        attributes, trace_id, span_id, trace_flags, action_ids = self.carrier
+        user_token = _user_context.set(attributes)
+        action_token = None
+        if action_ids is not None:
+            anonymous_id, user_id, context_attributes = action_ids
+            detached = ActionContext(None, anonymous_id=anonymous_id, user_id=user_id, **context_attributes)
+            action_token = _current_action_context.set(detached)
+        otel_token = None
+        if span_id:
+            parent = SpanContext(trace_id, span_id, is_remote=True, trace_flags=TraceFlags(trace_flags))
+            otel_token = otel_context.attach(trace.set_span_in_context(NonRecordingSpan(parent)))
+        try:
+            return self.fn(*args, **kwargs)
+        finally:
+            if otel_token is not None:
+                otel_context.detach(otel_token)
+            if action_token is not None:
+                _current_action_context.reset(action_token)
+            _user_context.reset(user_token)
+
+    def __reduce__(self) -> tuple:
+        return ContextCall, (self.fn, self.carrier)
+
+
+def bind_context(fn: Callable[..., Any], for_process: bool = False) -> Callable[..., Any]:
+    """
+    Bind fn to the current action context.
+
+    Threads get a copy of the whole context (one cheap copy per call); processes
+    get a picklable ContextCall carrying only the user context, the action
+    context's IDs and the trace parent.
+
+    Args:
+        fn: The function to bind
+        for_process: Bind for a process pool instead of a thread
+    """
+    if for_process:
+        return ContextCall(fn, capture_carrier())
+    context = contextvars.copy_context()
+
+    def _run(*args: Any, **kwargs: Any) -> Any:
+        return context.run(fn, *args, **kwargs)
+
+    return _run
+
+
+class ContextPreservingExecutor(Executor):
+    """
+    Executor wrapper that runs every submitted call under the submitter's action context.
+
+    Thread pools run calls inside a copy of the submitting context, so the action
+    context, user context and current span all carry over. Process pools receive
+    a picklable carrier restored in the child process.
+    """
+
+    def __init__(self, executor: Executor):
+        """
+        Wrap an executor.
+
+        Args:
+            executor: The thread or process pool executor to wrap
+        """
+        self._executor = executor
+        self._for_process = isinstance(executor, ProcessPoolExecutor)
+
+    @property
+    def executor(self) -> Executor:
+        """The wrapped executor."""
+        return self._executor
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        """Submit fn to the wrapped executor under the current action context."""
+        return self._executor.submit(bind_context(fn, for_process=self._for_process), *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, **kwargs: Any) -> None:
+        """Shut down the wrapped executor."""
+        self._executor.shutdown(wait=wait, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._executor, name)
@@ -0,0 +1,303 @@
+"""Local file span exporter with size- and age-based rotation and optional gzip compression."""
+
+import calendar
+import gzip
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from typing import IO, Any, Optional
+
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import Event, ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.trace import Link, SpanContext, SpanKind, Status, StatusCode, TraceFlags
+
+from .otlp_encoder import OTLPSpanEncoder
+from .processes import pid_running
+
+logger = logging.getLogger(__name__)
+
+FORMAT_OTLP = "otlp"
+FORMAT_NDJSON = "ndjson"
+
+# Length prefix of one OTLP record: big-endian unsigned 32-bit size of the serialized request
+_LENGTH = struct.Struct(">I")
+_PART_SUFFIX = ".part"
+# Writer pid in a span file name: {prefix}-{timestamp}-{pid}-{sequence}{extension}
+_NAME_PID = re.compile(r"-\d{8}T\d{6}-(\d+)-\d{6}\.")
+# Spans of an ndjson file encoded into one OTLP record when it is shipped
+NDJSON_SPANS_PER_RECORD = 512
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Span exporter writing batches to rotated local files.
+
+    In the otlp format each export call appends one length-prefixed, serialized
+    ExportTraceServiceRequest; in the ndjson format each span is one JSON line.
+    Files are written with a .part suffix and renamed once rotated, so readers
+    (such as `python -m value ship`) only ever see complete files. A file is
+    rotated once it holds max_bytes, once it is max_age seconds old (even if no
+    further spans arrive) and on shutdown; .part files left behind by a process
+    that crashed are published when the next exporter opens the directory.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fmt: str = FORMAT_OTLP,
+        max_bytes: int = 64 * 1024 * 1024,
+        compress: bool = True,
+        prefix: str = "spans",
+        max_age: float = 300.0,
+    ):
+        """
+        Initialize the file exporter.
+
+        Args:
+            directory: Directory receiving the span files (created if missing)
+            fmt: File format, "otlp" (length-prefixed protobuf) or "ndjson"
+            max_bytes: Uncompressed size after which the current file is rotated
+            compress: Gzip-compress the files
+            prefix: File name prefix
+            max_age: Seconds after which the current file is rotated (0 disables age-based rotation)
+        """
+        if fmt not in (FORMAT_OTLP, FORMAT_NDJSON):
+            raise ValueError(f"Unsupported file export format: {fmt}")
+        self._directory = directory
+        self._format = fmt
+        self._max_bytes = max_bytes
+        self._compress = compress
+        self._prefix = prefix
+        self._max_age = max_age
+        self._encoder = OTLPSpanEncoder()
+        self._lock = threading.Lock()
+        self._file: Optional[IO[bytes]] = None
+        self._path: Optional[str] = None
+        self._timer: Optional[threading.Timer] = None
+        self._written = 0
+        self._sequence = 0
+        self._shutdown = False
+        os.makedirs(directory, exist_ok=True)
+        recover_part_files(directory, min_age=2 * max_age if max_age > 0 else 3600.0)
+
+    @property
+    def extension(self) -> str:
+        return f".{self._format}.gz" if self._compress else f".{self._format}"
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Append spans to the current file, rotating it once it is full."""
+        if self._shutdown:
+            return SpanExportResult.FAILURE
+        if self._format == FORMAT_OTLP:
+            payload = self._encoder.encode(spans)
+            data = _LENGTH.pack(len(payload)) + payload
+        else:
+            data = b"".join(span.to_json(indent=None).encode() + b"\n" for span in spans)
+
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._open()
+                self._file.write(data)
+                self._written += len(data)
+                if self._written >= self._max_bytes:
+                    self._rotate()
+            except OSError:
+                return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def _open(self) -> None:
+        self._sequence += 1
+        timestamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        name = f"{self._prefix}-{timestamp}-{os.getpid()}-{self._sequence:06d}{self.extension}"
+        self._path = os.path.join(self._directory, name)
+        part = self._path + _PART_SUFFIX
+        self._file = gzip.open(part, "wb", compresslevel=6) if self._compress else open(part, "wb")
+        self._written = 0
+        if self._max_age > 0:
+            self._timer = threading.Timer(self._max_age, self._expire, args=(self._path,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _expire(self, path: str) -> None:
+        with self._lock:
+            if self._path == path:
+                try:
+                    self._rotate()
+                except OSError:
+                    logger.warning("Failed to rotate span file %s", path, exc_info=True)
+
+    def _rotate(self) -> None:
+        if self._file is None:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._file.close()
+        os.replace(self._path + _PART_SUFFIX, self._path)
+        self._file = None
+        self._path = None
+
+    def rotate(self) -> None:
+        """Close and publish the current file, if any."""
+        with self._lock:
+            self._rotate()
+
+    def shutdown(self) -> None:
+        """Publish the current file and reject further exports."""
+        with self._lock:
+            self._shutdown = True
+            self._rotate()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Flush buffered bytes of the current file to disk."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+        return True
+
+
+def recover_part_files(directory: str, min_age: float) -> list[str]:
+    """
+    Publish .part files whose writer is no longer running, e.g. after a crash.
+
+    Only files untouched for min_age seconds are considered, so files being
+    written by a process in another PID namespace sharing the directory are left alone.
+
+    Returns:
+        The paths of the published files
+    """
+    recovered = []
+    now = time.time()
+    for name in os.listdir(directory):
+        match = _NAME_PID.search(name)
+        if not name.endswith(_PART_SUFFIX) or match is None or pid_running(int(match.group(1))):
+            continue
+        part = os.path.join(directory, name)
+        try:
+            if now - os.path.getmtime(part) < min_age:
+                continue
+            os.replace(part, part[: -len(_PART_SUFFIX)])
+        except OSError:
+            continue
+        recovered.append(part[: -len(_PART_SUFFIX)])
+    return recovered
+
+
+def list_span_files(directory: str, fmt: str = FORMAT_OTLP) -> list[str]:
+    """Return the complete (rotated) span files of a format in a directory, oldest first."""
+    suffixes = (f".{fmt}", f".{fmt}.gz")
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(suffixes))
+
+
+def iter_otlp_records(path: str) -> Iterator[bytes]:
+    """Yield the serialized ExportTraceServiceRequest records of an otlp span file."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as stream:
+        while True:
+            # A file recovered after a crash may end in a truncated record or gzip stream
+            try:
+                header = stream.read(_LENGTH.size)
+                if len(header) < _LENGTH.size:
+                    return
+                (size,) = _LENGTH.unpack(header)
+                record = stream.read(size)
+            except EOFError:
+                return
+            if len(record) < size:
+                return
+            yield record
+
+
+def iter_ndjson_spans(path: str) -> Iterator[dict]:
+    """Yield the spans of an ndjson span file as dicts."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as stream:
+        try:
+            for line in stream:
+                if not line.endswith(b"\n"):
+                    return
+                if line.strip():
+                    yield json.loads(line)
+        except EOFError:
+            return
+
+
+def iter_ndjson_records(path: str, spans_per_record: int = NDJSON_SPANS_PER_RECORD) -> Iterator[bytes]:
+    """
+    Yield the spans of an ndjson span file as serialized ExportTraceServiceRequest records.
+
+    The ndjson lines are ReadableSpan.to_json output, so the replayed spans carry
+    microsecond timestamps, no instrumentation scope and no trace state; use the
+    otlp format for files meant to be shipped without loss.
+    """
+    encoder = OTLPSpanEncoder()
+    batch: list[ReadableSpan] = []
+    for data in iter_ndjson_spans(path):
+        batch.append(span_from_json(data))
+        if len(batch) >= spans_per_record:
+            yield encoder.encode(batch)
+            batch = []
+    if batch:
+        yield encoder.encode(batch)
+
+
+def iter_records(path: str) -> Iterator[bytes]:
+    """Yield the serialized ExportTraceServiceRequest records of an otlp or ndjson span file."""
+    if path.endswith((f".{FORMAT_NDJSON}", f".{FORMAT_NDJSON}.gz")):
+        return iter_ndjson_records(path)
+    return iter_otlp_records(path)
+
+
+def span_from_json(data: dict[str, Any]) -> ReadableSpan:
+    """Rebuild an ended span from one line of an ndjson span file."""
+    context = data["context"]
+    resource = data.get("resource") or {}
+    parent_id = data.get("parent_id")
+    status = data.get("status") or {}
+    return ReadableSpan(
+        name=data["name"],
+        context=_context(context),
+        parent=_context({"trace_id": context["trace_id"], "span_id": parent_id}) if parent_id else None,
+        resource=Resource(_attributes(resource.get("attributes")), resource.get("schema_url") or None),
+        attributes=_attributes(data.get("attributes")),
+        events=[
+            Event(event["name"], _attributes(event.get("attributes")), _iso_to_ns(event.get("timestamp")))
+            for event in data.get("events") or ()
+        ],
+        links=[
+            Link(_context(link["context"]), _attributes(link.get("attributes"))) for link in data.get("links") or ()
+        ],
+        kind=SpanKind[data.get("kind", "SpanKind.INTERNAL").rpartition(".")[2]],
+        status=Status(StatusCode[status.get("status_code", "UNSET")], status.get("description")),
+        start_time=_iso_to_ns(data.get("start_time")),
+        end_time=_iso_to_ns(data.get("end_time")),
+    )
+
+
+def _context(context: dict[str, str]) -> SpanContext:
+    return SpanContext(
+        trace_id=int(context["trace_id"], 16),
+        span_id=int(context["span_id"], 16),
+        is_remote=False,
+        trace_flags=TraceFlags(TraceFlags.SAMPLED),
+    )
+
+
+def _attributes(attributes: Optional[dict[str, Any]]) -> dict[str, Any]:
+    # JSON turns attribute sequences into lists; OTLP encodes tuples and lists alike
+    return {key: tuple(value) if isinstance(value, list) else value for key, value in (attributes or {}).items()}
+
+
+def _iso_to_ns(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    parsed = time.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")
+    fraction = value[20:].rstrip("Z") if len(value) > 20 and value[19] == "." else ""
+    return calendar.timegm(parsed) * 1_000_000_000 + int(fraction.ljust(9, "0")[:9] or 0)
@@ -0,0 +1,262 @@
+"""Rule-based span filtering and attribute trimming ahead of export."""
+
+import fnmatch
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import Event, ReadableSpan, SpanProcessor
+from opentelemetry.trace import SpanContext
+
+KEEP = 0
+DROP = 1
+COLLAPSE = 2
+TRUNCATE = 3
+
+# Decisions are cached per span name/scope and per attribute key; caches reset past this size
+_MAX_CACHE = 8192
+# Parents awaiting collapsed-children totals, and collapsed spans whose children are re-parented;
+# oldest entries are evicted past this size
+_MAX_COLLAPSED_PARENTS = 10000
+
+
+@dataclass(frozen=True)
+class FilterRules:
+    """
+    Span filtering rules. Patterns are shell-style globs (fnmatch).
+
+    Attributes:
+        drop_spans: Span names that are not exported
+        drop_scopes: Instrumentation scope names whose spans are not exported
+        drop_attributes: Attribute keys removed from exported spans
+        truncate_attributes: Attribute keys whose string values are cut to max_attribute_length
+        max_attribute_length: Maximum string length for truncate_attributes (0 disables truncation)
+        collapse_spans: Span names folded into their parent as a count and total duration
+    """
+
+    drop_spans: tuple[str, ...] = ()
+    drop_scopes: tuple[str, ...] = ()
+    drop_attributes: tuple[str, ...] = ()
+    truncate_attributes: tuple[str, ...] = ("*",)
+    max_attribute_length: int = 0
+    collapse_spans: tuple[str, ...] = ()
+
+    def is_empty(self) -> bool:
+        """Return True if the rules never change a span."""
+        return not (
+            self.drop_spans
+            or self.drop_scopes
+            or self.drop_attributes
+            or self.collapse_spans
+            or (self.max_attribute_length and self.truncate_attributes)
+        )
+
+
+def compile_patterns(patterns: Sequence[str]) -> Optional[re.Pattern]:
+    """Compile glob patterns into one alternation regex (None when there are no patterns)."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in patterns))
+
+
+def rebuild_span(
+    span: ReadableSpan,
+    attributes: dict[str, Any],
+    events: Optional[Sequence[Any]] = None,
+    parent: Optional[SpanContext] = None,
+) -> ReadableSpan:
+    """Return a copy of an ended span with its attributes (and optionally its events or parent) replaced."""
+    return ReadableSpan(
+        name=span.name,
+        context=span.context,
+        parent=span.parent if parent is None else parent,
+        resource=span.resource,
+        attributes=attributes,
+        events=span.events if events is None else events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+def transform_span_attributes(span: ReadableSpan, transform: Callable[[Any], Any]) -> ReadableSpan:
+    """
+    Apply an attribute transform to an ended span's attributes and event attributes.
+
+    The transform returns its argument unchanged when it has nothing to do, in
+    which case no copy is made; the span itself is returned when nothing changed.
+    """
+    attributes = transform(span.attributes)
+    events = span.events
+    transformed: Optional[list[Event]] = None
+    for index, event in enumerate(events):
+        event_attributes = transform(event.attributes)
+        if event_attributes is not event.attributes:
+            if transformed is None:
+                transformed = list(events)
+            transformed[index] = Event(event.name, event_attributes, event.timestamp)
+    if attributes is span.attributes and transformed is None:
+        return span
+    return rebuild_span(span, attributes, events=None if transformed is None else tuple(transformed))
+
+
+class FilterSpanProcessor(SpanProcessor):
+    """
+    Span processor that filters and trims spans before handing them to an export processor.
+
+    Rules are compiled once into a single regex per rule kind, and every decision
+    is memoized per span name/scope and per attribute key, so the steady-state
+    cost of a span does not grow with the number of rules.
+
+    A collapsed span is folded into its parent as a count and total duration.
+    Its exported descendants are re-parented onto the nearest ancestor that is
+    exported, so they do not reach the backend as orphans.
+    """
+
+    def __init__(
+        self,
+        delegate: SpanProcessor,
+        rules: FilterRules,
+        on_drop: Optional[Callable[[Sequence[ReadableSpan]], None]] = None,
+    ):
+        """
+        Initialize the filter.
+
+        Args:
+            delegate: The export processor receiving the filtered spans
+            rules: Filtering rules
+            on_drop: Called with spans that are dropped or collapsed, e.g. to fail their delivery receipts
+        """
+        self._delegate = delegate
+        self._rules = rules
+        self._on_drop = on_drop
+        self._drop_spans = compile_patterns(rules.drop_spans)
+        self._drop_scopes = compile_patterns(rules.drop_scopes)
+        self._collapse_spans = compile_patterns(rules.collapse_spans)
+        self._drop_attributes = compile_patterns(rules.drop_attributes)
+        self._truncate_attributes = compile_patterns(rules.truncate_attributes) if rules.max_attribute_length else None
+        self._max_length = rules.max_attribute_length
+        self._span_decisions: dict[tuple[str, str], int] = {}
+        self._attribute_decisions: dict[str, int] = {}
+        self._collapsed: OrderedDict[int, list[int]] = OrderedDict()
+        # Collapsed span ID -> the exported ancestor its children are re-parented onto
+        self._collapsing: OrderedDict[int, SpanContext] = OrderedDict()
+        self._collapsed_lock = threading.Lock()
+
+    def on_start(self, span: ReadableSpan, parent_context: Optional[Context] = None) -> None:
+        """Note collapsed spans, whose children start after them, and pass span starts through to the delegate."""
+        if self._collapse_spans is not None and span.parent is not None and self._span_decision(span) == COLLAPSE:
+            with self._collapsed_lock:
+                ancestor = self._collapsing.get(span.parent.span_id, span.parent)
+                if len(self._collapsing) >= _MAX_COLLAPSED_PARENTS:
+                    self._collapsing.popitem(last=False)
+                self._collapsing[span.context.span_id] = ancestor
+        self._delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Filter an ended span and forward what remains to the delegate."""
+        decision = self._span_decision(span)
+        if decision == DROP:
+            if self._on_drop is not None:
+                self._on_drop((span,))
+            return
+        if decision == COLLAPSE and span.parent is not None:
+            with self._collapsed_lock:
+                ancestor = self._collapsing.get(span.parent.span_id, span.parent).span_id
+                totals = self._collapsed.get(ancestor)
+                if totals is None:
+                    if len(self._collapsed) >= _MAX_COLLAPSED_PARENTS:
+                        self._collapsed.popitem(last=False)
+                    totals = self._collapsed[ancestor] = [0, 0]
+                totals[0] += 1
+                totals[1] += (span.end_time or 0) - (span.start_time or 0)
+            if self._on_drop is not None:
+                self._on_drop((span,))
+            return
+
+        # Event attributes too: actions recorded as events carry their payloads there
+        span = transform_span_attributes(span, self.filter_attributes)
+        attributes = span.attributes
+        collapsed = None
+        parent = None
+        if self._collapsed or self._collapsing:
+            with self._collapsed_lock:
+                collapsed = self._collapsed.pop(span.context.span_id, None)
+                if span.parent is not None:
+                    parent = self._collapsing.get(span.parent.span_id)
+        if collapsed is not None:
+            attributes = dict(attributes)
+            attributes["value.collapsed.count"] = collapsed[0]
+            attributes["value.collapsed.duration_ns"] = collapsed[1]
+        if attributes is not span.attributes or parent is not None:
+            span = rebuild_span(span, attributes, parent=parent)
+        self._delegate.on_end(span)
+
+    def filter_attributes(self, attributes: Any) -> Any:
+        """
+        Apply the attribute rules.
+
+        Returns:
+            The original mapping when nothing changed, otherwise a new dict
+        """
+        if not attributes or (self._drop_attributes is None and self._truncate_attributes is None):
+            return attributes
+        filtered: Optional[dict[str, Any]] = None
+        for key, value in attributes.items():
+            decision = self._attribute_decision(key)
+            if decision == DROP:
+                if filtered is None:
+                    filtered = dict(attributes)
+                del filtered[key]
+            elif decision == TRUNCATE and isinstance(value, str) and len(value) > self._max_length:
+                if filtered is None:
+                    filtered = dict(attributes)
+                filtered[key] = value[: self._max_length]
+        return attributes if filtered is None else filtered
+
+    def _span_decision(self, span: ReadableSpan) -> int:
+        scope_name = span.instrumentation_scope.name if span.instrumentation_scope else ""
+        key = (span.name, scope_name)
+        decision = self._span_decisions.get(key)
+        if decision is None:
+            if (self._drop_spans is not None and self._drop_spans.match(span.name)) or (
+                self._drop_scopes is not None and self._drop_scopes.match(scope_name)
+            ):
+                decision = DROP
+            elif self._collapse_spans is not None and self._collapse_spans.match(span.name):
+                decision = COLLAPSE
+            else:
+                decision = KEEP
+            if len(self._span_decisions) >= _MAX_CACHE:
+                self._span_decisions.clear()
+            self._span_decisions[key] = decision
+        return decision
+
+    def _attribute_decision(self, key: str) -> int:
+        decision = self._attribute_decisions.get(key)
+        if decision is None:
+            if self._drop_attributes is not None and self._drop_attributes.match(key):
+                decision = DROP
+            elif self._truncate_attributes is not None and self._truncate_attributes.match(key):
+                decision = TRUNCATE
+            else:
+                decision = KEEP
+            if len(self._attribute_decisions) >= _MAX_CACHE:
+                self._attribute_decisions.clear()
+            self._attribute_decisions[key] = decision
+        return decision
+
+    def shutdown(self) -> None:
+        """Shut down the delegate."""
+        self._delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Force flush the delegate."""
+        return self._delegate.force_flush(timeout_millis)
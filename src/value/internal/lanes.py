@@ -0,0 +1,281 @@
+"""Multi-lane batch span processor with per-lane queues, workers and drop policies."""
+
+import fnmatch
+import logging
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter
+
+logger = logging.getLogger(__name__)
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+
+# Routing decisions are cached per (span name, scope); the cache is reset if names explode
+_MAX_ROUTES = 4096
+
+
+@dataclass(frozen=True)
+class LaneConfig:
+    """Configuration of one export lane."""
+
+    name: str
+    span_names: tuple[str, ...] = ()
+    scopes: tuple[str, ...] = ()
+    priority: int = 0
+    max_queue_size: int = 2048
+    max_export_batch_size: int = 512
+    schedule_delay: float = 1.0
+    drop_policy: str = DROP_NEWEST
+    reserved: bool = False
+
+
+def default_lanes(queue_size: int = 2048, action_queue_size: int = 2048) -> list[LaneConfig]:
+    """
+    Return the default lanes: value.action spans, manual spans and auto-instrumented spans.
+
+    The action lane is reserved: it has its own capacity outside the shared budget
+    and is never shed to make room for other lanes. Auto-instrumentation spans
+    have the lowest priority and are shed first under pressure.
+
+    Args:
+        queue_size: Queue size of the shared lanes
+        action_queue_size: Queue size of the reserved action lane
+    """
+    return [
+        LaneConfig(
+            name="actions",
+            span_names=("value.action*",),
+            priority=100,
+            max_queue_size=action_queue_size,
+            schedule_delay=0.5,
+            reserved=True,
+        ),
+        LaneConfig(
+            name="instrumentation",
+            scopes=("opentelemetry.instrumentation.*",),
+            priority=0,
+            max_queue_size=queue_size,
+            drop_policy=DROP_OLDEST,
+        ),
+        LaneConfig(name="default", priority=10, max_queue_size=queue_size),
+    ]
+
+
+def _compile(patterns: Sequence[str]) -> Optional[re.Pattern]:
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in patterns))
+
+
+class _Lane:
+    """Runtime state of one lane; guarded by the processor lock."""
+
+    def __init__(self, config: LaneConfig, lock: threading.Lock):
+        self.config = config
+        self.name_matcher = _compile(config.span_names)
+        self.scope_matcher = _compile(config.scopes)
+        self.queue: deque[ReadableSpan] = deque()
+        self.condition = threading.Condition(lock)
+        self.exporting = 0
+        self.flush_requested = False
+        self.dropped = 0
+        self.worker: Optional[threading.Thread] = None
+
+    def matches(self, span_name: str, scope_name: str) -> bool:
+        if self.name_matcher is None and self.scope_matcher is None:
+            return True
+        if self.name_matcher is not None and self.name_matcher.match(span_name):
+            return True
+        return self.scope_matcher is not None and self.scope_matcher.match(scope_name) is not None
+
+
+class LaneSpanProcessor(SpanProcessor):
+    """
+    Batch span processor that routes spans into prioritized lanes.
+
+    Spans are routed by span name or instrumentation scope (first matching lane
+    wins; a lane without patterns catches everything). Each lane has its own
+    bounded queue, batch size, flush interval, drop policy and worker thread. Non
+    reserved lanes additionally share max_total_spans: when the budget is
+    exhausted, the lowest priority lane below the incoming span's lane is shed
+    first.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        lanes: Optional[Sequence[LaneConfig]] = None,
+        max_total_spans: int = 4096,
+        on_drop: Optional[Callable[[Sequence[ReadableSpan]], None]] = None,
+    ):
+        """
+        Initialize the lane processor and start one worker per lane.
+
+        Args:
+            exporter: Exporter shared by all lanes (must be thread safe)
+            lanes: Lane configurations (defaults to default_lanes())
+            max_total_spans: Budget shared by the non-reserved lanes
+            on_drop: Called with spans dropped from a queue
+        """
+        self._exporter = exporter
+        self._lock = threading.Lock()
+        self._lanes = [_Lane(config, self._lock) for config in (lanes or default_lanes())]
+        self._shed_order = sorted((lane for lane in self._lanes if not lane.config.reserved), key=_priority)
+        self._max_total_spans = max_total_spans
+        self._shared_queued = 0
+        self._on_drop = on_drop
+        self._routes: dict[tuple[str, str], _Lane] = {}
+        self._shutdown = False
+        for lane in self._lanes:
+            lane.worker = threading.Thread(
+                target=self._work, args=(lane,), name=f"value-lane-{lane.config.name}", daemon=True
+            )
+            lane.worker.start()
+
+    @property
+    def max_queue_size(self) -> int:
+        """Spans the lanes hold in total before dropping: the shared budget plus the reserved lanes' queues."""
+        shared = sum(lane.config.max_queue_size for lane in self._lanes if not lane.config.reserved)
+        reserved = sum(lane.config.max_queue_size for lane in self._lanes if lane.config.reserved)
+        return min(shared, self._max_total_spans) + reserved
+
+    def lane_stats(self) -> dict[str, dict[str, int]]:
+        """Return queued and dropped span counts per lane."""
+        with self._lock:
+            return {lane.config.name: {"queued": len(lane.queue), "dropped": lane.dropped} for lane in self._lanes}
+
+    def on_start(self, span: ReadableSpan, parent_context: Optional[Context] = None) -> None:
+        """Called when a span is started."""
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Route an ended span into its lane, shedding lower priority lanes if needed."""
+        if self._shutdown or not span.context.trace_flags.sampled:
+            return
+        lane = self._route(span)
+        dropped: Optional[ReadableSpan] = None
+        with self._lock:
+            config = lane.config
+            if len(lane.queue) >= config.max_queue_size:
+                dropped = self._drop_from(lane, span)
+            elif not config.reserved and self._shared_queued >= self._max_total_spans:
+                victim = next(
+                    (
+                        other
+                        for other in self._shed_order
+                        if other.queue and _priority(other) < config.priority and other is not lane
+                    ),
+                    None,
+                )
+                if victim is not None:
+                    dropped = victim.queue.popleft()
+                    victim.dropped += 1
+                    self._shared_queued -= 1
+                    self._enqueue(lane, span)
+                else:
+                    dropped = self._drop_from(lane, span)
+            else:
+                self._enqueue(lane, span)
+        if dropped is not None and self._on_drop is not None:
+            self._on_drop((dropped,))
+
+    def _route(self, span: ReadableSpan) -> _Lane:
+        scope_name = span.instrumentation_scope.name if span.instrumentation_scope else ""
+        key = (span.name, scope_name)
+        lane = self._routes.get(key)
+        if lane is None:
+            lane = next((lane for lane in self._lanes if lane.matches(span.name, scope_name)), self._lanes[-1])
+            if len(self._routes) >= _MAX_ROUTES:
+                self._routes.clear()
+            self._routes[key] = lane
+        return lane
+
+    def _enqueue(self, lane: _Lane, span: ReadableSpan) -> None:
+        lane.queue.append(span)
+        if not lane.config.reserved:
+            self._shared_queued += 1
+        if len(lane.queue) >= lane.config.max_export_batch_size:
+            lane.condition.notify()
+
+    def _drop_from(self, lane: _Lane, span: ReadableSpan) -> ReadableSpan:
+        lane.dropped += 1
+        if lane.config.drop_policy == DROP_OLDEST and lane.queue:
+            dropped = lane.queue.popleft()
+            lane.queue.append(span)
+            return dropped
+        return span
+
+    def _work(self, lane: _Lane) -> None:
+        config = lane.config
+        while True:
+            with self._lock:
+                deadline = time.monotonic() + config.schedule_delay
+                while (
+                    not self._shutdown and not lane.flush_requested and len(lane.queue) < config.max_export_batch_size
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    lane.condition.wait(remaining)
+                count = min(len(lane.queue), config.max_export_batch_size)
+                batch = [lane.queue.popleft() for _ in range(count)]
+                if not config.reserved:
+                    self._shared_queued -= count
+                if not lane.queue:
+                    lane.flush_requested = False
+                    lane.condition.notify_all()
+                lane.exporting += 1
+                stop = self._shutdown and not lane.queue and not batch
+            try:
+                if batch:
+                    self._exporter.export(batch)
+            except Exception:
+                logger.exception("Exception while exporting spans from lane %s", config.name)
+            finally:
+                with self._lock:
+                    lane.exporting -= 1
+                    lane.condition.notify_all()
+            if stop:
+                return
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Export everything queued in every lane, waiting at most timeout_millis."""
+        deadline = time.monotonic() + timeout_millis / 1000
+        with self._lock:
+            for lane in self._lanes:
+                if lane.queue:
+                    lane.flush_requested = True
+                    lane.condition.notify_all()
+            for lane in self._lanes:
+                while lane.queue or lane.exporting:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    lane.condition.wait(remaining)
+        return True
+
+    def shutdown(self) -> None:
+        """Drain every lane, stop the workers and shut down the exporter."""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            for lane in self._lanes:
+                lane.condition.notify_all()
+        for lane in self._lanes:
+            if lane.worker is not None:
+                lane.worker.join()
+        self._exporter.shutdown()
+
+
+def _priority(lane: _Lane) -> int:
+    return lane.config.priority
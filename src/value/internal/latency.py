@@ -0,0 +1,323 @@
+"""Per-action-context latency breakdown and critical path analysis."""
+
+import bisect
+import heapq
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+
+logger = logging.getLogger(__name__)
+
+LLM = "llm"
+TOOL = "tool"
+ACTION = "action"
+OTHER = "other"
+
+# When spans overlap, time is attributed to the highest priority category
+_PRIORITY = {LLM: 3, TOOL: 2, ACTION: 1, OTHER: 0}
+
+_LLM_ATTRIBUTES = ("gen_ai.system", "gen_ai.request.model", "llm.request.type")
+_TOOL_OPERATIONS = frozenset({"execute_tool", "tool"})
+
+_current_tracker: ContextVar[Optional["LatencyTracker"]] = ContextVar("_current_latency_tracker", default=None)
+
+
+def classify(span: ReadableSpan) -> str:
+    """Return the latency category of an ended span."""
+    name = span.name
+    if name == "value.action.context":
+        # Summary of a nested action context; its spans were analyzed there
+        return OTHER
+    if name.startswith("value.action"):
+        return ACTION
+    attributes = span.attributes or {}
+    if any(key in attributes for key in _LLM_ATTRIBUTES):
+        return LLM
+    if (
+        attributes.get("gen_ai.operation.name") in _TOOL_OPERATIONS
+        or attributes.get("traceloop.span.kind") == "tool"
+        or name.startswith("tool")
+    ):
+        return TOOL
+    return OTHER
+
+
+@dataclass
+class LatencyBreakdown:
+    """
+    Where the wall time of an action context went.
+
+    Category times are exclusive: overlapping spans are attributed to the highest
+    priority category (llm > tool > action > other), and self time is wall time no
+    span covered, i.e. the context's own Python code. The times sum to wall_ms.
+    """
+
+    wall_ms: float = 0.0
+    llm_ms: float = 0.0
+    tool_ms: float = 0.0
+    action_ms: float = 0.0
+    other_ms: float = 0.0
+    self_ms: float = 0.0
+    critical_path: list[tuple[str, float]] = field(default_factory=list)
+    critical_path_ms: float = 0.0
+    span_count: int = 0
+    truncated: bool = False
+
+    def to_attributes(self) -> dict[str, Any]:
+        """Return the breakdown as value.latency.* span attributes."""
+        return {
+            "value.latency.wall_ms": self.wall_ms,
+            "value.latency.llm_ms": self.llm_ms,
+            "value.latency.tool_ms": self.tool_ms,
+            "value.latency.action_ms": self.action_ms,
+            "value.latency.other_ms": self.other_ms,
+            "value.latency.self_ms": self.self_ms,
+            "value.latency.critical_path_ms": self.critical_path_ms,
+            "value.latency.critical_path": json.dumps([[name, duration] for name, duration in self.critical_path]),
+            "value.latency.span_count": self.span_count,
+            "value.latency.truncated": self.truncated,
+        }
+
+
+class _SpanRecord:
+    __slots__ = ("span_id", "parent_id", "name", "category", "start", "end")
+
+    def __init__(self, span: ReadableSpan):
+        self.span_id = span.context.span_id
+        self.parent_id = span.parent.span_id if span.parent is not None else None
+        self.name = span.name
+        self.category = classify(span)
+        self.start = span.start_time or 0
+        self.end = span.end_time or self.start
+
+    @property
+    def duration(self) -> int:
+        return self.end - self.start
+
+    def __lt__(self, other: "_SpanRecord") -> bool:
+        return self.duration < other.duration
+
+
+class LatencyTracker:
+    """
+    Spans that ended inside one action context.
+
+    Memory is bounded by max_spans: past it, only the longest spans are kept, which
+    preserves the spans that dominate the breakdown and the critical path; the
+    breakdown is then flagged as truncated.
+    """
+
+    def __init__(self, max_spans: int = 1000):
+        """
+        Start tracking.
+
+        Args:
+            max_spans: Maximum span records kept in memory
+        """
+        self.started = time.time_ns()
+        self.ended: Optional[int] = None
+        self._max_spans = max_spans
+        self._records: list[_SpanRecord] = []
+        self._span_count = 0
+        self._lock = threading.Lock()
+        self.breakdown: Optional[LatencyBreakdown] = None
+
+    def add(self, span: ReadableSpan) -> None:
+        """Record an ended span."""
+        record = _SpanRecord(span)
+        with self._lock:
+            self._span_count += 1
+            if len(self._records) < self._max_spans:
+                self._records.append(record)
+                if len(self._records) == self._max_spans:
+                    heapq.heapify(self._records)
+            elif self._records[0] < record:
+                heapq.heapreplace(self._records, record)
+
+    def compute(self, end: Optional[int] = None) -> LatencyBreakdown:
+        """Compute the breakdown of the context up to end (defaults to now)."""
+        end = end or self.ended or time.time_ns()
+        with self._lock:
+            records = list(self._records)
+            span_count = self._span_count
+        totals = _exclusive_times(records, self.started, end)
+        path = _critical_path(records)
+        path_ids = {record.span_id for record in path}
+        return LatencyBreakdown(
+            wall_ms=(end - self.started) / 1e6,
+            llm_ms=totals[LLM] / 1e6,
+            tool_ms=totals[TOOL] / 1e6,
+            action_ms=totals[ACTION] / 1e6,
+            other_ms=totals[OTHER] / 1e6,
+            self_ms=totals[None] / 1e6,
+            critical_path=[(record.name, record.duration / 1e6) for record in path],
+            # Nested path spans are already covered by their parent's duration
+            critical_path_ms=sum(record.duration for record in path if record.parent_id not in path_ids) / 1e6,
+            span_count=span_count,
+            truncated=span_count > len(records),
+        )
+
+
+def _exclusive_times(records: list[_SpanRecord], start: int, end: int) -> dict[Optional[str], int]:
+    """Sweep the span intervals and attribute every instant to the top active category (None if idle)."""
+    boundaries: list[tuple[int, int, str]] = []
+    for record in records:
+        span_start, span_end = max(record.start, start), min(record.end, end)
+        if span_end > span_start:
+            boundaries.append((span_start, 1, record.category))
+            boundaries.append((span_end, -1, record.category))
+    boundaries.sort()
+
+    totals: dict[Optional[str], int] = {LLM: 0, TOOL: 0, ACTION: 0, OTHER: 0, None: 0}
+    active = {LLM: 0, TOOL: 0, ACTION: 0, OTHER: 0}
+    cursor = start
+    for timestamp, delta, category in boundaries:
+        if timestamp > cursor:
+            top = max((name for name, count in active.items() if count), key=_PRIORITY.get, default=None)
+            totals[top] += timestamp - cursor
+            cursor = timestamp
+        active[category] += delta
+    totals[None] += max(end - cursor, 0)
+    return totals
+
+
+def _critical_path(records: list[_SpanRecord]) -> list[_SpanRecord]:
+    """
+    Return the chain of spans that determined the context's end time.
+
+    Starting from the last root span to end, repeatedly step into the child that
+    ended last before the current cursor, walking backwards through each span.
+    Siblings are sorted by end time once, so each step is a binary search and the
+    walk is iterative: O(n log n), whatever the depth of the span tree.
+    """
+    if not records:
+        return []
+    ids = {record.span_id for record in records}
+    children: dict[Optional[int], list[_SpanRecord]] = {}
+    for record in records:
+        parent = record.parent_id if record.parent_id in ids else None
+        children.setdefault(parent, []).append(record)
+    levels: dict[Optional[int], tuple[list[_SpanRecord], list[int]]] = {}
+    for parent, siblings in children.items():
+        siblings.sort(key=lambda record: record.end)
+        levels[parent] = (siblings, [record.end for record in siblings])
+
+    path: list[_SpanRecord] = []
+    # (parent span ID, cursor): pick the sibling that ended last at or before the cursor (None: any)
+    stack: list[tuple[Optional[int], Optional[int]]] = [(None, None)] if None in levels else []
+    while stack:
+        parent, cursor = stack.pop()
+        siblings, ends = levels[parent]
+        index = len(siblings) if cursor is None else bisect.bisect_right(ends, cursor)
+        if not index:
+            continue
+        last = siblings[index - 1]
+        path.append(last)
+        # Continue with the earlier siblings once the chosen span's children are walked
+        stack.append((parent, last.start))
+        if last.span_id in levels:
+            stack.append((last.span_id, last.end))
+    return sorted(path, key=lambda record: record.start)
+
+
+class LatencyAnalyzerSpanProcessor(SpanProcessor):
+    """
+    Span processor collecting the spans of each active action context.
+
+    A span belongs to the action context that is current when it starts (which
+    carries across executors wrapped with the client's wrap_executor); it is
+    recorded when it ends, wherever that is.
+    """
+
+    def __init__(self, max_spans_per_context: int = 1000, max_live_spans: int = 100000, max_live_age: float = 300.0):
+        """
+        Initialize the analyzer.
+
+        Args:
+            max_spans_per_context: Span records kept per action context
+            max_live_spans: Started spans tracked at once; spans past it are not analyzed
+            max_live_age: Seconds after which a started span that never ended may be evicted
+                to make room, as may spans whose action context has already ended
+        """
+        self._max_spans = max_spans_per_context
+        self._max_live_spans = max_live_spans
+        self._max_live_age_ns = int(max_live_age * 1e9)
+        # Span ID -> (tracker, start time); insertion order is start order, oldest first
+        self._live: dict[int, tuple[LatencyTracker, int]] = {}
+        self._lock = threading.Lock()
+        self._cap_logged = False
+
+    def begin(self) -> tuple[LatencyTracker, Token]:
+        """Start tracking a new action context and make it current."""
+        tracker = LatencyTracker(max_spans=self._max_spans)
+        return tracker, _current_tracker.set(tracker)
+
+    def end(self, tracker: LatencyTracker, token: Token) -> LatencyBreakdown:
+        """
+        Stop tracking an action context and compute its breakdown.
+
+        Args:
+            tracker: The tracker returned by begin()
+            token: The token returned by begin()
+
+        Returns:
+            The breakdown of the context
+        """
+        _current_tracker.reset(token)
+        tracker.ended = time.time_ns()
+        tracker.breakdown = tracker.compute()
+        return tracker.breakdown
+
+    def on_start(self, span: ReadableSpan, parent_context: Optional[Context] = None) -> None:
+        """Associate a starting span with the current action context."""
+        tracker = _current_tracker.get()
+        if tracker is None or tracker.ended is not None:
+            return
+        now = time.time_ns()
+        with self._lock:
+            if len(self._live) >= self._max_live_spans:
+                self._evict(now)
+            if len(self._live) < self._max_live_spans:
+                self._live[span.context.span_id] = (tracker, now)
+                return
+            if self._cap_logged:
+                return
+            self._cap_logged = True
+        logger.warning(
+            "Latency analysis is tracking %d started spans; newer spans are not analyzed until some end",
+            self._max_live_spans,
+        )
+
+    def _evict(self, now: int) -> None:
+        """Drop the oldest live entries while they are stale (called under the lock)."""
+        while self._live:
+            span_id = next(iter(self._live))
+            tracker, started = self._live[span_id]
+            if tracker.ended is None and now - started < self._max_live_age_ns:
+                return
+            del self._live[span_id]
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Record an ended span with its action context."""
+        if not self._live:
+            return
+        with self._lock:
+            entry = self._live.pop(span.context.span_id, None)
+        if entry is not None:
+            entry[0].add(span)
+
+    def shutdown(self) -> None:
+        """Called when the processor is shut down."""
+        with self._lock:
+            self._live.clear()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Force flush any buffered spans."""
+        return True
@@ -0,0 +1,280 @@
+"""Synthetic load generator driving the clients against local stand-in services."""
+
+import asyncio
+import random
+import sys
+import threading
+import time
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from .shutdown import ShutdownReport
+from .standins import StandInAgentInfoServer, StandInCollector
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+MODE_ASYNC = "async"
+MODE_SYNC = "sync"
+
+DEFAULT_ACTION_MIX = (("process_invoice", 0.6), ("classify_document", 0.3), ("llm_call", 0.1))
+
+
+@dataclass(frozen=True)
+class LoadgenOptions:
+    """
+    Load generator settings.
+
+    Attributes:
+        rate: Target actions per second across all workers (0 sends as fast as possible)
+        duration: Run time in seconds
+        concurrency: Concurrent senders (tasks in async mode, threads in sync mode)
+        mode: "async" (AsyncValueClient) or "sync" (ValueClient)
+        attribute_count: Custom attributes per action
+        attribute_bytes: Size of each custom attribute value
+        action_mix: (action name, weight) pairs
+        endpoint: OTLP endpoint to export to (None runs a stand-in collector)
+        shutdown_timeout: Flush deadline at the end of the run
+    """
+
+    rate: float = 1000.0
+    duration: float = 10.0
+    concurrency: int = 8
+    mode: str = MODE_ASYNC
+    attribute_count: int = 4
+    attribute_bytes: int = 64
+    action_mix: tuple[tuple[str, float], ...] = DEFAULT_ACTION_MIX
+    endpoint: Optional[str] = None
+    shutdown_timeout: float = 10.0
+
+
+@dataclass
+class LoadgenReport:
+    """Outcome of a load generator run."""
+
+    actions: int = 0
+    duration: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_bytes: Optional[int] = None
+    latencies: list[float] = field(default_factory=list, repr=False)
+    spans_received: Optional[int] = None
+    shutdown: Optional[ShutdownReport] = None
+
+    @property
+    def throughput(self) -> float:
+        """Achieved actions per second."""
+        return self.actions / self.duration if self.duration else 0.0
+
+    @property
+    def cpu_per_action(self) -> float:
+        """Process CPU seconds (including export threads) per action."""
+        return self.cpu_seconds / self.actions if self.actions else 0.0
+
+    @property
+    def dropped(self) -> int:
+        """Spans that were not exported by the end of the run."""
+        return self.shutdown.lost if self.shutdown else 0
+
+    def latency_percentiles(self, percentiles: Sequence[float] = (50, 90, 99, 99.9)) -> dict[str, float]:
+        """Return send-path latency percentiles (and the maximum) in seconds."""
+        if not self.latencies:
+            return {}
+        ordered = sorted(self.latencies)
+        result = {
+            f"p{percentile:g}": ordered[min(int(len(ordered) * percentile / 100), len(ordered) - 1)]
+            for percentile in percentiles
+        }
+        result["max"] = ordered[-1]
+        return result
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the report as JSON-serializable numbers."""
+        return {
+            "actions": self.actions,
+            "duration_s": self.duration,
+            "throughput_per_s": self.throughput,
+            "latency_s": self.latency_percentiles(),
+            "cpu_per_action_s": self.cpu_per_action,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "spans_received": self.spans_received,
+            "dropped": self.dropped,
+        }
+
+    def format(self) -> str:
+        """Return a human readable summary."""
+        lines = [
+            f"actions:        {self.actions} in {self.duration:.2f}s ({self.throughput:,.0f}/s)",
+            "send latency:   "
+            + ", ".join(f"{name} {value * 1e6:,.0f}us" for name, value in self.latency_percentiles().items()),
+            f"cpu per action: {self.cpu_per_action * 1e6:,.1f}us",
+        ]
+        if self.peak_rss_bytes is not None:
+            lines.append(f"peak rss:       {self.peak_rss_bytes / 2**20:,.1f} MiB")
+        if self.spans_received is not None:
+            lines.append(f"spans received: {self.spans_received}")
+        lines.append(f"dropped:        {self.dropped}")
+        return "\n".join(lines)
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _Workload:
+    """Pre-built action names and attributes so payload generation stays off the measured path."""
+
+    def __init__(self, options: LoadgenOptions):
+        names = [name for name, _ in options.action_mix]
+        weights = [weight for _, weight in options.action_mix]
+        rng = random.Random(0)
+        self.actions = rng.choices(names, weights=weights, k=1024)
+        self.attributes = {
+            f"loadgen.attribute_{index}": "x" * options.attribute_bytes for index in range(options.attribute_count)
+        }
+        self.users = [(str(uuid.uuid4()), f"user_{index}") for index in range(64)]
+
+    def pick(self, sequence: int) -> tuple[str, str, str]:
+        anonymous_id, user_id = self.users[sequence % len(self.users)]
+        return self.actions[sequence % len(self.actions)], anonymous_id, user_id
+
+
+def run_loadgen(options: LoadgenOptions) -> LoadgenReport:
+    """
+    Drive a client at a target rate and measure the send path and export pipeline.
+
+    The client is configured from the environment as usual (VALUE_* variables), so
+    pipeline settings can be compared run against run. The control plane is always
+    a local stand-in; spans go to a stand-in collector unless an endpoint is given.
+
+    Args:
+        options: Load generator settings
+
+    Returns:
+        A report with throughput, latency percentiles, CPU per action, peak RSS and drops
+    """
+    collector = StandInCollector(max_workers=8).start() if options.endpoint is None else None
+    agent_info = StandInAgentInfoServer().start()
+    endpoint = options.endpoint or collector.endpoint
+    try:
+        if options.mode == MODE_SYNC:
+            report = _run_sync(options, endpoint, agent_info.url)
+        elif options.mode == MODE_ASYNC:
+            report = asyncio.run(_run_async(options, endpoint, agent_info.url))
+        else:
+            raise ValueError(f"Unsupported loadgen mode: {options.mode}")
+    finally:
+        agent_info.stop()
+        if collector is not None:
+            collector.stop()
+    if collector is not None:
+        report.spans_received = collector.spans
+    report.peak_rss_bytes = _peak_rss_bytes()
+    return report
+
+
+async def _run_async(options: LoadgenOptions, endpoint: str, backend_url: str) -> LoadgenReport:
+    from ..client import AsyncValueClient
+
+    client = AsyncValueClient(
+        secret="loadgen", service_name="value-loadgen", otel_endpoint=endpoint, backend_url=backend_url
+    )
+    await client.initialize()
+    workload = _Workload(options)
+    emitter = client.action()
+    interval = options.concurrency / options.rate if options.rate > 0 else 0.0
+    latencies: list[list[float]] = [[] for _ in range(options.concurrency)]
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    deadline = started + options.duration
+
+    async def _worker(index: int) -> None:
+        own = latencies[index]
+        scheduled = started + interval * index / options.concurrency
+        sequence = index
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            if scheduled > now:
+                await asyncio.sleep(scheduled - now)
+            elif not interval:
+                await asyncio.sleep(0)
+            action_name, anonymous_id, user_id = workload.pick(sequence)
+            send_started = time.perf_counter()
+            emitter.send(action_name, anonymous_id=anonymous_id, user_id=user_id, **workload.attributes)
+            own.append(time.perf_counter() - send_started)
+            scheduled += interval
+            sequence += options.concurrency
+
+    await asyncio.gather(*(_worker(index) for index in range(options.concurrency)))
+    duration = time.perf_counter() - started
+    shutdown = await client.aclose(timeout=options.shutdown_timeout)
+    return _report(latencies, duration, time.process_time() - cpu_started, shutdown)
+
+
+def _run_sync(options: LoadgenOptions, endpoint: str, backend_url: str) -> LoadgenReport:
+    from ..client import ValueClient
+
+    client = ValueClient(
+        secret="loadgen", service_name="value-loadgen", otel_endpoint=endpoint, backend_url=backend_url
+    )
+    client.initialize()
+    workload = _Workload(options)
+    emitter = client.action()
+    interval = options.concurrency / options.rate if options.rate > 0 else 0.0
+    latencies: list[list[float]] = [[] for _ in range(options.concurrency)]
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    deadline = started + options.duration
+
+    def _worker(index: int) -> None:
+        own = latencies[index]
+        scheduled = started + interval * index / options.concurrency
+        sequence = index
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            if scheduled > now:
+                time.sleep(scheduled - now)
+            action_name, anonymous_id, user_id = workload.pick(sequence)
+            send_started = time.perf_counter()
+            emitter.send(action_name, anonymous_id=anonymous_id, user_id=user_id, **workload.attributes)
+            own.append(time.perf_counter() - send_started)
+            scheduled += interval
+            sequence += options.concurrency
+
+    threads = [
+        threading.Thread(target=_worker, args=(index,), name=f"value-loadgen-{index}")
+        for index in range(options.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+    shutdown = client.close(timeout=options.shutdown_timeout)
+    return _report(latencies, duration, time.process_time() - cpu_started, shutdown)
+
+
+def _report(
+    latencies: list[list[float]], duration: float, cpu_seconds: float, shutdown: Optional[ShutdownReport]
+) -> LoadgenReport:
+    merged = [latency for own in latencies for latency in own]
+    return LoadgenReport(
+        actions=len(merged),
+        duration=duration,
+        cpu_seconds=cpu_seconds,
+        latencies=merged,
+        shutdown=shutdown,
+    )
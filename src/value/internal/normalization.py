@@ -0,0 +1,245 @@
+"""Bounded normalization of action attributes: array summaries, container caps and native scalars."""
+
+import datetime
+import enum
+import json
+import math
+import sys
+from collections.abc import Mapping
+from typing import Any, Optional
+
+_NATIVE_TYPES = frozenset({str, bool, int, float, type(None)})
+# Buffers and lists whose elements are summarized without NumPy are capped at this many elements
+_MAX_PURE_PYTHON_ELEMENTS = 100000
+# struct format characters of numeric buffer elements
+_NUMERIC_FORMATS = frozenset("bBhHiIlLqQnNefd")
+_STATS = ("min", "max", "mean", "norm")
+
+MAX_DEPTH = 4
+MAX_ITEMS = 64
+MAX_STRING = 4096
+MAX_TOTAL = 65536
+
+# Approximate JSON characters charged for a scalar, a container and a summary
+_SCALAR_COST = 8
+_CONTAINER_COST = 2
+_SUMMARY_COST = 128
+
+
+class Budget:
+    """Approximate JSON characters left for one normalized output, shared by every value normalized against it."""
+
+    __slots__ = ("remaining",)
+
+    def __init__(self, total: int = MAX_TOTAL):
+        self.remaining = total
+
+
+def normalize(
+    value: Any,
+    max_depth: int = MAX_DEPTH,
+    max_items: int = MAX_ITEMS,
+    max_string: int = MAX_STRING,
+    budget: Optional[Budget] = None,
+) -> Any:
+    """
+    Convert a value into a bounded, JSON-serializable form.
+
+    NumPy arrays, buffer-protocol objects (array.array, memoryview, bytes) and long
+    numeric lists become statistical summaries (shape, dtype, min/max/mean, norm);
+    NumPy and other scalars become native Python values; containers are cut to
+    max_items entries and max_depth levels, and strings to max_string characters.
+    Anything else becomes its truncated str(). On top of the per-level limits, the
+    whole output is held to a total budget of about MAX_TOTAL JSON characters:
+    once it is spent, strings are cut short and the remaining container items are
+    replaced by a "__truncated__" count. Output size and CPU are bounded by the
+    limits, not by the size of the input (beyond one vectorized pass over arrays).
+
+    Args:
+        value: Any attribute value
+        max_depth: Container nesting kept; deeper containers become a "<type len=N>" string
+        max_items: Items kept per container
+        max_string: Characters kept per string
+        budget: Total budget shared with other values, e.g. the attributes of one
+            action (defaults to a fresh budget of MAX_TOTAL)
+
+    Returns:
+        A JSON-serializable value
+    """
+    return _normalize(value, max_depth, max_items, max_string, budget or Budget())
+
+
+def to_attribute_value(value: Any, max_items: int = MAX_ITEMS, max_string: int = MAX_STRING) -> Any:
+    """
+    Convert a value into a native OpenTelemetry attribute value.
+
+    Native scalars and homogeneous sequences of them are kept (NumPy scalars are
+    unwrapped); anything else is normalized and JSON-encoded.
+    """
+    if type(value) in _NATIVE_TYPES:
+        return value
+    scalar = _scalar(value)
+    if scalar is not None:
+        return scalar
+    if isinstance(value, (list, tuple)) and len(value) <= max_items:
+        items = [_scalar(item) if type(item) not in _NATIVE_TYPES else item for item in value]
+        if items and all(item is not None for item in items) and len({type(item) for item in items}) == 1:
+            return items
+    return json.dumps(normalize(value, max_items=max_items, max_string=max_string))
+
+
+def _normalize(value: Any, depth: int, max_items: int, max_string: int, budget: Budget) -> Any:
+    kind = type(value)
+    if kind is str:
+        return _cut(value, max_string, budget)
+    if kind in _NATIVE_TYPES:
+        budget.remaining -= _SCALAR_COST
+        return value
+    scalar = _scalar(value)
+    if scalar is not None:
+        if isinstance(scalar, str):
+            return _cut(scalar, max_string, budget)
+        budget.remaining -= _SCALAR_COST
+        return scalar
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        budget.remaining -= _SUMMARY_COST
+        return _summarize_ndarray(numpy, value)
+    if isinstance(value, (bytes, bytearray, memoryview)) or _is_buffer(value):
+        budget.remaining -= _SUMMARY_COST
+        return _summarize_buffer(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return _cut(value.isoformat(), max_string, budget)
+    if isinstance(value, Mapping):
+        if depth <= 0:
+            return _cut(f"<{kind.__name__} len={len(value)}>", max_string, budget)
+        budget.remaining -= _CONTAINER_COST
+        normalized = {}
+        for index, (key, item) in enumerate(value.items()):
+            if index == max_items or budget.remaining <= 0:
+                normalized["__truncated__"] = len(value) - index
+                break
+            key = key if type(key) is str else str(key)
+            budget.remaining -= len(key) + 3
+            normalized[key] = _normalize(item, depth - 1, max_items, max_string, budget)
+        return normalized
+    if isinstance(value, (list, tuple, set, frozenset)):
+        if len(value) > max_items and isinstance(value, (list, tuple)) and _is_numeric_sequence(value, max_items):
+            budget.remaining -= _SUMMARY_COST
+            return _summarize_numbers(numpy, value)
+        if depth <= 0:
+            return _cut(f"<{kind.__name__} len={len(value)}>", max_string, budget)
+        budget.remaining -= _CONTAINER_COST
+        normalized_items = []
+        for index, item in enumerate(value):
+            if index == max_items or budget.remaining <= 0:
+                normalized_items.append({"__truncated__": len(value) - index})
+                break
+            normalized_items.append(_normalize(item, depth - 1, max_items, max_string, budget))
+        return normalized_items
+    return _cut(str(value), max_string, budget)
+
+
+def _cut(text: str, max_string: int, budget: Budget) -> str:
+    """Cut a string to max_string characters and to what is left of the budget, and charge it."""
+    limit = min(max_string, max(budget.remaining - 2, 0))
+    if len(text) > limit:
+        text = text[:limit]
+    budget.remaining -= len(text) + 2
+    return text
+
+
+def _scalar(value: Any) -> Optional[Any]:
+    """Unwrap NumPy scalars and enums into native values (None when value is not a scalar)."""
+    if isinstance(value, enum.Enum):
+        value = value.value
+        return value if type(value) in _NATIVE_TYPES else str(value)
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and isinstance(value, numpy.generic):
+        return value.item() if isinstance(value, (numpy.number, numpy.bool_)) else str(value)
+    return None
+
+
+def _is_buffer(value: Any) -> bool:
+    try:
+        memoryview(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _is_numeric_sequence(value: Any, sample: int) -> bool:
+    """Guess from the first items whether a long list holds only numbers."""
+    return all(type(item) in (int, float) for item in value[:sample])
+
+
+def _finite(number: float) -> Optional[float]:
+    return number if math.isfinite(number) else None
+
+
+def _summarize_ndarray(numpy: Any, array: Any) -> dict[str, Any]:
+    summary: dict[str, Any] = {
+        "type": "ndarray",
+        "shape": list(array.shape),
+        "dtype": str(array.dtype),
+        "size": int(array.size),
+    }
+    if array.size and (numpy.issubdtype(array.dtype, numpy.number) or array.dtype == numpy.bool_):
+        if numpy.issubdtype(array.dtype, numpy.complexfloating):
+            values = numpy.abs(array)
+        else:
+            values = array.astype(numpy.float64, copy=False)
+        summary.update(
+            min=_finite(float(numpy.nanmin(values))),
+            max=_finite(float(numpy.nanmax(values))),
+            mean=_finite(float(numpy.nanmean(values))),
+            norm=_finite(float(numpy.linalg.norm(numpy.nan_to_num(values).ravel()))),
+        )
+    return summary
+
+
+def _summarize_buffer(value: Any) -> dict[str, Any]:
+    view = value if isinstance(value, memoryview) else memoryview(value)
+    summary: dict[str, Any] = {
+        "type": type(value).__name__,
+        "shape": list(view.shape or ()),
+        "format": view.format,
+        "nbytes": view.nbytes,
+    }
+    if view.format not in _NUMERIC_FORMATS or not view.nbytes or isinstance(value, (bytes, bytearray)):
+        return summary
+    numpy = sys.modules.get("numpy")
+    try:
+        if numpy is not None:
+            stats = _summarize_ndarray(numpy, numpy.asarray(view))
+            summary.update({key: stats[key] for key in _STATS})
+        elif view.nbytes // view.itemsize <= _MAX_PURE_PYTHON_ELEMENTS:
+            summary.update(_pure_stats(view if view.ndim == 1 else view.cast("B").cast(view.format)))
+    except (TypeError, ValueError):
+        # Non-contiguous views cannot be flattened
+        pass
+    return summary
+
+
+def _summarize_numbers(numpy: Any, values: Any) -> dict[str, Any]:
+    summary: dict[str, Any] = {"type": type(values).__name__, "length": len(values)}
+    try:
+        if numpy is not None:
+            stats = _summarize_ndarray(numpy, numpy.asarray(values, dtype=numpy.float64))
+            summary.update({key: stats[key] for key in _STATS})
+        elif len(values) <= _MAX_PURE_PYTHON_ELEMENTS:
+            summary.update(_pure_stats(values))
+    except (TypeError, ValueError):
+        # Not numeric past the sampled prefix
+        pass
+    return summary
+
+
+def _pure_stats(values: Any) -> dict[str, Any]:
+    """min/max/mean/norm with builtins, which loop in C over the sequence."""
+    return {
+        "min": _finite(float(min(values))),
+        "max": _finite(float(max(values))),
+        "mean": _finite(math.fsum(values) / len(values)),
+        "norm": _finite(math.hypot(*values)),
+    }
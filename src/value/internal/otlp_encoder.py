@@ -0,0 +1,347 @@
+"""Direct OTLP protobuf encoding of SDK spans, without intermediate protobuf objects."""
+
+import logging
+import struct
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional
+
+import grpc
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.sdk.util.instrumentation import InstrumentationScope
+from opentelemetry.trace import SpanContext
+
+logger = logging.getLogger(__name__)
+
+_DOUBLE = struct.Struct("<d")
+_FIXED64 = struct.Struct("<Q")
+_FIXED32 = struct.Struct("<I")
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+_UINT64_MASK = (1 << 64) - 1
+
+# SpanFlags: the SDK always records whether the parent (or link) context is remote
+_FLAGS_HAS_IS_REMOTE = 0x100
+_FLAGS_IS_REMOTE = 0x200
+
+# Encoded key/value pairs are cached while they are short strings, bools or ints;
+# the cache is reset past this size so unique values (ids, timestamps) cannot grow it
+_MAX_CACHED_VALUE = 64
+_MAX_CACHE = 4096
+
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+# Lengths and small enum/count values are nearly always below 2048
+_VARINTS = [_encode_varint(value) for value in range(2048)]
+
+
+def _varint(value: int) -> bytes:
+    return _VARINTS[value] if value < 2048 else _encode_varint(value)
+
+
+def _tag(field: int, wire_type: int) -> bytes:
+    return _encode_varint((field << 3) | wire_type)
+
+
+def _length_delimited(field_tag: bytes, body: bytes) -> bytes:
+    return field_tag + _varint(len(body)) + body
+
+
+def _string(field_tag: bytes, value: Optional[str]) -> bytes:
+    """A string field, omitted (as proto3 does) when empty."""
+    if not value:
+        return b""
+    data = value.encode()
+    return field_tag + _varint(len(data)) + data
+
+
+def _any_value(value: Any) -> bytes:
+    """Encode an AnyValue body, following the stock encoder's type precedence."""
+    if value is None:
+        return b""
+    kind = type(value)
+    if kind is str:
+        data = value.encode()
+        return b"\x0a" + _varint(len(data)) + data
+    if kind is bool:
+        return b"\x10\x01" if value else b"\x10\x00"
+    if kind is int:
+        return b"\x18" + _int64(value)
+    if kind is float:
+        return b"\x21" + _DOUBLE.pack(value)
+    if isinstance(value, bool):
+        return b"\x10\x01" if value else b"\x10\x00"
+    if isinstance(value, str):
+        return _any_value(str(value))
+    if isinstance(value, int):
+        return b"\x18" + _int64(int(value))
+    if isinstance(value, float):
+        return b"\x21" + _DOUBLE.pack(value)
+    if isinstance(value, bytes):
+        return b"\x3a" + _varint(len(value)) + value
+    if isinstance(value, Sequence):
+        return _length_delimited(b"\x2a", b"".join(_length_delimited(b"\x0a", _any_value(item)) for item in value))
+    if isinstance(value, Mapping):
+        return _length_delimited(
+            b"\x32", b"".join(_length_delimited(b"\x0a", _key_value(str(k), v)) for k, v in value.items())
+        )
+    raise TypeError(f"Invalid type {type(value)} of value {value}")
+
+
+def _int64(value: int) -> bytes:
+    if not _INT64_MIN <= value <= _INT64_MAX:
+        raise ValueError(f"Value out of range: {value}")
+    return _varint(value & _UINT64_MASK) if value >= 0 else _encode_varint(value & _UINT64_MASK)
+
+
+def _key_value(key: str, value: Any) -> bytes:
+    return _string(b"\x0a", key) + _length_delimited(b"\x12", _any_value(value))
+
+
+class OTLPSpanEncoder:
+    """
+    Serializes SDK spans straight into ExportTraceServiceRequest bytes.
+
+    The output is byte-for-byte what encode_spans(spans).SerializeToString()
+    produces, but no protobuf objects are created: each span is joined once from
+    its byte fragments, and the spans of a scope are then wrapped in length
+    prefixes summed from their sizes and joined once into the request. The resource and instrumentation
+    scope blocks are encoded once per resource and scope, and the encoded form
+    of attribute key/value pairs with short values is cached, so the uniform
+    attributes of value.action spans cost a dict lookup each. The caches only
+    hold immutable bytes, so one encoder can be shared by exporting threads.
+    """
+
+    def __init__(self):
+        """Initialize the encoder with empty caches."""
+        self._resources: dict[Resource, bytes] = {}
+        self._scopes: dict[Optional[InstrumentationScope], bytes] = {}
+        self._attributes: dict[tuple[str, type, Any], bytes] = {}
+
+    def encode(self, spans: Sequence[ReadableSpan]) -> bytes:
+        """Return the serialized ExportTraceServiceRequest for spans."""
+        # resource -> scope -> [fragments, size]; dicts keep the first-seen order like the stock encoder
+        groups: dict[Resource, dict[Optional[InstrumentationScope], list]] = {}
+        for span in spans:
+            scopes = groups.get(span.resource)
+            if scopes is None:
+                scopes = groups[span.resource] = {}
+            scope = span.instrumentation_scope or None
+            group = scopes.get(scope)
+            if group is None:
+                group = scopes[scope] = [[], 0]
+            group[1] += self._encode_span(span, group[0])
+
+        parts: list[bytes] = []
+        for resource, scopes in groups.items():
+            resource_index = len(parts)
+            parts.append(b"")
+            resource_block = self._resource_block(resource)
+            parts.append(resource_block)
+            resource_size = len(resource_block)
+            for scope, (fragments, size) in scopes.items():
+                scope_block = self._scope_block(scope)
+                scope_size = len(scope_block) + size
+                schema = _string(b"\x1a", scope.schema_url if scope else None)
+                scope_size += len(schema)
+                prefix = b"\x12" + _varint(scope_size)
+                parts.append(prefix)
+                parts.append(scope_block)
+                parts.extend(fragments)
+                if schema:
+                    parts.append(schema)
+                resource_size += len(prefix) + scope_size
+            schema = _string(b"\x1a", resource.schema_url)
+            if schema:
+                parts.append(schema)
+                resource_size += len(schema)
+            parts[resource_index] = b"\x0a" + _varint(resource_size)
+        return b"".join(parts)
+
+    def _resource_block(self, resource: Resource) -> bytes:
+        block = self._resources.get(resource)
+        if block is None:
+            # Clients sharing a pipeline each have their own resource
+            if len(self._resources) >= _MAX_CACHE:
+                self._resources.clear()
+            block = self._resources[resource] = _length_delimited(
+                b"\x0a", b"".join(self._attribute_fields(b"\x0a", resource.attributes))
+            )
+        return block
+
+    def _scope_block(self, scope: Optional[InstrumentationScope]) -> bytes:
+        block = self._scopes.get(scope)
+        if block is None:
+            body = b""
+            if scope is not None:
+                body = (
+                    _string(b"\x0a", scope.name)
+                    + _string(b"\x12", scope.version)
+                    + b"".join(self._attribute_fields(b"\x1a", scope.attributes))
+                )
+            block = self._scopes[scope] = _length_delimited(b"\x0a", body)
+        return block
+
+    def _attribute_fields(self, field_tag: bytes, attributes: Any) -> list[bytes]:
+        """Return the repeated KeyValue fields of an attribute mapping."""
+        if not attributes:
+            return []
+        fields = []
+        cache = self._attributes
+        for key, value in attributes.items():
+            kind = type(value)
+            cacheable = kind is bool or kind is int or (kind is str and len(value) <= _MAX_CACHED_VALUE)
+            if cacheable:
+                encoded = cache.get((key, kind, value))
+                if encoded is not None:
+                    fields.append(field_tag)
+                    fields.append(encoded)
+                    continue
+            try:
+                key_value = _key_value(key, value)
+            except Exception as error:  # noqa: BLE001 - skipped and logged, as the stock encoder does
+                logger.exception("Failed to encode key %s: %s", key, error)
+                continue
+            encoded = _varint(len(key_value)) + key_value
+            if cacheable:
+                if len(cache) >= _MAX_CACHE:
+                    cache.clear()
+                cache[(key, kind, value)] = encoded
+            fields.append(field_tag)
+            fields.append(encoded)
+        return fields
+
+    def _encode_span(self, span: ReadableSpan, out: list[bytes]) -> int:
+        """Append the length-prefixed Span field to out and return its size."""
+        context = span.context
+        parent = span.parent
+        head = [
+            b"\x0a\x10",
+            context.trace_id.to_bytes(16, "big"),
+            b"\x12\x08",
+            context.span_id.to_bytes(8, "big"),
+        ]
+        if context.trace_state:
+            head.append(_string(b"\x1a", ",".join(f"{key}={value}" for key, value in context.trace_state.items())))
+        if parent is not None:
+            head.append(b"\x22\x08")
+            head.append(parent.span_id.to_bytes(8, "big"))
+        head.append(_string(b"\x2a", span.name))
+        head.append(b"\x30" + _varint(span.kind.value + 1))
+        if span.start_time:
+            head.append(b"\x39" + _FIXED64.pack(span.start_time))
+        if span.end_time:
+            head.append(b"\x41" + _FIXED64.pack(span.end_time))
+        body = head
+        body.extend(self._attribute_fields(b"\x4a", span.attributes))
+        if span.dropped_attributes:
+            body.append(b"\x50" + _varint(span.dropped_attributes))
+        for event in span.events:
+            body.append(_length_delimited(b"\x5a", self._event(event)))
+        if span.dropped_events:
+            body.append(b"\x60" + _varint(span.dropped_events))
+        for link in span.links:
+            body.append(_length_delimited(b"\x6a", self._link(link)))
+        if span.dropped_links:
+            body.append(b"\x70" + _varint(span.dropped_links))
+        status = span.status
+        if status is not None:
+            code = status.status_code.value
+            body.append(
+                _length_delimited(
+                    b"\x7a", _string(b"\x12", status.description) + (b"\x18" + _varint(code) if code else b"")
+                )
+            )
+        body.append(b"\x85\x01" + _FIXED32.pack(_flags(parent)))
+
+        encoded = b"".join(body)
+        encoded = b"\x12" + _varint(len(encoded)) + encoded
+        out.append(encoded)
+        return len(encoded)
+
+    def _event(self, event: Any) -> bytes:
+        return b"".join(
+            [
+                b"\x09" + _FIXED64.pack(event.timestamp) if event.timestamp else b"",
+                _string(b"\x12", event.name),
+                *self._attribute_fields(b"\x1a", event.attributes),
+                b"\x20" + _varint(event.dropped_attributes) if event.dropped_attributes else b"",
+            ]
+        )
+
+    def _link(self, link: Any) -> bytes:
+        return b"".join(
+            [
+                b"\x0a\x10",
+                link.context.trace_id.to_bytes(16, "big"),
+                b"\x12\x08",
+                link.context.span_id.to_bytes(8, "big"),
+                *self._attribute_fields(b"\x22", link.attributes),
+                b"\x28" + _varint(link.dropped_attributes) if link.dropped_attributes else b"",
+                b"\x35" + _FIXED32.pack(_flags(link.context)),
+            ]
+        )
+
+
+def _flags(context: Optional[SpanContext]) -> int:
+    if context is not None and context.is_remote:
+        return _FLAGS_HAS_IS_REMOTE | _FLAGS_IS_REMOTE
+    return _FLAGS_HAS_IS_REMOTE
+
+
+class DirectOTLPSpanExporter(SpanExporter):
+    """
+    OTLP/gRPC span exporter sending requests serialized by OTLPSpanEncoder.
+
+    The request bytes go to the collector through a raw unary call, skipping
+    protobuf object construction on both the encode and the gRPC serialize step.
+    Each export is one attempt bounded by timeout; retries and backoff are left to
+    the ResilientSpanExporter wrapping it.
+    """
+
+    def __init__(self, endpoint: str, timeout: float = 10.0, compression: bool = False):
+        """
+        Initialize the exporter.
+
+        Args:
+            endpoint: OTLP endpoint as host:port or URL (https:// uses TLS)
+            timeout: Seconds allowed for one export call
+            compression: Gzip-compress requests
+        """
+        # ship reads span files, whose exporter uses the encoder
+        from .ship import open_channel, raw_export_call
+
+        self._channel = open_channel(endpoint, compression=compression)
+        self._export = raw_export_call(self._channel)
+        self._timeout = timeout
+        self._encoder = OTLPSpanEncoder()
+        self._shutdown = False
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Encode and send one batch."""
+        if self._shutdown:
+            return SpanExportResult.FAILURE
+        try:
+            self._export(self._encoder.encode(spans), timeout=self._timeout)
+        except grpc.RpcError as error:
+            logger.warning("Failed to export %d spans: %s", len(spans), error)
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        """Close the channel."""
+        self._shutdown = True
+        self._channel.close()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Nothing is buffered."""
+        return True
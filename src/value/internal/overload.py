@@ -0,0 +1,389 @@
+"""Adaptive degradation of telemetry detail when the export pipeline or the process is overloaded."""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from opentelemetry import metrics, trace
+from opentelemetry.context import Context
+from opentelemetry.metrics import CallbackOptions, Observation
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+from .filtering import compile_patterns, transform_span_attributes
+from .shutdown import ExportStats
+
+logger = logging.getLogger(__name__)
+
+# Degradation levels; each one also applies the ones below it
+NORMAL = 0
+DROP_PAYLOADS = 1
+SAMPLE_INSTRUMENTATION = 2
+ROLLUP_ACTIONS = 3
+ESSENTIAL_ONLY = 4
+LEVEL_NAMES = ("normal", "drop_payloads", "sample_instrumentation", "rollup_actions", "essential_only")
+
+# Action kwargs left out of action spans from DROP_PAYLOADS on
+PAYLOAD_KWARGS = frozenset({"value.action.llm.prompt", "value.action.llm.response"})
+# Span attributes removed at export from DROP_PAYLOADS on (auto-instrumented LLM spans carry their own)
+PAYLOAD_ATTRIBUTES = ("value.action.llm.prompt", "value.action.llm.response", "gen_ai.prompt*", "gen_ai.completion*")
+# Actions carrying token counts feed billing and are always kept
+BILLING_ATTRIBUTES = frozenset(
+    {"value.action.llm.input_tokens", "value.action.llm.output_tokens", "value.action.llm.total_tokens"}
+)
+
+# Trace IDs are sampled on their low 64 bits, as TraceIdRatioBased does
+_TRACE_ID_MASK = (1 << 64) - 1
+# Attribute decisions are cached per key; the cache resets past this size
+_MAX_CACHE = 4096
+
+
+@dataclass(frozen=True)
+class OverloadSignals:
+    """
+    One sample of the load signals.
+
+    Attributes:
+        queue_fill: Spans waiting for export, as a fraction of the queue capacity
+        drop_rate: Fraction of the spans ended since the last sample that were dropped or failed to export
+        export_latency: Average seconds per export call
+        cpu: Process CPU seconds per wall second since the last sample, divided by the number of
+            CPUs available to the process (1.0 is every available core busy)
+    """
+
+    queue_fill: float = 0.0
+    drop_rate: float = 0.0
+    export_latency: float = 0.0
+    cpu: float = 0.0
+
+
+@dataclass(frozen=True)
+class OverloadThresholds:
+    """
+    Signal levels at which the pipeline counts as overloaded (0 ignores a signal).
+
+    Attributes:
+        queue_fill: Queue fill fraction
+        drop_rate: Dropped or failed fraction of ended spans
+        export_latency: Seconds per export call
+        cpu: Fraction of the available CPUs used by the process
+        recover_ratio: Fraction of the thresholds every signal must stay under before detail is restored
+    """
+
+    queue_fill: float = 0.7
+    drop_rate: float = 0.01
+    export_latency: float = 1.0
+    cpu: float = 0.9
+    recover_ratio: float = 0.5
+
+    def pressure(self, signals: OverloadSignals) -> float:
+        """Return the highest signal relative to its threshold (1.0 and above is overloaded)."""
+        return max(
+            (
+                value / threshold
+                for value, threshold in (
+                    (signals.queue_fill, self.queue_fill),
+                    (signals.drop_rate, self.drop_rate),
+                    (signals.export_latency, self.export_latency),
+                    (signals.cpu, self.cpu),
+                )
+                if threshold > 0
+            ),
+            default=0.0,
+        )
+
+
+def _available_cpus() -> int:
+    """Return the number of CPUs the process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(len(os.sched_getaffinity(0)), 1)
+    return os.cpu_count() or 1
+
+
+class OverloadController:
+    """
+    Steps telemetry through degradation levels as load rises and falls.
+
+    Every interval the controller samples queue fill, drop rate and export
+    latency from the pipeline's ExportStats, and process CPU. While any signal is
+    at or above its threshold, it raises the level by one per tick: drop LLM
+    prompt/response payloads, then sample auto-instrumented spans, then roll
+    actions up into counts, then keep only error and billing actions. Detail is
+    restored one level at a time, and only after every signal stayed under
+    recover_ratio of its threshold for recover_ticks ticks in a row, so the level
+    does not flap around a threshold. Readers check `level`, a plain int, so
+    the hot path pays one attribute load. The level is exported as the
+    value.telemetry.degradation_level gauge.
+    """
+
+    def __init__(
+        self,
+        stats: ExportStats,
+        queue_capacity: int,
+        thresholds: Optional[OverloadThresholds] = None,
+        interval: float = 1.0,
+        max_level: int = ESSENTIAL_ONLY,
+        recover_ticks: int = 5,
+        keep_actions: Sequence[str] = (),
+        meter_provider: Optional[metrics.MeterProvider] = None,
+    ):
+        """
+        Initialize the controller (call start() to begin sampling).
+
+        Args:
+            stats: Stats of the export pipeline being watched
+            queue_capacity: Spans the export queues hold before dropping
+            thresholds: Signal thresholds (defaults to OverloadThresholds())
+            interval: Seconds between samples
+            max_level: Highest degradation level the controller may reach
+            recover_ticks: Calm ticks in a row before the level is lowered by one
+            keep_actions: Action name globs always kept, like error and billing actions
+            meter_provider: Provider of the level gauge (defaults to the global one)
+        """
+        self.level = NORMAL
+        self.rolled_up = 0
+        self.shed = 0
+        self._stats = stats
+        self._queue_capacity = max(queue_capacity, 1)
+        self._thresholds = thresholds or OverloadThresholds()
+        self._interval = interval
+        self._max_level = min(max(max_level, NORMAL), ESSENTIAL_ONLY)
+        self._recover_ticks = recover_ticks
+        self._keep_actions = compile_patterns(keep_actions)
+        self._calm_ticks = 0
+        self._callbacks: list[Callable[[], None]] = []
+        self._cpus = _available_cpus()
+        self._last = (time.monotonic(), time.process_time(), stats.ended, stats.failed)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        meter = metrics.get_meter(__name__, meter_provider=meter_provider)
+        meter.create_observable_gauge(
+            "value.telemetry.degradation_level",
+            callbacks=[self._observe],
+            description="Telemetry degradation level (0 normal, 4 only error and billing actions)",
+        )
+
+    def _observe(self, options: CallbackOptions) -> Iterable[Observation]:
+        yield Observation(self.level)
+
+    def add_tick_callback(self, callback: Callable[[], None]) -> None:
+        """Run callback after every tick (and once more on stop), e.g. to flush action rollups."""
+        self._callbacks.append(callback)
+
+    def keeps(self, action_name: str, attributes: Mapping[str, Any]) -> bool:
+        """Return True for actions kept at every level: errors, billing actions and keep_actions."""
+        if attributes.get("value.action.status") == "error" or attributes.get("value.action.error"):
+            return True
+        if not BILLING_ATTRIBUTES.isdisjoint(attributes):
+            return True
+        return self._keep_actions is not None and self._keep_actions.match(action_name) is not None
+
+    def sample(self) -> OverloadSignals:
+        """Measure the signals since the previous sample."""
+        now, cpu, ended, failed = time.monotonic(), time.process_time(), self._stats.ended, self._stats.failed
+        last_now, last_cpu, last_ended, last_failed = self._last
+        self._last = (now, cpu, ended, failed)
+        return OverloadSignals(
+            queue_fill=self._stats.in_flight / self._queue_capacity,
+            drop_rate=min((failed - last_failed) / max(ended - last_ended, 1), 1.0),
+            export_latency=self._stats.export_latency,
+            cpu=(cpu - last_cpu) / max(now - last_now, 1e-6) / self._cpus,
+        )
+
+    def evaluate(self, signals: OverloadSignals) -> int:
+        """
+        Apply one sample of the signals and return the resulting level.
+
+        Returns:
+            The degradation level in effect after this sample
+        """
+        pressure = self._thresholds.pressure(signals)
+        level = self.level
+        if pressure >= 1.0:
+            self._calm_ticks = 0
+            level = min(level + 1, self._max_level)
+        elif pressure < self._thresholds.recover_ratio:
+            self._calm_ticks += 1
+            if self._calm_ticks >= self._recover_ticks and level > NORMAL:
+                self._calm_ticks = 0
+                level -= 1
+        else:
+            # Between the recovery and overload thresholds the level holds
+            self._calm_ticks = 0
+        if level != self.level:
+            log = logger.warning if level > self.level else logger.info
+            log("Telemetry degradation level %s (%s): %s", level, LEVEL_NAMES[level], signals)
+            self.level = level
+        return level
+
+    def tick(self) -> int:
+        """Sample the signals, update the level and run the tick callbacks."""
+        level = self.evaluate(self.sample())
+        self._run_callbacks()
+        return level
+
+    def _run_callbacks(self) -> None:
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Overload tick callback failed")
+
+    def start(self) -> "OverloadController":
+        self._thread = threading.Thread(target=self._run, name="value-overload", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.tick()
+
+    def stop(self) -> None:
+        """Stop sampling and run the tick callbacks a last time."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._run_callbacks()
+
+
+class ActionRollup:
+    """
+    Per-name action counts exported as one value.action.rollup span per tick.
+
+    Used from ROLLUP_ACTIONS on: an action that would have been a span costs a
+    dict increment, and its name and count still reach the backend.
+    """
+
+    def __init__(self, tracer: trace.Tracer):
+        """
+        Initialize the rollup.
+
+        Args:
+            tracer: Tracer creating the rollup spans
+        """
+        self._tracer = tracer
+        self._lock = threading.Lock()
+        self._counts: dict[str, int] = {}
+        self._started = 0
+
+    def add(self, action_name: str) -> None:
+        """Count one action."""
+        with self._lock:
+            if not self._counts:
+                self._started = time.time_ns()
+            self._counts[action_name] = self._counts.get(action_name, 0) + 1
+
+    def flush(self) -> None:
+        """Export the counts gathered since the last flush, if any."""
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            started = self._started
+        if not counts:
+            return
+        attributes = {
+            "value.action.rollup.counts": json.dumps(counts),
+            "value.action.rollup.total": sum(counts.values()),
+        }
+        self._tracer.start_span("value.action.rollup", attributes=attributes, start_time=started).end()
+
+
+class OverloadSpanProcessor(SpanProcessor):
+    """
+    Span processor applying the controller's degradation level to ended spans ahead of export.
+
+    From DROP_PAYLOADS on, payload attributes are removed; from
+    SAMPLE_INSTRUMENTATION on, only instrumentation_ratio of the traces keep
+    their auto-instrumented spans; at ESSENTIAL_ONLY, auto-instrumented spans
+    are only kept when they record an error. Shed spans never reach the export
+    queue, so they neither add to its load nor count as lost.
+    """
+
+    def __init__(
+        self,
+        delegate: SpanProcessor,
+        controller: OverloadController,
+        instrumentation_scopes: Sequence[str] = ("opentelemetry.instrumentation.*",),
+        instrumentation_ratio: float = 0.1,
+        payload_attributes: Sequence[str] = PAYLOAD_ATTRIBUTES,
+        on_drop: Optional[Callable[[Sequence[ReadableSpan]], None]] = None,
+    ):
+        """
+        Initialize the processor.
+
+        Args:
+            delegate: The export processor receiving the remaining spans
+            controller: Controller whose level is applied
+            instrumentation_scopes: Instrumentation scope globs of auto-instrumented spans
+            instrumentation_ratio: Fraction of traces keeping auto-instrumented spans while sampled
+            payload_attributes: Attribute key globs removed while payloads are dropped
+            on_drop: Called with shed spans, e.g. to fail their delivery receipts
+        """
+        self._delegate = delegate
+        self._on_drop = on_drop
+        self._controller = controller
+        self._scopes = compile_patterns(instrumentation_scopes)
+        self._bound = int(instrumentation_ratio * (_TRACE_ID_MASK + 1))
+        self._payloads = compile_patterns(payload_attributes)
+        self._scope_decisions: dict[str, bool] = {}
+        self._payload_decisions: dict[str, bool] = {}
+
+    def on_start(self, span: ReadableSpan, parent_context: Optional[Context] = None) -> None:
+        """Pass span starts through to the delegate."""
+        self._delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Shed or trim the span according to the current level and forward what remains."""
+        level = self._controller.level
+        if level >= SAMPLE_INSTRUMENTATION and self._is_instrumentation(span):
+            if level >= ESSENTIAL_ONLY:
+                shed = span.status.status_code is not StatusCode.ERROR
+            else:
+                shed = span.context.trace_id & _TRACE_ID_MASK >= self._bound
+            if shed:
+                if self._on_drop is not None:
+                    self._on_drop((span,))
+                return
+        if level >= DROP_PAYLOADS and self._payloads is not None:
+            span = transform_span_attributes(span, self._strip_payloads)
+        self._delegate.on_end(span)
+
+    def _is_instrumentation(self, span: ReadableSpan) -> bool:
+        scope_name = span.instrumentation_scope.name if span.instrumentation_scope else ""
+        decision = self._scope_decisions.get(scope_name)
+        if decision is None:
+            decision = self._scopes is not None and self._scopes.match(scope_name) is not None
+            if len(self._scope_decisions) >= _MAX_CACHE:
+                self._scope_decisions.clear()
+            self._scope_decisions[scope_name] = decision
+        return decision
+
+    def _strip_payloads(self, attributes: Any) -> Any:
+        if not attributes:
+            return attributes
+        stripped: Optional[dict[str, Any]] = None
+        for key in attributes:
+            decision = self._payload_decisions.get(key)
+            if decision is None:
+                decision = self._payloads.match(key) is not None
+                if len(self._payload_decisions) >= _MAX_CACHE:
+                    self._payload_decisions.clear()
+                self._payload_decisions[key] = decision
+            if decision:
+                if stripped is None:
+                    stripped = dict(attributes)
+                del stripped[key]
+        return attributes if stripped is None else stripped
+
+    def shutdown(self) -> None:
+        """Shut down the delegate."""
+        self._delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Force flush the delegate."""
+        return self._delegate.force_flush(timeout_millis)
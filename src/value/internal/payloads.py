@@ -0,0 +1,266 @@
+"""Offloading of large LLM payloads from span attributes to a compressed, deduplicated blob sink."""
+
+import gzip
+import hashlib
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+
+from .filtering import compile_patterns, transform_span_attributes
+
+# Prompt messages whose role attribute is "system" are deduplicated whatever their size
+_PROMPT_CONTENT = re.compile(r"^(gen_ai\.prompt\.\d+)\.content$")
+# Digests of deduplicated values, keyed by a (length, hash) fingerprint of the value rather than the
+# value itself, so the cache does not keep large payloads alive (str hashes are cached, sha256 is not)
+_MAX_DIGESTS = 1024
+# Digests already handed to the sink
+_MAX_SEEN = 100000
+
+
+class FileBlobSink:
+    """
+    Low-priority writer of payload bodies to gzip files named by their sha256.
+
+    Bodies are queued and written by a background thread, after the span that
+    referenced them has moved on. A body whose digest was already submitted in
+    this process, or whose file already exists, is not written again. The queue
+    is bounded in bytes; bodies submitted past the bound are dropped (and may be
+    submitted again later), so the sink never holds up span export.
+    """
+
+    def __init__(self, directory: str, max_queue_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the sink; the writer thread starts with the first body.
+
+        Args:
+            directory: Directory receiving the <sha256>.gz files (created if missing)
+            max_queue_bytes: Bytes of bodies waiting to be written
+        """
+        self._directory = directory
+        self._max_queue_bytes = max_queue_bytes
+        self._queue: queue.Queue[Optional[tuple[str, bytes]]] = queue.Queue()
+        self._queued_bytes = 0
+        self._seen: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._shutdown = False
+        self.written = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        """Return the file holding the body with the given sha256 hex digest."""
+        return os.path.join(self._directory, f"{digest}.gz")
+
+    def submit(self, digest: str, body: bytes) -> bool:
+        """
+        Queue a body for writing unless its digest was already submitted.
+
+        Returns:
+            True if the body was queued
+        """
+        with self._lock:
+            if digest in self._seen:
+                self._seen.move_to_end(digest)
+                self.deduplicated += 1
+                return False
+            if self._shutdown or self._queued_bytes + len(body) > self._max_queue_bytes:
+                self.dropped += 1
+                return False
+            self._seen[digest] = None
+            if len(self._seen) > _MAX_SEEN:
+                self._seen.popitem(last=False)
+            self._queued_bytes += len(body)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="value-blob-sink", daemon=True)
+                self._writer.start()
+        self._queue.put((digest, body))
+        return True
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                digest, body = item
+                self._write(digest, body)
+                with self._lock:
+                    self._queued_bytes -= len(body)
+            finally:
+                self._queue.task_done()
+            # Hand the GIL back between blobs so compression does not delay application threads
+            time.sleep(0)
+
+    def _write(self, digest: str, body: bytes) -> None:
+        path = self.path(digest)
+        if os.path.exists(path):
+            with self._lock:
+                self.deduplicated += 1
+            return
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                file.write(gzip.compress(body, compresslevel=6))
+            os.replace(temporary, path)
+            with self._lock:
+                self.written += 1
+        except OSError:
+            with self._lock:
+                self.dropped += 1
+                self._seen.pop(digest, None)
+
+    def flush(self) -> None:
+        """Block until every queued body is written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Write the queued bodies and stop the writer thread (idempotent)."""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout=timeout)
+
+
+class PayloadOffloader:
+    """
+    Replaces large and repeated string attributes with a preview, size and content hash.
+
+    An offloaded attribute keeps its key with the first preview_chars characters
+    as value, and gains <key>.size (UTF-8 bytes) and <key>.sha256 attributes; the
+    full body goes to the blob sink. Values larger than max_inline_bytes are
+    offloaded, as are values longer than the preview for keys matching
+    dedupe_attributes and system prompt messages (gen_ai.prompt.N.content with a
+    gen_ai.prompt.N.role of "system"), whose bodies the sink then writes once per
+    process instead of once per call.
+    """
+
+    def __init__(
+        self,
+        max_inline_bytes: int = 8192,
+        preview_chars: int = 256,
+        dedupe_attributes: Sequence[str] = (),
+        sink: Optional[FileBlobSink] = None,
+    ):
+        """
+        Initialize the offloader.
+
+        Args:
+            max_inline_bytes: Largest string value, in UTF-8 bytes, exported inline
+            preview_chars: Characters of an offloaded value kept on the span
+            dedupe_attributes: Attribute key patterns (fnmatch) always offloaded by hash
+            sink: Sink receiving the full bodies (None keeps only the hash)
+        """
+        self._max_inline_bytes = max_inline_bytes
+        self._preview_chars = preview_chars
+        self._dedupe = compile_patterns(dedupe_attributes)
+        self._dedupe_decisions: dict[str, bool] = {}
+        self._digests: dict[tuple[int, int], tuple[int, str]] = {}
+        self.sink = sink
+
+    def offload_attributes(self, attributes: Any) -> Any:
+        """
+        Offload the large and repeated values of an attribute mapping.
+
+        Returns:
+            The original mapping when nothing was offloaded, otherwise a new dict
+        """
+        if not attributes:
+            return attributes
+        offloaded: Optional[dict[str, Any]] = None
+        for key, value in attributes.items():
+            if not isinstance(value, str) or len(value) <= self._preview_chars:
+                continue
+            dedupe = self._should_dedupe(key, attributes)
+            body = None
+            if not dedupe:
+                # A str takes at least one byte per character and at most four
+                if len(value) <= self._max_inline_bytes // 4:
+                    continue
+                body = value.encode()
+                if len(body) <= self._max_inline_bytes:
+                    continue
+            if offloaded is None:
+                offloaded = dict(attributes)
+            size, digest = self._offload(value, body, dedupe)
+            offloaded[key] = value[: self._preview_chars]
+            offloaded[f"{key}.size"] = size
+            offloaded[f"{key}.sha256"] = digest
+        return attributes if offloaded is None else offloaded
+
+    def _should_dedupe(self, key: str, attributes: Any) -> bool:
+        decision = self._dedupe_decisions.get(key)
+        if decision is None:
+            decision = self._dedupe is not None and self._dedupe.match(key) is not None
+            if len(self._dedupe_decisions) >= _MAX_DIGESTS:
+                self._dedupe_decisions.clear()
+            self._dedupe_decisions[key] = decision
+        if decision:
+            return True
+        match = _PROMPT_CONTENT.match(key) if key.startswith("gen_ai.prompt.") else None
+        return match is not None and attributes.get(f"{match.group(1)}.role") == "system"
+
+    def _offload(self, value: str, body: Optional[bytes], dedupe: bool) -> tuple[int, str]:
+        fingerprint = (len(value), hash(value))
+        if dedupe:
+            cached = self._digests.get(fingerprint)
+            if cached is not None:
+                # Already submitted
+                return cached
+        if body is None:
+            body = value.encode()
+        digest = hashlib.sha256(body).hexdigest()
+        if dedupe:
+            if len(self._digests) >= _MAX_DIGESTS:
+                self._digests.clear()
+            self._digests[fingerprint] = (len(body), digest)
+        if self.sink is not None:
+            self.sink.submit(digest, body)
+        return len(body), digest
+
+
+class PayloadSpanProcessor(SpanProcessor):
+    """Span processor offloading large payloads from span and event attributes before export."""
+
+    def __init__(self, delegate: SpanProcessor, offloader: PayloadOffloader):
+        """
+        Initialize the processor.
+
+        Args:
+            delegate: The export processor receiving the trimmed spans
+            offloader: Offloader applied to span and event attributes
+        """
+        self._delegate = delegate
+        self._offloader = offloader
+
+    def on_start(self, span: ReadableSpan, parent_context: Optional[Context] = None) -> None:
+        """Pass span starts through to the delegate."""
+        self._delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Offload the span's payloads and forward it to the delegate."""
+        span = transform_span_attributes(span, self._offloader.offload_attributes)
+        self._delegate.on_end(span)
+
+    def shutdown(self) -> None:
+        """Shut down the delegate, then write the queued payload bodies."""
+        self._delegate.shutdown()
+        if self._offloader.sink is not None:
+            self._offloader.sink.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Force flush the delegate."""
+        return self._delegate.force_flush(timeout_millis)
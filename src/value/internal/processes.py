@@ -0,0 +1,16 @@
+"""Process helpers shared by the exporters that coordinate with other processes."""
+
+import os
+
+
+def pid_running(pid: int) -> bool:
+    """Return True if a process with the given PID exists (0 never does)."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,104 @@
+"""Cross-service propagation of the trace context and the action context's user IDs."""
+
+from collections.abc import Mapping, MutableMapping
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import httpx
+from opentelemetry import baggage
+from opentelemetry.baggage.propagation import W3CBaggagePropagator
+from opentelemetry.context import Context
+from opentelemetry.propagators.composite import CompositePropagator
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+from .span_processor import _user_context
+
+USER_ID_BAGGAGE_KEY = "value.user_id"
+ANONYMOUS_ID_BAGGAGE_KEY = "value.anonymous_id"
+
+# Independent of the global propagator, so user IDs only travel where inject() is called
+_PROPAGATOR = CompositePropagator([TraceContextTextMapPropagator(), W3CBaggagePropagator()])
+
+
+@dataclass(frozen=True)
+class RemoteContext:
+    """Trace context and user IDs extracted from a carrier."""
+
+    context: Context
+    user_id: Optional[str] = None
+    anonymous_id: Optional[str] = None
+
+
+def inject(carrier: MutableMapping[str, str], context: Optional[Context] = None) -> MutableMapping[str, str]:
+    """
+    Write the current trace context and action context user IDs into a carrier.
+
+    Sets the W3C traceparent header and a baggage header holding value.user_id and
+    value.anonymous_id, merged with any baggage already in the context.
+
+    Args:
+        carrier: HTTP headers, message headers or any str -> str mapping
+        context: Context to inject (defaults to the current context)
+
+    Returns:
+        The carrier, for chaining
+    """
+    attributes = _user_context.get()
+    if attributes:
+        user_id = attributes.get("value.action.user_id")
+        anonymous_id = attributes.get("value.action.anonymous_id")
+        if user_id:
+            context = baggage.set_baggage(USER_ID_BAGGAGE_KEY, user_id, context=context)
+        if anonymous_id:
+            context = baggage.set_baggage(ANONYMOUS_ID_BAGGAGE_KEY, anonymous_id, context=context)
+    _PROPAGATOR.inject(carrier, context=context)
+    return carrier
+
+
+def extract(carrier: Mapping[str, str]) -> RemoteContext:
+    """
+    Read the trace context and user IDs written by inject() from a carrier.
+
+    Args:
+        carrier: Incoming HTTP headers or message headers
+
+    Returns:
+        The remote context; pass it to the client's action_context_from() to continue it
+    """
+    context = _PROPAGATOR.extract(carrier)
+    user_id = baggage.get_baggage(USER_ID_BAGGAGE_KEY, context)
+    anonymous_id = baggage.get_baggage(ANONYMOUS_ID_BAGGAGE_KEY, context)
+    return RemoteContext(
+        context=context,
+        user_id=str(user_id) if user_id is not None else None,
+        anonymous_id=str(anonymous_id) if anonymous_id is not None else None,
+    )
+
+
+def _inject_request(request: httpx.Request) -> None:
+    inject(request.headers)
+
+
+async def _inject_request_async(request: httpx.Request) -> None:
+    inject(request.headers)
+
+
+def instrument_httpx(client: Union[httpx.Client, httpx.AsyncClient]) -> Union[httpx.Client, httpx.AsyncClient]:
+    """
+    Inject the trace and action context into every request sent by an httpx client.
+
+    Only the given client is instrumented, so user IDs are sent to your own services
+    and not to third-party APIs called through other clients.
+
+    Args:
+        client: An httpx.Client or httpx.AsyncClient
+
+    Returns:
+        The client, for chaining
+    """
+    hook = _inject_request_async if isinstance(client, httpx.AsyncClient) else _inject_request
+    hooks = client.event_hooks
+    if hook not in hooks["request"]:
+        hooks["request"] = [*hooks["request"], hook]
+        client.event_hooks = hooks
+    return client
@@ -0,0 +1,266 @@
+"""Per-user and per-key emission quotas containing hot tenants, in bounded memory."""
+
+import heapq
+import json
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from opentelemetry import trace
+
+logger = logging.getLogger(__name__)
+
+ROLLUP = "rollup"
+SAMPLE = "sample"
+
+# Keys listed by name in a report; the remainder only counts towards the total
+_REPORT_TOP_KEYS = 20
+
+
+@dataclass(frozen=True)
+class QuotaRule:
+    """
+    Token-bucket emission quota.
+
+    Attributes:
+        key: What the quota is keyed by: "user_id" (falling back to anonymous_id),
+            "anonymous_id", or the name of an action or action context attribute
+        rate: Actions per second each key may send
+        burst: Actions a key may send at once above the rate (0 uses one second of rate)
+        overflow: What happens to actions over quota: "rollup" (only counted in the
+            report) or "sample" (one in 1/sample_ratio is still sent)
+        sample_ratio: Fraction of over-quota actions sent with overflow="sample"
+        max_keys: Keys tracked with an exact bucket; the rest share a count-min sketch
+    """
+
+    key: str = "user_id"
+    rate: float = 10.0
+    burst: int = 0
+    overflow: str = ROLLUP
+    sample_ratio: float = 0.01
+    max_keys: int = 10000
+
+    def __post_init__(self):
+        if self.rate <= 0:
+            raise ValueError("Quota rate must be positive")
+        if self.overflow not in (ROLLUP, SAMPLE):
+            raise ValueError(f"Unknown quota overflow {self.overflow!r}; expected 'rollup' or 'sample'")
+
+    def key_of(
+        self,
+        user_id: Optional[str],
+        anonymous_id: Optional[str],
+        attributes: Mapping[str, Any],
+        context_attributes: Optional[Mapping[str, Any]] = None,
+    ) -> Any:
+        """Return the quota key of an action, or None when it has none."""
+        if self.key == "user_id":
+            return user_id or anonymous_id
+        if self.key == "anonymous_id":
+            return anonymous_id
+        key = attributes.get(self.key)
+        if key is None and context_attributes:
+            key = context_attributes.get(self.key)
+        return key if key is None or isinstance(key, (str, int)) else str(key)
+
+
+class CountMinSketch:
+    """
+    Approximate counts of many keys in fixed memory.
+
+    Estimates never undercount; they overcount by at most about 2 / width of the
+    total count with high probability. decay() halves every counter, so counts
+    follow the recent rate instead of growing forever.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            width: Counters per row (accuracy)
+            depth: Rows, each with its own hash (confidence)
+        """
+        self._width = width
+        self._rows = [array("L", [0]) * width for _ in range(depth)]
+
+    def add(self, key: Any, count: int = 1) -> int:
+        """Count key and return its new estimate."""
+        # Double hashing derives every row's index from one hash of the key
+        hashed = hash(key)
+        first, step = hashed & 0xFFFFFFFF, (hashed >> 32) | 1
+        estimate = None
+        for index, row in enumerate(self._rows):
+            slot = (first + index * step) % self._width
+            row[slot] += count
+            if estimate is None or row[slot] < estimate:
+                estimate = row[slot]
+        return estimate
+
+    def decay(self) -> None:
+        """Halve every counter."""
+        for row in self._rows:
+            for slot, value in enumerate(row):
+                if value:
+                    row[slot] = value >> 1
+
+
+class EmissionQuota:
+    """
+    Token-bucket quotas per key, bounded in memory however many keys there are.
+
+    Every key is counted in a count-min sketch, decayed every time a burst
+    refills. Only keys whose recent count exceeds the burst (the heavy hitters)
+    get an exact token bucket, held in an LRU of max_keys buckets, so millions
+    of quiet keys cost no memory beyond the sketch. New buckets start full, so
+    a quiet key misjudged by the sketch is not throttled; a hot key gets at
+    most one extra burst each time it is evicted from the LRU.
+
+    Actions over quota are rolled up or sampled, and counted per key and per
+    action name. The counts are exported every report_interval seconds as a
+    value.quota.report span listing the top offending keys.
+    """
+
+    def __init__(
+        self,
+        rule: QuotaRule,
+        tracer: Optional[trace.Tracer] = None,
+        report_interval: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the quota (call start() to export reports periodically).
+
+        Args:
+            rule: The quota rule
+            tracer: Tracer creating the report spans (None only keeps the counts)
+            report_interval: Seconds between reports
+            clock: Monotonic clock, injectable for tests
+        """
+        self.rule = rule
+        self._tracer = tracer
+        self._report_interval = report_interval
+        self._clock = clock
+        self._burst = rule.burst or max(int(rule.rate), 1)
+        self._window = self._burst / rule.rate
+        self._sample_every = max(round(1 / rule.sample_ratio), 1) if rule.sample_ratio > 0 else 0
+        self._lock = threading.Lock()
+        self._sketch = CountMinSketch()
+        self._decay_at = clock() + self._window
+        # key -> [tokens, last refill time, over-quota count]
+        self._buckets: OrderedDict[Any, list] = OrderedDict()
+        self._over_keys: dict[Any, int] = {}
+        self._over_actions: dict[str, int] = {}
+        self._over_total = 0
+        self._report_started = time.time_ns()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def admit(
+        self,
+        action_name: str,
+        user_id: Optional[str],
+        anonymous_id: Optional[str],
+        attributes: Mapping[str, Any],
+        context_attributes: Optional[Mapping[str, Any]] = None,
+    ) -> bool:
+        """
+        Charge one action to its key.
+
+        Args:
+            action_name: Name of the action
+            user_id: User ID of the action
+            anonymous_id: Anonymous ID of the action
+            attributes: Attributes of the action
+            context_attributes: Attributes of the enclosing action context
+
+        Returns:
+            True if the action is sent: within quota, without a key, or sampled over quota
+        """
+        key = self.rule.key_of(user_id, anonymous_id, attributes, context_attributes)
+        if key is None:
+            return True
+        with self._lock:
+            now = self._clock()
+            if now >= self._decay_at:
+                self._sketch.decay()
+                self._decay_at = now + self._window
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if self._sketch.add(key) <= self._burst:
+                    return True
+                # A heavy hitter (or a collision in the sketch): track it exactly from now on
+                if len(self._buckets) >= self.rule.max_keys:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = [float(self._burst), now, 0]
+            else:
+                self._buckets.move_to_end(key)
+            bucket[0] = min(self._burst, bucket[0] + (now - bucket[1]) * self.rule.rate)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True
+            bucket[2] += 1
+            self._over_total += 1
+            if key in self._over_keys or len(self._over_keys) < self.rule.max_keys:
+                self._over_keys[key] = self._over_keys.get(key, 0) + 1
+            self._over_actions[action_name] = self._over_actions.get(action_name, 0) + 1
+            if self.rule.overflow == ROLLUP or not self._sample_every:
+                return False
+            return (bucket[2] - 1) % self._sample_every == 0
+
+    def report(self) -> Optional[dict[str, Any]]:
+        """
+        Take the over-quota counts gathered since the last report.
+
+        Returns:
+            The total, the top keys and the per-action counts, or None when nothing was over quota
+        """
+        with self._lock:
+            if not self._over_total:
+                return None
+            keys, self._over_keys = self._over_keys, {}
+            actions, self._over_actions = self._over_actions, {}
+            total, self._over_total = self._over_total, 0
+        top = heapq.nlargest(_REPORT_TOP_KEYS, keys.items(), key=lambda item: item[1])
+        return {"total": total, "keys": {str(key): count for key, count in top}, "actions": actions}
+
+    def flush(self) -> None:
+        """Export a value.quota.report span of the counts since the last report, if any."""
+        started, self._report_started = self._report_started, time.time_ns()
+        report = self.report()
+        if report is None:
+            return
+        logger.info("%s actions over the %s quota", report["total"], self.rule.key)
+        if self._tracer is None:
+            return
+        attributes = {
+            "value.quota.key": self.rule.key,
+            "value.quota.overflow": self.rule.overflow,
+            "value.quota.over_quota.total": report["total"],
+            "value.quota.over_quota.keys": json.dumps(report["keys"]),
+            "value.quota.over_quota.actions": json.dumps(report["actions"]),
+        }
+        self._tracer.start_span("value.quota.report", attributes=attributes, start_time=started).end()
+
+    def start(self) -> "EmissionQuota":
+        self._thread = threading.Thread(target=self._run, name="value-quota-report", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._report_interval):
+            self.flush()
+
+    def stop(self) -> None:
+        """Stop reporting and export the last report."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
@@ -0,0 +1,281 @@
+"""Single-pass PII redaction of prompts and action attributes."""
+
+import re
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+
+from .filtering import compile_patterns, transform_span_attributes
+
+# Rule name -> pattern. Matches only start where their rule's trigger (below) fires.
+BUILTIN_RULES: dict[str, str] = {
+    "email": r"(?<![\w.%+-])[\w.%+-]{1,64}@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}",
+    "secret": (
+        r"(?<![\w-])(?:sk-(?:proj-|ant-)?[A-Za-z0-9_-]{20,}|AKIA[0-9A-Z]{16}|gh[pousr]_[A-Za-z0-9]{36,}"
+        r"|xox[abprs]-[A-Za-z0-9-]{10,}|AIza[0-9A-Za-z_-]{35}|eyJ[\w-]{10,}\.[\w-]{10,}\.[\w-]{10,})"
+        r"|(?<=Bearer )[\w.~+/-]{16,}=*"
+    ),
+    # 13 to 16 digits, checked with Luhn before being redacted (19-digit ns timestamps are not cards)
+    "card": r"(?<![\d-])\d(?:[ -]?\d){12,15}(?![\d-])",
+    # A leading +country code or a separator after the area code, so bare integers are not phones
+    "phone": r"(?<![\w+])(?:\+\d{1,3}[ -]?\(?\d{2,4}\)?[ -]?|\(?\d{2,4}\)?[ -])\d{3,4}[ -]?\d{3,4}(?![\w-])",
+}
+DEFAULT_RULES = tuple(BUILTIN_RULES)
+
+# Matches only start where a trigger fires. Email and digit triggers are one character
+# class followed by lookarounds, which the regex engine scans for at close to memchr speed;
+# a leading alternation would instead be tried at every position of the string. Secrets
+# have literal prefixes, found with str.find, which is faster still.
+_EMAIL_TRIGGER = ("@", r"(?<=@)")
+_DIGIT_TRIGGER = (r"+(\d", r"(?<=[+(])\d|(?<=\d)\d{1,3}\)?[ -]?\d{3}")
+_SECRET_LITERALS = (
+    "sk-",
+    "AKIA",
+    *(f"gh{kind}_" for kind in "pousr"),
+    *(f"xox{kind}-" for kind in "abprs"),
+    "AIza",
+    "eyJ",
+    "Bearer ",
+)
+_LOCAL_PART = re.compile(r"[\w.%+-]{1,64}\Z")
+# Built-in digit matches never start right after a digit, so a failed run is skipped whole
+_DIGIT_RUN = re.compile(r"[+(]?\d*")
+
+# Attributes identifying the user to the backend are never redacted
+_SKIPPED_ATTRIBUTES = ("value.action.user_id", "value.action.anonymous_id", "value.action.name")
+# Shortest value any built-in rule can match ("a@b.co"), and any secret can (AKIA + 16)
+_MIN_LENGTH = 6
+_MIN_SECRET_LENGTH = 20
+# Redaction decisions are cached per attribute key; the cache resets past this size
+_MAX_CACHE = 8192
+
+
+def _luhn(digits: str) -> bool:
+    total = 0
+    for index, char in enumerate(reversed(digits)):
+        digit = ord(char) - 48
+        if index % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def _combine(patterns: Mapping[str, str]) -> re.Pattern:
+    """Compile rules into one alternation of named groups; the matching rule is the match's lastgroup."""
+    return re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in patterns.items()))
+
+
+class Redactor:
+    """
+    Replaces PII in strings with [REDACTED:<rule>] in a single scan.
+
+    The built-in rules are precompiled into one trigger pattern (characters or
+    literals every match contains, such as "@", a digit group or a key prefix), so
+    each string is scanned once for triggers and the rule patterns only run,
+    anchored, where a trigger fired. Non-string values
+    and strings shorter than the shortest possible match are skipped without
+    scanning.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[str] = DEFAULT_RULES,
+        extra_patterns: Optional[Mapping[str, str]] = None,
+        skip_attributes: Sequence[str] = (),
+    ):
+        """
+        Compile the redaction rules.
+
+        Args:
+            rules: Names of built-in rules (email, secret, card, phone); earlier rules win on a shared trigger
+            extra_patterns: Additional rule name -> regex pattern, applied in a second scan
+            skip_attributes: Attribute key patterns (fnmatch) that are never redacted
+        """
+        unknown = [name for name in rules if name not in BUILTIN_RULES]
+        if unknown:
+            raise ValueError(f"Unknown redaction rules: {', '.join(unknown)}")
+        if not rules and not extra_patterns:
+            raise ValueError("At least one redaction rule is required")
+        for name in extra_patterns or {}:
+            if not name.isidentifier() or name in BUILTIN_RULES:
+                raise ValueError(f"Redaction rule names must be new identifiers: {name}")
+
+        self._email = _combine({"email": BUILTIN_RULES["email"]}) if "email" in rules else None
+        digit_rules = {name: BUILTIN_RULES[name] for name in rules if name in ("card", "phone")}
+        self._digits = _combine(digit_rules) if digit_rules else None
+        self._secret = _combine({"secret": BUILTIN_RULES["secret"]}) if "secret" in rules else None
+        triggers = [
+            trigger for trigger, enabled in ((_EMAIL_TRIGGER, self._email), (_DIGIT_TRIGGER, self._digits)) if enabled
+        ]
+        base = f"[{''.join(chars for chars, _ in triggers)}](?:{'|'.join(branch for _, branch in triggers)})"
+        self._trigger = re.compile(base) if triggers else None
+        # Custom patterns have no trigger, so they cost a second scan of the string
+        self._extra = _combine(extra_patterns) if extra_patterns else None
+        self._min_length = _MIN_LENGTH if not extra_patterns else 1
+        self._skip = compile_patterns((*_SKIPPED_ATTRIBUTES, *skip_attributes))
+        self._skip_decisions: dict[str, bool] = {}
+
+    @staticmethod
+    def _replacement(match: re.Match) -> Optional[str]:
+        rule = match.lastgroup
+        if rule == "card" and not _luhn(match.group().replace(" ", "").replace("-", "")):
+            return None
+        return f"[REDACTED:{rule}]"
+
+    def _replace(self, match: re.Match) -> str:
+        replacement = self._replacement(match)
+        return match.group() if replacement is None else replacement
+
+    def redact(self, text: str) -> str:
+        """Return text with every match of the rules replaced (text itself when nothing matched)."""
+        if len(text) < self._min_length:
+            return text
+        if self._secret is not None and len(text) >= _MIN_SECRET_LENGTH:
+            text = self._redact_secrets(text)
+        if self._trigger is not None:
+            text = self._redact_triggered(text)
+        if self._extra is not None:
+            redacted = self._extra.sub(self._replace, text)
+            # Matches rejected by the Luhn check still produce a copy; keep the original so callers can skip copying
+            text = text if redacted == text else redacted
+        return text
+
+    def _redact_secrets(self, text: str) -> str:
+        spans = []
+        for literal in _SECRET_LITERALS:
+            position = text.find(literal)
+            while position != -1:
+                start = position + len(literal) if literal == "Bearer " else position
+                match = self._secret.match(text, start)
+                if match is not None:
+                    spans.append((match.start(), match.end()))
+                position = text.find(literal, match.end() if match is not None else position + 1)
+        if not spans:
+            return text
+        pieces = []
+        last = 0
+        for start, end in sorted(spans):
+            if start >= last:
+                pieces.append(text[last:start])
+                pieces.append("[REDACTED:secret]")
+                last = end
+        pieces.append(text[last:])
+        return "".join(pieces)
+
+    def _redact_triggered(self, text: str) -> str:
+        pieces: Optional[list[str]] = None
+        last = 0  # end of the last redaction; later matches never start before it
+        position = 0
+        search = self._trigger.search
+        while True:
+            trigger = search(text, position)
+            if trigger is None:
+                break
+            start = trigger.start()
+            char = text[start]
+            if char == "@":
+                position = start + 1
+                local = _LOCAL_PART.search(text, max(start - 64, last), start)
+                match = self._email.match(text, local.start()) if local is not None else None
+            else:
+                match = self._digits.match(text, start)
+                position = match.end() if match is not None else _DIGIT_RUN.match(text, start).end()
+            if match is None:
+                continue
+            replacement = self._replacement(match)
+            if replacement is None:
+                continue
+            if pieces is None:
+                pieces = []
+            pieces.append(text[last : match.start()])
+            pieces.append(replacement)
+            last = position = match.end()
+        if pieces is None:
+            return text
+        pieces.append(text[last:])
+        return "".join(pieces)
+
+    def redact_value(self, value: Any) -> Any:
+        """Redact a string or a sequence of strings; other values are returned as-is."""
+        if type(value) is str:
+            return self.redact(value)
+        if isinstance(value, (list, tuple)) and value and type(value[0]) is str:
+            redacted = [self.redact(item) if type(item) is str else item for item in value]
+            return value if all(new is old for new, old in zip(redacted, value)) else type(value)(redacted)
+        return value
+
+    def redact_attributes(self, attributes: Any) -> Any:
+        """
+        Redact the values of an attribute mapping.
+
+        Returns:
+            The original mapping when nothing was redacted, otherwise a new dict
+        """
+        if not attributes:
+            return attributes
+        redacted: Optional[dict[str, Any]] = None
+        for key, value in attributes.items():
+            if type(value) in (int, float, bool) or self._skipped(key):
+                continue
+            new = self.redact_value(value)
+            if new is not value:
+                if redacted is None:
+                    redacted = dict(attributes)
+                redacted[key] = new
+        return attributes if redacted is None else redacted
+
+    def _skipped(self, key: str) -> bool:
+        decision = self._skip_decisions.get(key)
+        if decision is None:
+            decision = self._skip.match(key) is not None
+            if len(self._skip_decisions) >= _MAX_CACHE:
+                self._skip_decisions.clear()
+            self._skip_decisions[key] = decision
+        return decision
+
+
+class RedactionSpanProcessor(SpanProcessor):
+    """
+    Span processor redacting span and event attributes before export.
+
+    Actions sent through the ActionEmitter are redacted when they are built, so
+    value.action spans and events are passed through without a second scan.
+    """
+
+    def __init__(self, delegate: SpanProcessor, redactor: Redactor):
+        """
+        Initialize the processor.
+
+        Args:
+            delegate: The export processor receiving the redacted spans
+            redactor: Redactor applied to span and event attributes
+        """
+        self._delegate = delegate
+        self._redactor = redactor
+
+    def on_start(self, span: ReadableSpan, parent_context: Optional[Context] = None) -> None:
+        """Pass span starts through to the delegate."""
+        self._delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Redact the span and forward it to the delegate."""
+        if not span.name.startswith("value.action"):
+            span = transform_span_attributes(span, self._redact_unless_action)
+        self._delegate.on_end(span)
+
+    def _redact_unless_action(self, attributes: Any) -> Any:
+        if attributes and "value.action.name" in attributes:
+            return attributes
+        return self._redactor.redact_attributes(attributes)
+
+    def shutdown(self) -> None:
+        """Shut down the delegate."""
+        self._delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Force flush the delegate."""
+        return self._delegate.force_flush(timeout_millis)
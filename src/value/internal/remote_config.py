@@ -0,0 +1,232 @@
+"""Runtime telemetry settings pushed by the control plane and applied without a redeploy."""
+
+import logging
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, fields
+from typing import Any, Optional
+
+import httpx
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace.sampling import Decision, Sampler, SamplingResult
+from opentelemetry.trace import Link, SpanKind, get_current_span
+from opentelemetry.trace.span import TraceState
+from opentelemetry.util.types import Attributes
+
+from ._api import SyncValueControlPlaneAPI
+
+logger = logging.getLogger(__name__)
+
+# Trace IDs are sampled on their low 64 bits, as TraceIdRatioBased does
+_TRACE_ID_MASK = (1 << 64) - 1
+# Least seconds between two long polls, however quickly the server answers
+_MIN_POLL_DELAY = 1.0
+
+
+@dataclass(frozen=True)
+class RuntimeSettings:
+    """
+    Telemetry settings that can change while the process runs.
+
+    Attributes:
+        enabled: Global kill switch; when False no spans are recorded or exported
+        sample_ratio: Fraction of new traces recorded (child spans follow their parent)
+        disabled_actions: Action names that are not recorded
+        max_attribute_length: Characters kept per action attribute string (0 keeps the SDK default)
+    """
+
+    enabled: bool = True
+    sample_ratio: float = 1.0
+    disabled_actions: frozenset[str] = frozenset()
+    max_attribute_length: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "RuntimeSettings":
+        """
+        Build settings from a control plane document; missing keys keep their defaults.
+
+        Raises:
+            ValueError: When a value has the wrong type or is out of range
+        """
+        if not isinstance(data, Mapping):
+            raise ValueError("runtime settings must be a JSON object")
+        known = {item.name for item in fields(cls)}
+        values = {key: value for key, value in data.items() if key in known}
+        if not isinstance(values.get("enabled", True), bool):
+            raise ValueError("enabled must be a boolean")
+        sample_ratio = values.get("sample_ratio", 1.0)
+        if type(sample_ratio) not in (int, float) or not 0 <= sample_ratio <= 1:
+            raise ValueError("sample_ratio must be a number between 0 and 1")
+        values["sample_ratio"] = float(sample_ratio)
+        disabled_actions = values.get("disabled_actions", ())
+        if isinstance(disabled_actions, str) or not isinstance(disabled_actions, Sequence):
+            raise ValueError("disabled_actions must be a list of action names")
+        values["disabled_actions"] = frozenset(str(name) for name in disabled_actions)
+        max_attribute_length = values.get("max_attribute_length", 0)
+        if type(max_attribute_length) is not int or max_attribute_length < 0:
+            raise ValueError("max_attribute_length must be a non-negative integer")
+        return cls(**values)
+
+    def drops(self, action_name: str) -> bool:
+        """Return True if an action with this name is not recorded."""
+        return not self.enabled or action_name in self.disabled_actions
+
+
+class RuntimeConfig:
+    """
+    Holder of the current RuntimeSettings.
+
+    Settings are immutable and replaced as a whole, so readers take one
+    attribute load of `settings` per decision and never see half an update,
+    without any lock on the hot path.
+    """
+
+    def __init__(self, settings: Optional[RuntimeSettings] = None):
+        """
+        Initialize the holder.
+
+        Args:
+            settings: Initial settings (defaults to everything enabled)
+        """
+        self.settings = settings or RuntimeSettings()
+        self.etag: Optional[str] = None
+
+    def update(self, settings: RuntimeSettings, etag: Optional[str] = None) -> None:
+        """Swap in new settings."""
+        self.etag = etag
+        self.settings = settings
+
+
+class RuntimeSampler(Sampler):
+    """
+    Sampler following the runtime settings: the kill switch drops every span and
+    new traces are kept with the configured ratio, decided on the trace ID so
+    every service of a trace agrees. Spans with a parent follow its decision.
+    """
+
+    def __init__(self, runtime: RuntimeConfig):
+        """
+        Initialize the sampler.
+
+        Args:
+            runtime: Holder of the settings to follow
+        """
+        self._runtime = runtime
+
+    def should_sample(
+        self,
+        parent_context: Optional[Context],
+        trace_id: int,
+        name: str,
+        kind: Optional[SpanKind] = None,
+        attributes: Attributes = None,
+        links: Optional[Sequence[Link]] = None,
+        trace_state: Optional[TraceState] = None,
+    ) -> SamplingResult:
+        settings = self._runtime.settings
+        parent = get_current_span(parent_context).get_span_context()
+        if not settings.enabled:
+            sampled = False
+        elif parent.is_valid:
+            sampled = parent.trace_flags.sampled
+        elif settings.sample_ratio >= 1.0:
+            sampled = True
+        else:
+            sampled = trace_id & _TRACE_ID_MASK < int(settings.sample_ratio * (_TRACE_ID_MASK + 1))
+        if not sampled:
+            return SamplingResult(Decision.DROP, None, parent.trace_state if parent.is_valid else None)
+        return SamplingResult(Decision.RECORD_AND_SAMPLE, attributes, parent.trace_state if parent.is_valid else None)
+
+    def get_description(self) -> str:
+        return "RuntimeSampler"
+
+
+class RemoteConfigPoller:
+    """
+    Background thread keeping a RuntimeConfig in sync with the control plane.
+
+    Each request carries the ETag of the settings held, so an unchanged
+    configuration costs a 304 with no body. With long_poll set, the server may
+    hold the request open until the settings change, which applies a change
+    within one round trip instead of one polling interval. The next long poll
+    only follows quickly when the server actually held the request or sent new
+    settings; an immediate reply (a server ignoring wait) waits the interval.
+    Failed requests and invalid documents keep the current settings.
+    """
+
+    def __init__(
+        self,
+        api: SyncValueControlPlaneAPI,
+        runtime: RuntimeConfig,
+        interval: float = 30.0,
+        long_poll: float = 0.0,
+    ):
+        """
+        Initialize the poller (call start() to begin polling).
+
+        Args:
+            api: Control plane client used only by the poller thread, which closes it
+            runtime: Holder receiving the settings
+            interval: Seconds between polls, and before retrying a failed long poll
+            long_poll: Seconds the server may hold a request waiting for a change (0 polls plainly)
+        """
+        self._api = api
+        self._runtime = runtime
+        self._interval = interval
+        self._long_poll = long_poll
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "RemoteConfigPoller":
+        self._thread = threading.Thread(target=self._run, name="value-remote-config", daemon=True)
+        self._thread.start()
+        return self
+
+    def poll(self) -> bool:
+        """
+        Fetch the settings once and apply them if they changed.
+
+        Returns:
+            True if new settings were applied
+        """
+        try:
+            etag, document = self._api.get_runtime_config(etag=self._runtime.etag, wait=self._long_poll)
+        except httpx.HTTPError as error:
+            logger.debug("Fetching runtime settings failed: %s", error)
+            self.failures += 1
+            return False
+        if document is None:
+            return False
+        try:
+            settings = RuntimeSettings.from_dict(document)
+        except (TypeError, ValueError) as error:
+            logger.warning("Ignoring invalid runtime settings: %s", error)
+            self.failures += 1
+            return False
+        if settings != self._runtime.settings:
+            logger.info("Applying runtime settings %s", settings)
+        self._runtime.update(settings, etag)
+        return True
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                failures = self.failures
+                started = time.monotonic()
+                applied = self.poll()
+                held = time.monotonic() - started >= self._long_poll / 2
+                if self._long_poll and self.failures == failures and (applied or held):
+                    # The long poll already waited for a change, so the next one starts soon
+                    self._stop.wait(min(self._interval, _MIN_POLL_DELAY))
+                else:
+                    self._stop.wait(self._interval)
+        finally:
+            self._api.close()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Stop polling; a long poll in progress is abandoned to the daemon thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
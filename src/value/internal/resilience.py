@@ -0,0 +1,215 @@
+"""Export retry with jittered backoff, a circuit breaker and a bounded spool."""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Sequence
+from typing import Callable, Optional
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with exponential, jittered open intervals and half-open probing.
+
+    After failure_threshold consecutive failures the breaker opens and rejects
+    requests until its backoff expires. The next request is then let through as a
+    single half-open probe: success closes the breaker, failure reopens it with a
+    doubled (capped) backoff. A failure_threshold of 0 never opens the breaker.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker (0 never opens it)
+            backoff_base: Open interval in seconds after the first trip
+            backoff_max: Upper bound for the open interval in seconds
+            clock: Monotonic clock, injectable for tests
+        """
+        self.failure_threshold = failure_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._trips = 0
+        self._retry_at = 0.0
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be attempted now."""
+        if self._state == CLOSED:
+            return True
+        with self._lock:
+            if self._state == OPEN and self._clock() >= self._retry_at:
+                self._state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful request, closing the breaker."""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trips = 0
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the breaker when the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            # Failures of requests that were already in flight when the breaker opened do not re-arm
+            # the backoff; only crossing the threshold while closed or a failed probe does
+            if self.failure_threshold <= 0 or self._state == OPEN:
+                return
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                backoff = min(self.backoff_max, self.backoff_base * (2**self._trips))
+                # Equal jitter: keep half the interval, randomize the other half
+                self._retry_at = self._clock() + backoff / 2 + random.uniform(0, backoff / 2)
+                self._trips += 1
+                self._state = OPEN
+
+
+class ResilientSpanExporter(SpanExporter):
+    """
+    Span exporter wrapper that never sleeps in the export worker.
+
+    While the breaker is open, batches go straight to a bounded in-memory spool
+    (or are dropped when spool_size is 0) instead of hitting the unavailable
+    endpoint. Spooled batches are replayed after the next successful export.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        breaker: Optional[CircuitBreaker] = None,
+        spool_size: int = 2048,
+        drain_batches: int = 4,
+        on_drop: Optional[Callable[[Sequence[ReadableSpan]], None]] = None,
+    ):
+        """
+        Initialize the resilient exporter.
+
+        Args:
+            exporter: The exporter that actually ships spans
+            breaker: Circuit breaker guarding the exporter
+            spool_size: Maximum number of spans held for replay (0 drops instead)
+            drain_batches: Maximum spooled batches replayed per successful export
+            on_drop: Called with spans that are dropped for good
+        """
+        self._exporter = exporter
+        self._breaker = breaker or CircuitBreaker()
+        self._spool_size = spool_size
+        self._drain_batches = drain_batches
+        self._on_drop = on_drop
+        self._spool: deque[Sequence[ReadableSpan]] = deque()
+        self._spooled = 0
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+
+    @property
+    def spooled(self) -> int:
+        """Number of spans currently waiting in the spool."""
+        return self._spooled
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Export spans, or spool them while the endpoint is considered down."""
+        if not self._breaker.allow_request():
+            self._spool_or_drop(spans)
+            return SpanExportResult.FAILURE
+
+        if self._attempt(spans) is not SpanExportResult.SUCCESS:
+            self._spool_or_drop(spans)
+            return SpanExportResult.FAILURE
+
+        self._drain(self._drain_batches)
+        return SpanExportResult.SUCCESS
+
+    def _attempt(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        try:
+            result = self._exporter.export(spans)
+        except Exception:
+            logger.exception("Exception while exporting spans")
+            result = SpanExportResult.FAILURE
+        if result is SpanExportResult.SUCCESS:
+            self._breaker.record_success()
+        else:
+            self._breaker.record_failure()
+        return result
+
+    def _drain(self, limit: int) -> None:
+        for _ in range(limit):
+            with self._lock:
+                if not self._spool:
+                    return
+                batch = self._spool.popleft()
+                self._spooled -= len(batch)
+            if self._attempt(batch) is not SpanExportResult.SUCCESS:
+                with self._lock:
+                    self._spool.appendleft(batch)
+                    self._spooled += len(batch)
+                return
+
+    def _spool_or_drop(self, spans: Sequence[ReadableSpan]) -> None:
+        dropped: list[Sequence[ReadableSpan]] = []
+        with self._lock:
+            if len(spans) > self._spool_size:
+                dropped.append(spans)
+            else:
+                self._spool.append(spans)
+                self._spooled += len(spans)
+                # Evict the oldest batches to stay within the footprint
+                while self._spooled > self._spool_size:
+                    oldest = self._spool.popleft()
+                    self._spooled -= len(oldest)
+                    dropped.append(oldest)
+        for batch in dropped:
+            self._drop(batch)
+
+    def _drop(self, spans: Sequence[ReadableSpan]) -> None:
+        self.dropped += len(spans)
+        if self._on_drop is not None:
+            self._on_drop(spans)
+
+    def shutdown(self) -> None:
+        """Give spooled batches one last attempt, drop what remains and shut down the exporter."""
+        if self._breaker.state != OPEN:
+            self._drain(len(self._spool))
+        with self._lock:
+            remaining, self._spool = list(self._spool), deque()
+            self._spooled = 0
+        for batch in remaining:
+            self._drop(batch)
+        self._exporter.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Replay spooled batches if the endpoint is reachable, then flush the exporter."""
+        if self._spool and self._breaker.allow_request():
+            self._drain(len(self._spool))
+        return self._exporter.force_flush(timeout_millis)
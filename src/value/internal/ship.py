@@ -0,0 +1,230 @@
+"""Replay of local span files to an OTLP/gRPC endpoint with resumable checkpoints."""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+import grpc
+
+from .file_export import FORMAT_NDJSON, FORMAT_OTLP, iter_records, list_span_files
+
+logger = logging.getLogger(__name__)
+
+EXPORT_METHOD = "/opentelemetry.proto.collector.trace.v1.TraceService/Export"
+
+
+def open_channel(endpoint: str, compression: bool = True, dedicated: bool = False) -> grpc.Channel:
+    """
+    Open a gRPC channel to an OTLP endpoint given as host:port or a URL.
+
+    https:// endpoints use TLS; anything else is plaintext, matching the SDK exporter.
+    Channels with the same target share one connection unless dedicated is set.
+    """
+    parsed = urlparse(endpoint if "://" in endpoint else f"http://{endpoint}")
+    target = parsed.netloc or parsed.path
+    kwargs = {"compression": grpc.Compression.Gzip} if compression else {}
+    if dedicated:
+        kwargs["options"] = [("grpc.use_local_subchannel_pool", 1)]
+    if parsed.scheme == "https":
+        return grpc.secure_channel(target, grpc.ssl_channel_credentials(), **kwargs)
+    return grpc.insecure_channel(target, **kwargs)
+
+
+def raw_export_call(channel: grpc.Channel) -> Callable[..., bytes]:
+    """
+    Return a unary Export call that takes pre-serialized ExportTraceServiceRequest bytes.
+
+    Concatenated serialized requests are themselves a valid request (protobuf merges
+    repeated fields), so several records can be sent in one call without decoding.
+    """
+    return channel.unary_unary(EXPORT_METHOD, request_serializer=None, response_deserializer=None)
+
+
+class Checkpoint:
+    """
+    JSON checkpoint of how many records of each file were acknowledged.
+
+    Progress is persisted at most once per interval and whenever a file
+    completes, rather than after every request; a run interrupted between two
+    writes resends at most interval seconds' worth of already acknowledged records.
+    """
+
+    def __init__(self, path: Optional[str], interval: float = 1.0):
+        """
+        Load the checkpoint at path (None keeps it in memory only).
+
+        Args:
+            path: Checkpoint file location
+            interval: Minimum seconds between two writes of in-progress updates
+        """
+        self._path = path
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._written = time.monotonic()
+        self._files: dict[str, dict] = {}
+        if path and os.path.exists(path):
+            with open(path) as stream:
+                self._files = json.load(stream).get("files", {})
+
+    def get(self, name: str) -> tuple[int, bool]:
+        """Return (acknowledged records, complete) for a file."""
+        entry = self._files.get(name, {})
+        return entry.get("records", 0), entry.get("complete", False)
+
+    def update(self, name: str, records: int, complete: bool = False) -> None:
+        """Record progress for a file, persisting it if the file is complete or the interval has passed."""
+        with self._lock:
+            self._files[name] = {"records": records, "complete": complete}
+            self._dirty = True
+            if complete or time.monotonic() - self._written >= self._interval:
+                self._write()
+
+    def flush(self) -> None:
+        """Persist progress not yet written."""
+        with self._lock:
+            if self._dirty:
+                self._write()
+
+    def _write(self) -> None:
+        self._dirty = False
+        self._written = time.monotonic()
+        if not self._path:
+            return
+        temporary = f"{self._path}.tmp"
+        with open(temporary, "w") as stream:
+            json.dump({"files": self._files}, stream)
+        os.replace(temporary, self._path)
+
+
+@dataclass
+class ShipReport:
+    """Outcome of a ship run."""
+
+    files: int = 0
+    records: int = 0
+    bytes: int = 0
+    requests: int = 0
+    failed_files: list[str] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.duration if self.duration else 0.0
+
+
+def ship(
+    directory: str,
+    endpoint: str,
+    workers: int = 4,
+    checkpoint_path: Optional[str] = None,
+    max_request_bytes: int = 3 * 1024 * 1024,
+    retries: int = 3,
+    timeout: float = 30.0,
+    delete: bool = False,
+    compression: bool = True,
+) -> ShipReport:
+    """
+    Replay span files from a directory to an OTLP/gRPC endpoint.
+
+    Files are shipped in parallel, one file per worker and one channel per worker.
+    Records of otlp files are sent without decoding, coalesced into requests of up
+    to max_request_bytes; ndjson files are re-encoded first (see iter_ndjson_records).
+    Acknowledged progress is checkpointed, so an interrupted run resumes where it stopped.
+
+    Args:
+        directory: Directory written by FileSpanExporter
+        endpoint: OTLP/gRPC endpoint (host:port or URL)
+        workers: Number of files shipped in parallel
+        checkpoint_path: Checkpoint file for resumable runs
+        max_request_bytes: Upper bound for one coalesced request
+        retries: Attempts per request before the file is given up on
+        timeout: Deadline of one request in seconds
+        delete: Remove files once fully shipped
+        compression: Gzip-compress requests on the wire
+
+    Returns:
+        A report of what was shipped
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    report = ShipReport()
+    report_lock = threading.Lock()
+    local = threading.local()
+    channels: list[grpc.Channel] = []
+    started = time.monotonic()
+
+    def _call() -> Callable[..., bytes]:
+        if not hasattr(local, "call"):
+            channel = open_channel(endpoint, compression=compression)
+            with report_lock:
+                channels.append(channel)
+            local.call = raw_export_call(channel)
+        return local.call
+
+    def _send(payload: bytes) -> bool:
+        for attempt in range(retries):
+            try:
+                _call()(payload, timeout=timeout)
+                return True
+            except grpc.RpcError as error:
+                logger.warning("Export attempt %d failed: %s", attempt + 1, error.code())
+                time.sleep(min(2**attempt, 10) * 0.1)
+        return False
+
+    def _ship_file(path: str) -> None:
+        name = os.path.basename(path)
+        done, complete = checkpoint.get(name)
+        if complete:
+            return
+        chunk: list[bytes] = []
+        chunk_bytes = 0
+
+        def _flush(acknowledged: int) -> bool:
+            nonlocal chunk, chunk_bytes
+            payload = b"".join(chunk)
+            if not _send(payload):
+                return False
+            checkpoint.update(name, acknowledged)
+            with report_lock:
+                report.records += len(chunk)
+                report.bytes += len(payload)
+                report.requests += 1
+            chunk, chunk_bytes = [], 0
+            return True
+
+        position = 0
+        for position, record in enumerate(iter_records(path), start=1):
+            if position <= done:
+                continue
+            if chunk and chunk_bytes + len(record) > max_request_bytes and not _flush(position - 1):
+                break
+            chunk.append(record)
+            chunk_bytes += len(record)
+        else:
+            if not chunk or _flush(position):
+                checkpoint.update(name, position, complete=True)
+                with report_lock:
+                    report.files += 1
+                if delete:
+                    os.remove(path)
+                return
+        with report_lock:
+            report.failed_files.append(name)
+
+    files = sorted(list_span_files(directory, FORMAT_OTLP) + list_span_files(directory, FORMAT_NDJSON))
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="value-ship") as executor:
+            list(executor.map(_ship_file, files))
+    finally:
+        checkpoint.flush()
+    for channel in channels:
+        channel.close()
+
+    report.duration = time.monotonic() - started
+    return report
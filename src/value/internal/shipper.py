@@ -0,0 +1,502 @@
+"""Out-of-process span shipping: a shared-memory ring buffer drained by a local shipper subprocess."""
+
+import hashlib
+import logging
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Sequence
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import grpc
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from .otlp_encoder import OTLPSpanEncoder
+from .processes import pid_running
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"VALRING1"
+# magic, capacity, head, tail, dropped (or rejected) records, shipper pid, shipped records, failed requests
+_HEADER = struct.Struct("<8sQQQQQQQ")
+_CAPACITY, _HEAD, _TAIL, _DROPPED, _PID, _SHIPPED, _FAILED = range(8, 64, 8)
+_U64 = struct.Struct("<Q")
+_LENGTH = struct.Struct("<I")
+# Length of the filler record written where a record does not fit before the end of the ring
+_WRAP = 0xFFFFFFFF
+# Seconds between checks that the shipper process is still running
+_LIVENESS_INTERVAL = 1.0
+# Upper bound for one request, below the collectors' default 4 MiB receive limit
+MAX_REQUEST_BYTES = 3 * 1024 * 1024
+# Status codes after which a request may succeed if sent again (as in the OTLP exporters)
+_RETRYABLE = frozenset(
+    {
+        grpc.StatusCode.CANCELLED,
+        grpc.StatusCode.DEADLINE_EXCEEDED,
+        grpc.StatusCode.ABORTED,
+        grpc.StatusCode.OUT_OF_RANGE,
+        grpc.StatusCode.UNAVAILABLE,
+        grpc.StatusCode.DATA_LOSS,
+    }
+)
+
+
+def ring_name(endpoint: str) -> str:
+    """Return the default ring name for an endpoint, shared by every process exporting to it."""
+    return f"value-{hashlib.sha1(endpoint.encode()).hexdigest()[:12]}"
+
+
+def _open_segment(name: str, size: int = 0) -> shared_memory.SharedMemory:
+    """Open (size 0) or create a segment that outlives this process; the shipper unlinks it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, create=size > 0, size=size, track=False)
+    segment = shared_memory.SharedMemory(name=name, create=size > 0, size=size)
+    # Before 3.13 every process opening a segment registers it to be unlinked on exit
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+class _RingLock:
+    """Lock held by one thread of one process at a time (threads share the flock'd descriptor)."""
+
+    def __init__(self, path: str):
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def __enter__(self) -> "_RingLock":
+        self._thread_lock.acquire()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class SpanRing:
+    """
+    Fixed-size multi-producer, single-consumer ring of records in shared memory.
+
+    Records are length-prefixed byte strings (serialized export requests).
+    Producers in any process append under a file lock and drop the record when
+    the ring is full, so a stalled consumer never blocks or grows the
+    application. The single consumer (the shipper) reads without the lock and
+    advances the tail once records are acknowledged. Head and tail are
+    monotonic byte offsets in the 64-byte header, written after the data they
+    publish; this relies on aligned 8-byte stores being atomic, as they are on
+    x86-64 and arm64.
+    """
+
+    def __init__(self, segment: shared_memory.SharedMemory, name: str):
+        """Wrap an open segment; use create() or attach()."""
+        if fcntl is None:
+            raise RuntimeError("The span shipper requires a POSIX platform")
+        self.name = name
+        self._segment = segment
+        self._buffer = segment.buf
+        magic, capacity = struct.unpack_from("<8sQ", self._buffer)
+        if magic != _MAGIC:
+            raise ValueError(f"Shared memory segment {name} is not a span ring")
+        self.capacity = capacity
+        self._lock = _RingLock(os.path.join(tempfile.gettempdir(), f"{name}.lock"))
+
+    @classmethod
+    def create(cls, name: str, capacity: int) -> "SpanRing":
+        """Create a ring with capacity bytes of record space."""
+        segment = _open_segment(name, _HEADER.size + capacity)
+        _HEADER.pack_into(segment.buf, 0, _MAGIC, capacity, 0, 0, 0, 0, 0, 0)
+        return cls(segment, name)
+
+    @classmethod
+    def attach(cls, name: str) -> "SpanRing":
+        """Attach to an existing ring (FileNotFoundError if there is none)."""
+        return cls(_open_segment(name), name)
+
+    def lock(self) -> _RingLock:
+        """Return the producers' lock, also taken to start, attach to or retire the shipper."""
+        return self._lock
+
+    def _get(self, offset: int) -> int:
+        return _U64.unpack_from(self._buffer, offset)[0]
+
+    def _set(self, offset: int, value: int) -> None:
+        _U64.pack_into(self._buffer, offset, value)
+
+    @property
+    def head(self) -> int:
+        return self._get(_HEAD)
+
+    @property
+    def tail(self) -> int:
+        return self._get(_TAIL)
+
+    @property
+    def dropped(self) -> int:
+        """Records dropped by producers while the ring was full, or rejected by the collector."""
+        return self._get(_DROPPED)
+
+    @property
+    def shipped(self) -> int:
+        return self._get(_SHIPPED)
+
+    @property
+    def failed(self) -> int:
+        return self._get(_FAILED)
+
+    @property
+    def shipper_pid(self) -> int:
+        return self._get(_PID)
+
+    @shipper_pid.setter
+    def shipper_pid(self, pid: int) -> None:
+        self._set(_PID, pid)
+
+    def write(self, record: bytes) -> Optional[int]:
+        """
+        Append a record unless the ring is full or retired.
+
+        Returns:
+            The head offset after the record (flushed once the tail reaches it), or None if dropped
+        """
+        needed = _LENGTH.size + len(record)
+        with self._lock:
+            head = self._get(_HEAD)
+            position = head % self.capacity
+            padding = self.capacity - position if self.capacity - position < needed else 0
+            if not self._get(_PID) or head + padding + needed - self._get(_TAIL) > self.capacity:
+                self._set(_DROPPED, self._get(_DROPPED) + 1)
+                return None
+            if padding:
+                if padding >= _LENGTH.size:
+                    _LENGTH.pack_into(self._buffer, _HEADER.size + position, _WRAP)
+                head += padding
+                position = 0
+            start = _HEADER.size + position
+            _LENGTH.pack_into(self._buffer, start, len(record))
+            self._buffer[start + _LENGTH.size : start + needed] = record
+            head += needed
+            self._set(_HEAD, head)
+        return head
+
+    def read(self, max_bytes: int) -> tuple[list[bytes], int]:
+        """
+        Return the records after the tail, up to max_bytes (at least one), and the tail after them.
+
+        The tail is not moved; call consume() once the records are shipped.
+        """
+        tail = self._get(_TAIL)
+        head = self._get(_HEAD)
+        records: list[bytes] = []
+        size = 0
+        while tail < head:
+            position = tail % self.capacity
+            if self.capacity - position < _LENGTH.size:
+                tail += self.capacity - position
+                continue
+            start = _HEADER.size + position
+            length = _LENGTH.unpack_from(self._buffer, start)[0]
+            if length == _WRAP:
+                tail += self.capacity - position
+                continue
+            if records and size + length > max_bytes:
+                break
+            records.append(bytes(self._buffer[start + _LENGTH.size : start + _LENGTH.size + length]))
+            size += length
+            tail += _LENGTH.size + length
+        return records, tail
+
+    def consume(self, tail: int, records: int) -> None:
+        """Release the space up to tail after shipping records."""
+        self._set(_TAIL, tail)
+        self._set(_SHIPPED, self._get(_SHIPPED) + records)
+
+    def discard(self, tail: int, records: int) -> None:
+        """Release the space up to tail, counting records the collector rejected as dropped."""
+        with self._lock:
+            self._set(_DROPPED, self._get(_DROPPED) + records)
+        self._set(_TAIL, tail)
+
+    def record_failure(self) -> None:
+        """Count a failed export request."""
+        self._set(_FAILED, self._get(_FAILED) + 1)
+
+    def close(self) -> None:
+        """Unmap the ring from this process."""
+        self._lock.close()
+        self._buffer = None
+        self._segment.close()
+
+    def unlink(self) -> None:
+        """Remove the segment; processes that still map it keep their mapping."""
+        self._segment.unlink()
+
+
+def launch_shipper(ring: str, endpoint: str, compression: bool = True) -> subprocess.Popen:
+    """Start a detached `python -m value shipper` process draining ring to endpoint."""
+    command = [sys.executable, "-m", "value", "shipper", "--ring", ring, "--endpoint", endpoint]
+    if not compression:
+        command.append("--no-compression")
+    # The shipper imports this same copy of the SDK, installed or not
+    source = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (source, env.get("PYTHONPATH"))))
+    return subprocess.Popen(
+        command,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+class ShipperSpanExporter(SpanExporter):
+    """
+    Span exporter handing encoded batches to a local shipper process.
+
+    Each batch is serialized with OTLPSpanEncoder and written to a shared-memory
+    ring; a shipper subprocess coalesces, compresses, retries and exports the
+    records over one upstream connection, outside the application's GIL. The
+    first process to export starts the shipper and later ones (such as other
+    worker processes on the host) attach to it. A batch is reported as failed
+    when the ring is full or when it encodes to more than one request may
+    carry, and a shipper that exited is restarted.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        ring: Optional[str] = None,
+        ring_bytes: int = 16 * 1024 * 1024,
+        compression: bool = True,
+        drain_timeout: float = 5.0,
+        max_request_bytes: int = MAX_REQUEST_BYTES,
+    ):
+        """
+        Initialize the exporter, starting or attaching to the shipper.
+
+        Args:
+            endpoint: OTLP/gRPC endpoint the shipper exports to
+            ring: Shared memory name of the ring (defaults to one derived from the endpoint)
+            ring_bytes: Record space of the ring when this process creates it
+            compression: Gzip-compress the shipper's requests
+            drain_timeout: Seconds shutdown waits for the shipper to ship this process's records
+            max_request_bytes: Largest encoded batch accepted; larger ones would be rejected by the collector
+        """
+        self._endpoint = endpoint
+        self._max_request_bytes = max_request_bytes
+        self._ring_name = ring or ring_name(endpoint)
+        self._ring_bytes = ring_bytes
+        self._compression = compression
+        self._drain_timeout = drain_timeout
+        self._encoder = OTLPSpanEncoder()
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._checked = 0.0
+        self._written = 0
+        self._shutdown = False
+        self._ring = self._start_or_attach()
+
+    @property
+    def ring(self) -> SpanRing:
+        return self._ring
+
+    def _start_or_attach(self) -> SpanRing:
+        # The ring's own lock is taken once it exists; creating it needs the same lock beforehand
+        lock = _RingLock(os.path.join(tempfile.gettempdir(), f"{self._ring_name}.lock"))
+        try:
+            with lock:
+                try:
+                    ring = SpanRing.attach(self._ring_name)
+                except FileNotFoundError:
+                    ring = SpanRing.create(self._ring_name, self._ring_bytes)
+                if not pid_running(ring.shipper_pid):
+                    # A crashed shipper's records stay in the ring for the new one
+                    self._process = launch_shipper(self._ring_name, self._endpoint, self._compression)
+                    ring.shipper_pid = self._process.pid
+        finally:
+            lock.close()
+        self._checked = time.monotonic()
+        self._written = ring.head
+        return ring
+
+    def _shipper_running(self) -> bool:
+        if self._process is not None and self._process.pid == self._ring.shipper_pid:
+            return self._process.poll() is None
+        return pid_running(self._ring.shipper_pid)
+
+    def _reattach(self) -> None:
+        """Start a new shipper, or move to a new ring if the shipper retired this one."""
+        if self._ring.shipper_pid:
+            logger.warning("Span shipper %d exited; starting a new one", self._ring.shipper_pid)
+        self._ring.close()
+        self._ring = self._start_or_attach()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Write the encoded batch to the ring."""
+        if self._shutdown:
+            return SpanExportResult.FAILURE
+        record = self._encoder.encode(spans)
+        if len(record) > self._max_request_bytes:
+            logger.warning("Dropping a batch of %d spans encoded to %d bytes", len(spans), len(record))
+            return SpanExportResult.FAILURE
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked >= _LIVENESS_INTERVAL:
+                self._checked = now
+                if not self._shipper_running():
+                    self._reattach()
+            head = self._ring.write(record)
+            if head is None and not self._ring.shipper_pid:
+                self._reattach()
+                head = self._ring.write(record)
+            if head is None:
+                return SpanExportResult.FAILURE
+            self._written = head
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Wait until the shipper has shipped every record this process wrote."""
+        deadline = time.monotonic() + timeout_millis / 1000
+        while self._ring.tail < self._written:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def shutdown(self) -> None:
+        """Wait for this process's records to be shipped, then unmap the ring; the shipper keeps running."""
+        if self._shutdown:
+            return
+        self._shutdown = True
+        if not self.force_flush(int(self._drain_timeout * 1000)):
+            logger.warning("Span shipper did not ship all records within %.1fs", self._drain_timeout)
+        with self._lock:
+            self._ring.close()
+
+
+class Shipper:
+    """
+    Drains a span ring to an OTLP/gRPC endpoint; the body of `python -m value shipper`.
+
+    Records are serialized export requests, so available records are coalesced
+    into one request without decoding. A request failing with a transient
+    status (UNAVAILABLE, DEADLINE_EXCEEDED, ...) is retried with exponential
+    backoff and its records stay in the ring meanwhile; producers drop new
+    records once the ring is full. A request the collector rejects for good, or
+    that still fails after max_attempts, is not retried: its records are sent
+    again one per request, so a single bad record does not take the others
+    with it, and records failing on their own are discarded and counted as
+    dropped. After idle_timeout seconds with an empty ring, the shipper retires
+    the ring (removing it) and exits.
+    """
+
+    def __init__(
+        self,
+        ring: SpanRing,
+        endpoint: str,
+        max_request_bytes: int = MAX_REQUEST_BYTES,
+        timeout: float = 10.0,
+        compression: bool = True,
+        idle_timeout: float = 300.0,
+        poll_interval: float = 0.05,
+        backoff_max: float = 30.0,
+        max_attempts: int = 20,
+    ):
+        """
+        Initialize the shipper.
+
+        Args:
+            ring: Ring to drain
+            endpoint: OTLP/gRPC endpoint (host:port or URL)
+            max_request_bytes: Upper bound for one coalesced request
+            timeout: Deadline of one request in seconds
+            compression: Gzip-compress requests on the wire
+            idle_timeout: Seconds of empty ring after which the shipper exits
+            poll_interval: Seconds between polls of an empty ring
+            backoff_max: Longest wait between retries of a failed request
+            max_attempts: Attempts of a request failing with a transient status before its records are given up
+        """
+        from .ship import open_channel, raw_export_call
+
+        self._ring = ring
+        self._channel = open_channel(endpoint, compression=compression)
+        self._call = raw_export_call(self._channel)
+        self._max_request_bytes = max_request_bytes
+        self._timeout = timeout
+        self._idle_timeout = idle_timeout
+        self._poll_interval = poll_interval
+        self._backoff_max = backoff_max
+        self._max_attempts = max_attempts
+        self.stop_event = threading.Event()
+
+    def run(self) -> None:
+        """Ship records until stopped or idle, then ship what is left and exit."""
+        idle_since = time.monotonic()
+        backoff = self._poll_interval
+        attempts = 0
+        # Records left to send one per request after a rejected coalesced request
+        isolated = 0
+        while True:
+            records, tail = self._ring.read(0 if isolated else self._max_request_bytes)
+            if not records:
+                if self.stop_event.is_set() or (
+                    time.monotonic() - idle_since >= self._idle_timeout and self._retire_if_empty()
+                ):
+                    break
+                self.stop_event.wait(self._poll_interval)
+                continue
+            idle_since = time.monotonic()
+            try:
+                self._call(b"".join(records), timeout=self._timeout)
+            except grpc.RpcError as error:
+                self._ring.record_failure()
+                attempts += 1
+                if error.code() in _RETRYABLE and attempts < self._max_attempts:
+                    logger.warning("Shipping %d records failed: %s", len(records), error.code())
+                    if self.stop_event.wait(backoff):
+                        break
+                    backoff = min(backoff * 2, self._backoff_max)
+                    continue
+                attempts = 0
+                backoff = self._poll_interval
+                if len(records) > 1:
+                    logger.warning(
+                        "Shipping %d records failed: %s; sending them one by one", len(records), error.code()
+                    )
+                    isolated = len(records)
+                    continue
+                logger.error("Discarding a record the collector rejected: %s", error.code())
+                self._ring.discard(tail, 1)
+                isolated = max(isolated - 1, 0)
+                continue
+            attempts = 0
+            backoff = self._poll_interval
+            isolated = max(isolated - len(records), 0)
+            self._ring.consume(tail, len(records))
+        if self.stop_event.is_set():
+            # Unshipped records are kept for the next shipper a producer starts
+            self._retire_if_empty()
+        self._channel.close()
+
+    def _retire_if_empty(self) -> bool:
+        with self._ring.lock():
+            if self._ring.head != self._ring.tail:
+                return False
+            self._ring.shipper_pid = 0
+            self._ring.unlink()
+        return True
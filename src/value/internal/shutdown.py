@@ -0,0 +1,291 @@
+"""Graceful shutdown of the tracing pipeline with a deadline-bounded parallel flush."""
+
+import atexit
+import signal
+import threading
+import time
+import weakref
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+# Weight of the latest export call in the export latency average
+_LATENCY_ALPHA = 0.2
+
+
+class _CellOwner:
+    """Per-thread owner of an ended-span cell; it is freed with its thread's locals."""
+
+    __slots__ = ("cell", "__weakref__")
+
+    def __init__(self, cell: list[int]):
+        self.cell = cell
+
+
+class ExportStats:
+    """Thread-safe counters of spans handed to and acknowledged by an exporter."""
+
+    def __init__(self):
+        """Initialize zeroed counters."""
+        # Reentrant: a cell may be retired by the garbage collector while this thread holds the lock
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        # Cells of live threads by id; the counts of exited threads are folded into _ended_base
+        self._ended_cells: dict[int, list[int]] = {}
+        self._ended_base = 0
+        self.exported = 0
+        self.failed = 0
+        self.export_latency = 0.0
+
+    @property
+    def ended(self) -> int:
+        """Spans that ended and entered the export pipeline."""
+        with self._lock:
+            return self._ended_base + sum(cell[0] for cell in self._ended_cells.values())
+
+    def record_ended(self, count: int = 1) -> None:
+        """
+        Record spans that ended and entered the export pipeline.
+
+        Called for every span, so each thread counts into its own cell and the
+        shared lock is only taken the first time a thread records. When the
+        thread exits, its cell is folded into a base count and dropped, so
+        thread churn does not grow the cells.
+        """
+        owner = getattr(self._local, "owner", None)
+        if owner is None:
+            owner = self._local.owner = _CellOwner([0])
+            with self._lock:
+                self._ended_cells[id(owner.cell)] = owner.cell
+            weakref.finalize(owner, ExportStats._retire_cell, weakref.ref(self), owner.cell)
+        owner.cell[0] += count
+
+    @staticmethod
+    def _retire_cell(stats_ref: "weakref.ref[ExportStats]", cell: list[int]) -> None:
+        stats = stats_ref()
+        if stats is None:
+            return
+        with stats._lock:
+            if stats._ended_cells.pop(id(cell), None) is not None:
+                stats._ended_base += cell[0]
+
+    def record_export(self, count: int, result: SpanExportResult, elapsed: Optional[float] = None) -> None:
+        """Record the outcome of an export call for count spans, and how many seconds it took."""
+        with self._lock:
+            if result is SpanExportResult.SUCCESS:
+                self.exported += count
+            else:
+                self.failed += count
+            if elapsed is not None:
+                self.export_latency += _LATENCY_ALPHA * (elapsed - self.export_latency)
+
+    @property
+    def in_flight(self) -> int:
+        """Spans that ended but have neither been exported nor failed yet."""
+        return max(self.ended - self.exported - self.failed, 0)
+
+
+class EndedSpanCounter(SpanProcessor):
+    """Span processor that counts ended spans into an ExportStats instance."""
+
+    def __init__(self, stats: ExportStats):
+        """
+        Initialize the counter.
+
+        Args:
+            stats: Stats receiving the ended span counts
+        """
+        self._stats = stats
+
+    def on_start(self, span: ReadableSpan, parent_context: Optional[Context] = None) -> None:
+        """Called when a span is started."""
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Called when a span is ended."""
+        self._stats.record_ended()
+
+    def shutdown(self) -> None:
+        """Called when the processor is shut down."""
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Force flush any buffered spans."""
+        return True
+
+
+class CountingSpanExporter(SpanExporter):
+    """Span exporter wrapper that records export outcomes into an ExportStats instance."""
+
+    def __init__(self, exporter: SpanExporter, stats: ExportStats, count_failures: bool = True):
+        """
+        Initialize the counting exporter.
+
+        Args:
+            exporter: The exporter that actually ships spans
+            stats: Stats receiving the export outcomes
+            count_failures: Count failed exports. Disable when a retry layer sits on top
+                and reports dropped spans to the stats itself.
+        """
+        self._exporter = exporter
+        self._stats = stats
+        self._count_failures = count_failures
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Export spans and record the outcome and latency."""
+        started = time.monotonic()
+        try:
+            result = self._exporter.export(spans)
+        except Exception:
+            if self._count_failures:
+                self._stats.record_export(len(spans), SpanExportResult.FAILURE, time.monotonic() - started)
+            raise
+        if self._count_failures or result is SpanExportResult.SUCCESS:
+            self._stats.record_export(len(spans), result, time.monotonic() - started)
+        return result
+
+    def shutdown(self) -> None:
+        """Shut down the wrapped exporter."""
+        self._exporter.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Force flush the wrapped exporter."""
+        return self._exporter.force_flush(timeout_millis)
+
+
+@dataclass
+class ShutdownReport:
+    """Outcome of a graceful shutdown, counted on the primary (OTLP) exporter."""
+
+    flushed: int = 0
+    failed: int = 0
+    lost: int = 0
+    timed_out: bool = False
+    duration: float = 0.0
+
+
+def shutdown_processors(
+    processors: Sequence[SpanProcessor],
+    stats: ExportStats,
+    timeout: float = 5.0,
+    shutdown: bool = True,
+) -> ShutdownReport:
+    """
+    Flush and shut down span processors in parallel under one overall deadline.
+
+    Each processor is flushed and shut down on its own daemon thread, so a slow
+    exporter neither delays the others nor blocks interpreter exit past the deadline.
+
+    Args:
+        processors: The export processors to flush and shut down
+        stats: Stats of the primary exporter, used to build the report
+        timeout: Overall deadline in seconds
+        shutdown: Shut the processors down after flushing (False only flushes them)
+
+    Returns:
+        A report of how many spans were flushed, failed or lost
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    exported_before = stats.exported
+    failed_before = stats.failed
+
+    def _flush_and_shutdown(processor: SpanProcessor) -> None:
+        remaining_ms = max(int((deadline - time.monotonic()) * 1000), 0)
+        processor.force_flush(remaining_ms)
+        if shutdown:
+            processor.shutdown()
+
+    threads = [
+        threading.Thread(target=_flush_and_shutdown, args=(processor,), name="value-shutdown", daemon=True)
+        for processor in processors
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(max(deadline - time.monotonic(), 0))
+
+    return ShutdownReport(
+        flushed=stats.exported - exported_before,
+        failed=stats.failed - failed_before,
+        lost=stats.in_flight + stats.failed - failed_before,
+        timed_out=any(thread.is_alive() for thread in threads),
+        duration=time.monotonic() - started,
+    )
+
+
+class ShutdownHooks:
+    """Registration returned by register_shutdown_hooks; remove() unregisters it once the client is closed."""
+
+    def __init__(self, callback: Callable[[], Any]):
+        self._callback = callback
+
+    def remove(self) -> None:
+        """Unregister the atexit hook and drop the callback from the SIGTERM handler."""
+        atexit.unregister(self._callback)
+        with _hooks_lock:
+            _sigterm_callbacks.pop(self, None)
+
+
+_hooks_lock = threading.Lock()
+# Callbacks run by the one module-level SIGTERM handler, in registration order
+_sigterm_callbacks: dict[ShutdownHooks, Callable[[], Any]] = {}
+_previous_sigterm: Any = signal.SIG_DFL
+_in_sigterm = False
+
+
+def _on_sigterm(signum: int, frame: Any) -> None:
+    global _in_sigterm
+    if _in_sigterm:
+        # A handler installed after ours that chains back to it
+        return
+    _in_sigterm = True
+    try:
+        # No lock here: the handler may interrupt the main thread while it holds it
+        for callback in list(_sigterm_callbacks.values()):
+            callback()
+        previous = _previous_sigterm
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.raise_signal(signal.SIGTERM)
+    finally:
+        _in_sigterm = False
+
+
+def register_shutdown_hooks(callback: Callable[[], Any], handle_sigterm: bool = False) -> ShutdownHooks:
+    """
+    Run callback at interpreter exit and, optionally, on SIGTERM.
+
+    One module-level SIGTERM handler runs the callbacks of every live
+    registration and then defers to the handler installed before it (or the
+    default action, terminating the process). It is installed on the first
+    registration asking for it, and again if another handler replaced it. It
+    can only be installed from the main thread; elsewhere only the atexit hook
+    is registered. Call remove() on the returned handle when the client closes,
+    so closed clients are not kept alive by the hooks.
+
+    Args:
+        callback: Idempotent shutdown callback
+        handle_sigterm: Also run callback on SIGTERM
+
+    Returns:
+        The handle of the registration
+    """
+    global _previous_sigterm
+    hooks = ShutdownHooks(callback)
+    atexit.register(callback)
+    if not handle_sigterm or threading.current_thread() is not threading.main_thread():
+        return hooks
+    with _hooks_lock:
+        _sigterm_callbacks[hooks] = callback
+        current = signal.getsignal(signal.SIGTERM)
+        if current is not _on_sigterm:
+            _previous_sigterm = current
+            signal.signal(signal.SIGTERM, _on_sigterm)
+    return hooks
@@ -6,8 +6,9 @@ from typing import Optional
 from opentelemetry.context import Context
 from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
 
-_user_id_context: ContextVar[Optional[str]] = ContextVar("_user_id_context", default=None)
-_anonymous_id_context: ContextVar[Optional[str]] = ContextVar("_anonymous_id_context", default=None)
+# Span attributes of the current user context, precomputed once per action_context so
+# on_start is a single ContextVar read and a single set_attributes call
+_user_context: ContextVar[Optional[dict[str, str]]] = ContextVar("_user_context", default=None)
 
 
 class UserContextSpanProcessor(SpanProcessor):
@@ -24,13 +25,9 @@ class UserContextSpanProcessor(SpanProcessor):
             span: The span that was started
             parent_context: The parent context (optional)
         """
-        user_id = _user_id_context.get()
-        anonymous_id = _anonymous_id_context.get()
-
-        if user_id and span.is_recording():
-            span.set_attribute("value.action.user_id", user_id)
-        if anonymous_id and span.is_recording():
-            span.set_attribute("value.action.anonymous_id", anonymous_id)
+        attributes = _user_context.get()
+        if attributes and span.is_recording():
+            span.set_attributes(attributes)
 
     def on_end(self, span: ReadableSpan) -> None:
         """Called when a span is ended."""
@@ -49,6 +46,8 @@ def set_user_context(user_id: Optional[str] = None, anonymous_id: Optional[str]
     """
     Set user context for the current execution context.
 
+    IDs that are not given are inherited from the enclosing user context.
+
     Args:
         user_id: User ID to set
         anonymous_id: Anonymous ID to set
@@ -56,20 +55,23 @@ def set_user_context(user_id: Optional[str] = None, anonymous_id: Optional[str]
     Returns:
         Tuple of tokens to reset the context later
     """
-    user_token = _user_id_context.set(user_id) if user_id else None
-    anon_token = _anonymous_id_context.set(anonymous_id) if anonymous_id else None
-    return user_token, anon_token
+    if not user_id and not anonymous_id:
+        return None, None
+    attributes = dict(_user_context.get() or {})
+    if user_id:
+        attributes["value.action.user_id"] = user_id
+    if anonymous_id:
+        attributes["value.action.anonymous_id"] = anonymous_id
+    return _user_context.set(attributes), None
 
 
-def reset_user_context(user_token, anon_token):
+def reset_user_context(user_token, anon_token=None):
     """
     Reset user context to previous values.
 
     Args:
-        user_token: Token from set_user_context for user_id
-        anon_token: Token from set_user_context for anonymous_id
+        user_token: Token returned by set_user_context
+        anon_token: Unused; kept for callers passing both tokens returned by set_user_context
     """
     if user_token:
-        _user_id_context.reset(user_token)
-    if anon_token:
-        _anonymous_id_context.reset(anon_token)
+        _user_context.reset(user_token)
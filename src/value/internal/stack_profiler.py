@@ -0,0 +1,190 @@
+"""Low-frequency sampling stack profiler for slow LLM and tool spans."""
+
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+from opentelemetry import trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.trace import Link, NonRecordingSpan
+
+from .latency import LLM, TOOL, classify
+
+# Folded stacks kept per span and frames kept per stack; deeper stacks keep their innermost frames
+_MAX_STACKS = 500
+_MAX_DEPTH = 64
+# Stacks attached to the profile span, most sampled first
+_MAX_EXPORTED_STACKS = 100
+# Slowest sampling interval the CPU cap can back off to
+_MAX_INTERVAL = 1.0
+# Cached frame labels; the cache is reset past this size
+_MAX_LABELS = 10000
+
+
+class _Sampled:
+    __slots__ = ("thread_id", "stacks", "samples")
+
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+
+class StackSamplingProfiler(SpanProcessor):
+    """
+    Span processor that samples the stacks of threads running LLM and tool spans.
+
+    While at least one LLM or tool span is open, a background thread samples the
+    stack of each span's starting thread with sys._current_frames every interval.
+    When a span ends, its samples are dropped unless it took longer than threshold;
+    slow spans get a child value.profile span, linked to them, carrying the
+    aggregated folded stacks ("frame;frame;frame count" lines, flamegraph format).
+
+    The sampler measures its own CPU time and backs its interval off whenever it
+    exceeds max_cpu_percent of one core. For spans started on an event loop the
+    samples show whatever the loop thread was running, not only the span's task.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 1.0,
+        interval: float = 0.05,
+        max_cpu_percent: float = 1.0,
+        max_active_spans: int = 256,
+    ):
+        """
+        Initialize the profiler; the sampler thread starts with the first candidate span.
+
+        Args:
+            threshold: Span duration in seconds above which samples are exported
+            interval: Target seconds between samples
+            max_cpu_percent: Sampler CPU budget as a percentage of one core
+            max_active_spans: Open spans sampled at once
+        """
+        self._threshold_ns = int(threshold * 1e9)
+        self._base_interval = interval
+        self._interval = interval
+        self._max_cpu = max_cpu_percent / 100
+        self._max_active = max_active_spans
+        self._active: dict[int, _Sampled] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._labels: dict[object, str] = {}
+        self._sampler: Optional[threading.Thread] = None
+        self._shutdown = False
+        self._sampler_cpu_ns = 0
+        self._sampler_wall_ns = 0
+        self.tracer: Optional[trace.Tracer] = None
+
+    @property
+    def interval(self) -> float:
+        """Current sampling interval in seconds (backed off under the CPU cap)."""
+        return self._interval
+
+    @property
+    def overhead(self) -> float:
+        """Sampler CPU time as a fraction of the wall time it was sampling."""
+        return self._sampler_cpu_ns / self._sampler_wall_ns if self._sampler_wall_ns else 0.0
+
+    def on_start(self, span: ReadableSpan, parent_context: Optional[Context] = None) -> None:
+        """Start sampling the current thread for LLM and tool spans."""
+        if self._shutdown or classify(span) not in (LLM, TOOL):
+            return
+        with self._lock:
+            if len(self._active) >= self._max_active:
+                return
+            self._active[span.context.span_id] = _Sampled(threading.get_ident())
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._run, name="value-stack-profiler", daemon=True)
+                self._sampler.start()
+        self._wake.set()
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Export the samples of a slow span, drop those of a fast one."""
+        if not self._active:
+            return
+        with self._lock:
+            sampled = self._active.pop(span.context.span_id, None)
+        if sampled is None or not sampled.samples or self.tracer is None:
+            return
+        if (span.end_time or 0) - (span.start_time or 0) < self._threshold_ns:
+            return
+        folded = "\n".join(f"{stack} {count}" for stack, count in sampled.stacks.most_common(_MAX_EXPORTED_STACKS))
+        profile = self.tracer.start_span(
+            "value.profile",
+            context=trace.set_span_in_context(NonRecordingSpan(span.context)),
+            links=[Link(span.context)],
+            attributes={
+                "value.profile.span_name": span.name,
+                "value.profile.samples": sampled.samples,
+                "value.profile.interval_ms": self._interval * 1000,
+                "value.profile.overhead_pct": self.overhead * 100,
+                "value.profile.folded_stacks": folded,
+            },
+            start_time=span.start_time,
+        )
+        profile.end(end_time=span.end_time)
+
+    def _run(self) -> None:
+        while not self._shutdown:
+            if not self._active:
+                self._wake.clear()
+                if not self._active:
+                    self._wake.wait()
+                continue
+            wall_started = time.perf_counter_ns()
+            cpu_started = time.thread_time_ns()
+            self._sample()
+            cpu = time.thread_time_ns() - cpu_started
+            time.sleep(self._interval)
+            self._sampler_cpu_ns += cpu
+            self._sampler_wall_ns += time.perf_counter_ns() - wall_started
+            # Back off while a sample costs more than the budget allows, recover towards the target
+            if cpu > self._max_cpu * self._interval * 1e9:
+                self._interval = min(self._interval * 2, _MAX_INTERVAL)
+            elif self._interval > self._base_interval and cpu * 4 < self._max_cpu * self._interval * 1e9:
+                self._interval = max(self._interval / 2, self._base_interval)
+
+    def _sample(self) -> None:
+        frames = sys._current_frames()
+        with self._lock:
+            active = list(self._active.values())
+        stacks: dict[int, str] = {}
+        for sampled in active:
+            stack = stacks.get(sampled.thread_id)
+            if stack is None:
+                frame = frames.get(sampled.thread_id)
+                if frame is None:
+                    continue
+                stack = stacks[sampled.thread_id] = self._fold(frame)
+            sampled.samples += 1
+            if stack in sampled.stacks or len(sampled.stacks) < _MAX_STACKS:
+                sampled.stacks[stack] += 1
+
+    def _fold(self, frame: Optional[FrameType]) -> str:
+        labels = []
+        while frame is not None and len(labels) < _MAX_DEPTH:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                if len(self._labels) >= _MAX_LABELS:
+                    self._labels.clear()
+                label = self._labels[code] = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            labels.append(label)
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def shutdown(self) -> None:
+        """Stop the sampler thread."""
+        self._shutdown = True
+        self._wake.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Force flush any buffered spans."""
+        return True
@@ -0,0 +1,150 @@
+"""Local stand-in OTLP collector and control plane server for tests and load generation."""
+
+import json
+import threading
+import time
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import grpc
+from opentelemetry.proto.collector.trace.v1 import trace_service_pb2, trace_service_pb2_grpc
+
+
+class StandInCollector(trace_service_pb2_grpc.TraceServiceServicer):
+    """In-process gRPC trace collector that can be told to fail requests."""
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Bind the collector to a free local port (call start() to serve).
+
+        Args:
+            max_workers: Threads handling export requests
+        """
+        self.requests = 0
+        self.spans = 0
+        self.fail_with: Optional[grpc.StatusCode] = None
+        # Seconds each request takes, standing in for network and collector latency
+        self.delay = 0.0
+        self._lock = threading.Lock()
+        self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+        trace_service_pb2_grpc.add_TraceServiceServicer_to_server(self, self._server)
+        self.port = self._server.add_insecure_port("127.0.0.1:0")
+
+    @property
+    def endpoint(self) -> str:
+        return f"127.0.0.1:{self.port}"
+
+    def Export(self, request, context):  # noqa: N802 - gRPC method name
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self.requests += 1
+            if self.fail_with is not None:
+                context.abort(self.fail_with, "injected failure")
+            self.spans += sum(
+                len(scope_spans.spans)
+                for resource_spans in request.resource_spans
+                for scope_spans in resource_spans.scope_spans
+            )
+        return trace_service_pb2.ExportTraceServiceResponse()
+
+    def start(self) -> "StandInCollector":
+        self._server.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.stop(grace=None)
+
+
+class StandInAgentInfoServer:
+    """
+    In-process HTTP server answering the control plane agent-info and runtime config endpoints.
+
+    The runtime config endpoint honours If-None-Match against a version ETag and
+    the wait parameter of long polls.
+    """
+
+    def __init__(self, agent_info: Optional[dict[str, Any]] = None, runtime_config: Optional[dict[str, Any]] = None):
+        """
+        Bind the server to a free local port (call start() to serve).
+
+        Args:
+            agent_info: Agent info returned to clients
+            runtime_config: Runtime settings document returned to clients (change it with set_runtime_config)
+        """
+        self.agent_info = agent_info or {
+            "id": "standin-agent",
+            "name": "standin-agent",
+            "organization_id": "standin-org",
+            "workspace_id": "standin-workspace",
+        }
+        self.requests = 0
+        self.not_modified = 0
+        self._runtime_config = runtime_config or {}
+        self._version = 1
+        self._changed = threading.Condition()
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server method name
+                server.requests += 1
+                url = urlsplit(self.path)
+                if url.path == "/api/v1/agent_instance/info":
+                    self._send_json(server.agent_info)
+                elif url.path == "/api/v1/agent_instance/config":
+                    wait = float(parse_qs(url.query).get("wait", ["0"])[0])
+                    etag, document = server._wait_for_config(self.headers.get("If-None-Match"), wait)
+                    if document is None:
+                        server.not_modified += 1
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.end_headers()
+                    else:
+                        self._send_json(document, etag)
+                else:
+                    self.send_error(404)
+
+            def _send_json(self, document: Any, etag: Optional[str] = None) -> None:
+                body = json.dumps(document).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def set_runtime_config(self, document: dict[str, Any]) -> None:
+        """Publish new runtime settings, answering any long polls waiting for a change."""
+        with self._changed:
+            self._runtime_config = document
+            self._version += 1
+            self._changed.notify_all()
+
+    def _wait_for_config(self, etag: Optional[str], wait: float) -> tuple[str, Optional[dict[str, Any]]]:
+        """Return the current (etag, document), with document None while etag is still current after wait."""
+        with self._changed:
+            self._changed.wait_for(lambda: etag != f'"{self._version}"', timeout=wait)
+            current = f'"{self._version}"'
+            return current, None if etag == current else self._runtime_config
+
+    def start(self) -> "StandInAgentInfoServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="value-standin-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
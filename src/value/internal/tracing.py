@@ -1,12 +1,76 @@
 """OpenTelemetry tracing initialization."""
 
+import threading
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field, fields, replace
+from typing import Optional
+
+import grpc
 from opentelemetry import trace
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, SynchronousMultiSpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExportResult
 
+from .balancing import BalancedSpanExporter, ConcurrentSpanExporter
+from .buffering import ThreadBufferedSpanProcessor
+from .config import SDKConfig
+from .delivery import DeliveryTracker, TrackingSpanExporter
+from .file_export import FileSpanExporter
+from .filtering import FilterRules, FilterSpanProcessor
+from .lanes import LaneSpanProcessor, default_lanes
+from .latency import LatencyAnalyzerSpanProcessor
+from .otlp_encoder import DirectOTLPSpanExporter
+from .overload import OverloadController, OverloadSpanProcessor, OverloadThresholds
+from .payloads import FileBlobSink, PayloadOffloader, PayloadSpanProcessor
+from .redaction import RedactionSpanProcessor, Redactor
+from .remote_config import RuntimeConfig, RuntimeSampler
+from .resilience import CircuitBreaker, ResilientSpanExporter
+from .shipper import ShipperSpanExporter
+from .shutdown import CountingSpanExporter, EndedSpanCounter, ExportStats, ShutdownReport, shutdown_processors
 from .span_processor import UserContextSpanProcessor
+from .stack_profiler import StackSamplingProfiler
+
+
+@dataclass
+class TracingPipeline:
+    """The tracer together with the provider and export processors behind it."""
+
+    tracer: trace.Tracer
+    provider: TracerProvider
+    export_processors: list[SpanProcessor] = field(default_factory=list)
+    stats: ExportStats = field(default_factory=ExportStats)
+    latency_analyzer: Optional[LatencyAnalyzerSpanProcessor] = None
+    stack_profiler: Optional[StackSamplingProfiler] = None
+    redactor: Optional[Redactor] = None
+    span_processors: list[SpanProcessor] = field(default_factory=list)
+    delivery_tracker: Optional[DeliveryTracker] = None
+    overload: Optional[OverloadController] = None
+    shared: Optional["SharedTracingPipeline"] = None
+    _report: Optional[ShutdownReport] = None
+
+    def shutdown(self, timeout: float = 5.0) -> ShutdownReport:
+        """
+        Flush and shut down the export processors in parallel under one deadline.
+
+        Safe to call more than once; later calls return the first report.
+
+        Args:
+            timeout: Overall deadline in seconds
+
+        Returns:
+            A report of how many spans were flushed and how many were lost
+        """
+        if self._report is None and self.shared is not None:
+            self._report = self.shared.release(timeout=timeout)
+        if self._report is None:
+            if self.stack_profiler is not None:
+                self.stack_profiler.shutdown()
+            if self.overload is not None:
+                # Stopping flushes pending action rollups into the processors
+                self.overload.stop()
+            self._report = shutdown_processors(self.export_processors, self.stats, timeout=timeout)
+        return self._report
 
 
 def initialize_tracing(
@@ -14,7 +78,10 @@ def initialize_tracing(
     service_name: str = "value-control-agent",
     console_export: bool = False,
     attributes: dict = None,
-) -> trace.Tracer:
+    delivery_tracker: Optional[DeliveryTracker] = None,
+    config: Optional[SDKConfig] = None,
+    runtime: Optional[RuntimeConfig] = None,
+) -> TracingPipeline:
     """
     Initialize the OpenTelemetry tracer provider, processor, and exporter.
 
@@ -22,40 +89,394 @@ def initialize_tracing(
         endpoint: OTLP endpoint for trace export
         service_name: Name of the service for resource attribution
         console_export: Enable console exporter for debugging
+        attributes: Additional resource attributes
+        delivery_tracker: Tracker whose receipts are resolved by the OTLP export results
+        config: SDK configuration for the export pipeline (defaults to SDKConfig())
+        runtime: Control plane settings sampling spans (kill switch and sample ratio)
 
     Returns:
-        Configured OpenTelemetry tracer
+        The configured tracing pipeline
     """
+    config = config or SDKConfig()
+
     # Create resource with service information
-    resource = Resource.create(
-        {
-            "service.name": service_name,
-            "service.version": "0.1.0",
-            "value.client.sdk": "value-python",
-            **attributes,
-        }
-    )
+    resource = _resource(service_name, attributes)
+
+    # Create tracer provider; the clients own shutdown so they can bound it with a deadline
+    provider = TracerProvider(resource=resource, sampler=_sampler(runtime), shutdown_on_exit=False)
+    stats = ExportStats()
+
+    # User context span processor (must be first to run on all spans)
+    span_processors: list[SpanProcessor] = [UserContextSpanProcessor()]
+
+    latency_analyzer = None
+    if config.latency_analysis:
+        latency_analyzer = LatencyAnalyzerSpanProcessor(max_spans_per_context=config.latency_max_spans)
+        span_processors.append(latency_analyzer)
 
-    # Create tracer provider
-    provider = TracerProvider(resource=resource)
+    stack_profiler = None
+    if config.stack_profiling:
+        stack_profiler = StackSamplingProfiler(
+            threshold=config.stack_profile_threshold,
+            interval=config.stack_profile_interval,
+            max_cpu_percent=config.stack_profile_max_cpu,
+        )
+        stack_profiler.tracer = provider.get_tracer("value.profiler")
+        span_processors.append(stack_profiler)
 
-    # Add user context span processor (must be first to run on all spans)
-    user_context_processor = UserContextSpanProcessor()
-    provider.add_span_processor(user_context_processor)
+    def _on_drop(spans) -> None:
+        stats.record_export(len(spans), SpanExportResult.FAILURE)
+        if delivery_tracker is not None:
+            delivery_tracker.fail(spans, "Action dropped before it could be exported")
 
-    # Create and add OTLP exporter
-    otlp_exporter = OTLPSpanExporter(endpoint=endpoint, insecure=True)
-    otlp_processor = BatchSpanProcessor(otlp_exporter)
-    provider.add_span_processor(otlp_processor)
+    def _on_discard(spans) -> None:
+        # Filtered and shed spans are discarded on purpose: they fail their receipts but are not counted as lost
+        if delivery_tracker is not None and len(delivery_tracker):
+            delivery_tracker.fail(spans, "Action discarded by a span filter or under load")
+
+    if config.exporter == "file":
+        # Local files for air-gapped/batch environments; replay them with `python -m value ship`
+        otlp_exporter = FileSpanExporter(
+            directory=config.file_export_dir,
+            fmt=config.file_export_format,
+            max_bytes=config.file_export_max_bytes,
+            max_age=config.file_export_max_age,
+        )
+        if delivery_tracker is not None:
+            otlp_exporter = TrackingSpanExporter(otlp_exporter, delivery_tracker)
+        otlp_exporter = CountingSpanExporter(otlp_exporter, stats)
+    elif config.exporter == "shipper":
+        # Encoded batches go to a local shipper process, which batches, retries and exports them
+        otlp_exporter = ShipperSpanExporter(
+            endpoint=endpoint,
+            ring=config.shipper_ring or None,
+            ring_bytes=config.shipper_ring_bytes,
+            drain_timeout=config.shutdown_timeout,
+        )
+        if delivery_tracker is not None:
+            otlp_exporter = TrackingSpanExporter(otlp_exporter, delivery_tracker)
+        otlp_exporter = CountingSpanExporter(otlp_exporter, stats)
+    else:
+        # A short per-export timeout bounds the gRPC exporter's own retry sleeps;
+        # backoff across batches is handled by the circuit breaker instead.
+        balanced = bool(config.otel_endpoints) or config.export_concurrency > 1
+        if balanced:
+            otlp_exporter = BalancedSpanExporter(
+                config.otel_endpoints or (endpoint,),
+                channels_per_endpoint=config.export_channels,
+                timeout=config.export_timeout,
+                compression=config.export_compression,
+                failure_threshold=config.breaker_failure_threshold,
+                backoff_base=config.breaker_backoff_base,
+                backoff_max=config.breaker_backoff_max,
+            )
+        elif config.direct_encoding:
+            otlp_exporter = DirectOTLPSpanExporter(
+                endpoint=endpoint, timeout=config.export_timeout, compression=config.export_compression
+            )
+        else:
+            otlp_exporter = OTLPSpanExporter(
+                endpoint=endpoint,
+                insecure=True,
+                timeout=config.export_timeout,
+                # None leaves it to OTEL_EXPORTER_OTLP_COMPRESSION
+                compression=grpc.Compression.Gzip if config.export_compression else None,
+            )
+        if delivery_tracker is not None:
+            otlp_exporter = TrackingSpanExporter(otlp_exporter, delivery_tracker, fail_on_error=False)
+        otlp_exporter = CountingSpanExporter(otlp_exporter, stats, count_failures=False)
+        otlp_exporter = ResilientSpanExporter(
+            otlp_exporter,
+            # The balanced exporter has a breaker per endpoint and only fails once every endpoint
+            # is out of rotation; a second breaker here would stack its backoff on top, so it only spools
+            breaker=CircuitBreaker(
+                failure_threshold=0 if balanced else config.breaker_failure_threshold,
+                backoff_base=config.breaker_backoff_base,
+                backoff_max=config.breaker_backoff_max,
+            ),
+            spool_size=config.export_spool_size,
+            on_drop=_on_drop,
+        )
+        if config.export_concurrency > 1:
+            otlp_exporter = ConcurrentSpanExporter(
+                otlp_exporter, max_in_flight=config.export_concurrency, shutdown_timeout=config.shutdown_timeout
+            )
+    if config.priority_lanes:
+        otlp_processor = LaneSpanProcessor(
+            otlp_exporter,
+            lanes=default_lanes(queue_size=config.lane_queue_size, action_queue_size=config.action_lane_queue_size),
+            max_total_spans=config.lane_max_total_spans,
+            on_drop=_on_drop,
+        )
+    elif config.thread_buffers:
+        otlp_processor = ThreadBufferedSpanProcessor(
+            otlp_exporter, buffer_size=config.thread_buffer_size, on_drop=_on_drop
+        )
+    else:
+        otlp_processor = BatchSpanProcessor(otlp_exporter)
+    overload = None
+    if config.overload_control:
+        overload = OverloadController(
+            stats,
+            queue_capacity=_queue_capacity(otlp_processor),
+            thresholds=OverloadThresholds(cpu=config.overload_cpu_threshold),
+            interval=config.overload_interval,
+            max_level=config.overload_max_level,
+            recover_ticks=config.overload_recover_ticks,
+            keep_actions=config.overload_keep_actions,
+        ).start()
+    # Spans are counted after filtering so filtered spans are not reported as lost on shutdown
+    filter_rules = FilterRules(
+        drop_spans=config.filter_drop_spans,
+        drop_scopes=config.filter_drop_scopes,
+        drop_attributes=config.filter_drop_attributes,
+        truncate_attributes=config.filter_truncate_attributes,
+        max_attribute_length=config.filter_max_attribute_length,
+        collapse_spans=config.filter_collapse_spans,
+    )
+    redactor = None
+    if config.redaction:
+        redactor = Redactor(rules=config.redaction_rules, skip_attributes=config.redaction_skip_attributes)
+    offloader = None
+    if config.payload_offload:
+        offloader = PayloadOffloader(
+            max_inline_bytes=config.payload_max_inline_bytes,
+            preview_chars=config.payload_preview_chars,
+            dedupe_attributes=config.payload_dedupe_attributes,
+            sink=FileBlobSink(config.payload_blob_dir) if config.payload_blob_dir else None,
+        )
+    otlp_chain = _filtered(
+        [EndedSpanCounter(stats), otlp_processor], filter_rules, offloader, redactor, on_discard=_on_discard
+    )
+    if overload is not None:
+        # Shed ahead of filtering and redaction, so spans that are dropped cost nothing more
+        otlp_chain = OverloadSpanProcessor(
+            otlp_chain, overload, instrumentation_ratio=config.overload_instrumentation_ratio, on_drop=_on_discard
+        )
+    export_processors: list[SpanProcessor] = [otlp_chain]
 
     # Optionally add console exporter for debugging
     if console_export:
         console_exporter = ConsoleSpanExporter()
         console_processor = BatchSpanProcessor(console_exporter)
-        provider.add_span_processor(console_processor)
+        export_processors.append(_filtered([console_processor], filter_rules, redactor=redactor))
+
+    span_processors.extend(export_processors)
+    for processor in span_processors:
+        provider.add_span_processor(processor)
 
     # Set as global tracer provider
     trace.set_tracer_provider(provider)
 
-    # Return tracer instance
-    return trace.get_tracer(service_name)
+    return TracingPipeline(
+        tracer=provider.get_tracer(service_name),
+        provider=provider,
+        export_processors=export_processors,
+        span_processors=span_processors,
+        stats=stats,
+        latency_analyzer=latency_analyzer,
+        stack_profiler=stack_profiler,
+        redactor=redactor,
+        delivery_tracker=delivery_tracker,
+        overload=overload,
+    )
+
+
+def _sampler(runtime: Optional[RuntimeConfig]) -> Optional[RuntimeSampler]:
+    return RuntimeSampler(runtime) if runtime is not None else None
+
+
+def _resource(service_name: str, attributes: Optional[dict]) -> Resource:
+    return Resource.create(
+        {
+            "service.name": service_name,
+            "service.version": "0.1.0",
+            "value.client.sdk": "value-python",
+            **(attributes or {}),
+        }
+    )
+
+
+class SharedTracingPipeline:
+    """
+    One export pipeline shared by every client in the process that registers against it.
+
+    The span processors, exporter threads and connections are built once. Each
+    registered client gets its own TracerProvider, holding its resource
+    (service and value.agent.* attributes) and feeding the shared processors.
+    Its spans keep that resource through export, where each batch is grouped
+    per resource, and its tracer is scoped to the client, so a process hosting
+    100 agents still runs one exporter thread. The shared pipeline's own
+    provider, without agent attributes, is the global one used by
+    auto-instrumentation. It is shut down when the last client releases it.
+    """
+
+    def __init__(self, base: TracingPipeline, key: tuple):
+        """
+        Initialize the shared pipeline.
+
+        Args:
+            base: Pipeline built by initialize_tracing whose processors are shared
+            key: Registry key of the pipeline
+        """
+        self._base = base
+        self._key = key
+        self.clients = 0
+
+    @property
+    def base(self) -> TracingPipeline:
+        return self._base
+
+    def register(
+        self, service_name: str, attributes: Optional[dict] = None, runtime: Optional[RuntimeConfig] = None
+    ) -> TracingPipeline:
+        """
+        Return a client pipeline with its own provider, resource and sampler, feeding the shared processors.
+
+        The client must already be counted in `clients`, under the same hold of
+        the registry lock that found or created the pipeline, so a concurrent
+        release of the last client cannot shut it down in between.
+        """
+        provider = TracerProvider(
+            resource=_resource(service_name, attributes), sampler=_sampler(runtime), shutdown_on_exit=False
+        )
+        for processor in self._base.span_processors:
+            provider.add_span_processor(processor)
+        return replace(self._base, tracer=provider.get_tracer(service_name), provider=provider, shared=self)
+
+    def release(self, timeout: float = 5.0) -> ShutdownReport:
+        """
+        Release one client's registration.
+
+        The last client shuts the pipeline down; earlier ones only flush it, so
+        their report covers every client's spans flushed meanwhile.
+        """
+        with _shared_lock:
+            self.clients -= 1
+            last = self.clients <= 0
+            if last and _shared_pipelines.get(self._key) is self:
+                del _shared_pipelines[self._key]
+        if last:
+            return self._base.shutdown(timeout=timeout)
+        return shutdown_processors(self._base.export_processors, self._base.stats, timeout=timeout, shutdown=False)
+
+
+_shared_pipelines: dict[tuple, SharedTracingPipeline] = {}
+_shared_lock = threading.Lock()
+
+# SDKConfig fields read by the client rather than the export pipeline, so clients differing only in these share one
+_CLIENT_CONFIG_FIELDS = frozenset(
+    {
+        "otel_endpoint",
+        "backend_url",
+        "service_name",
+        "enable_console_export",
+        "event_actions",
+        "handle_sigterm",
+        "profile_actions",
+        "profile_memory",
+        "shared_pipeline",
+        "remote_config",
+        "remote_config_interval",
+        "remote_config_long_poll",
+        "quota_rate",
+        "quota_burst",
+        "quota_key",
+        "quota_overflow",
+        "quota_sample_ratio",
+        "quota_max_keys",
+        "quota_report_interval",
+    }
+)
+
+
+def _pipeline_key(endpoint: str, console_export: bool, config: Optional[SDKConfig]) -> tuple:
+    """Return the registry key of the shared pipeline built for endpoint with config's export settings."""
+    config = config or SDKConfig()
+    settings = tuple(
+        (item.name, getattr(config, item.name)) for item in fields(config) if item.name not in _CLIENT_CONFIG_FIELDS
+    )
+    return (endpoint, console_export, settings)
+
+
+def register_tracing(
+    endpoint: str,
+    service_name: str = "value-control-agent",
+    console_export: bool = False,
+    attributes: dict = None,
+    config: Optional[SDKConfig] = None,
+    runtime: Optional[RuntimeConfig] = None,
+) -> TracingPipeline:
+    """
+    Register a client against the process's shared export pipeline for endpoint.
+
+    Pipelines are keyed by the endpoint and the export settings of config
+    (exporter, lanes, filters, redaction, ...), so clients configured
+    differently get separate pipelines. The first registration with a key
+    builds the pipeline and installs its provider globally; later ones reuse
+    it. The returned
+    pipeline's delivery tracker is shared by all the clients, and its shutdown()
+    releases the registration. Each client's spans follow its own runtime
+    settings; the global provider follows those of the first client.
+
+    Args:
+        endpoint: OTLP endpoint for trace export
+        service_name: Name of the service for resource attribution
+        console_export: Enable console exporter for debugging
+        attributes: Resource attributes of this client (value.agent.*)
+        config: SDK configuration for the export pipeline (defaults to SDKConfig())
+        runtime: Control plane settings sampling this client's spans
+
+    Returns:
+        The client's tracing pipeline
+    """
+    key = _pipeline_key(endpoint, console_export, config)
+    with _shared_lock:
+        shared = _shared_pipelines.get(key)
+        if shared is None:
+            base = initialize_tracing(
+                endpoint=endpoint,
+                service_name=service_name,
+                console_export=console_export,
+                attributes={},
+                delivery_tracker=DeliveryTracker(),
+                config=config,
+                runtime=runtime,
+            )
+            shared = _shared_pipelines[key] = SharedTracingPipeline(base, key)
+        shared.clients += 1
+    return shared.register(service_name, attributes, runtime)
+
+
+def _queue_capacity(processor: SpanProcessor) -> int:
+    """Return the number of spans the export processor queues before dropping them."""
+    if isinstance(processor, BatchSpanProcessor):
+        # Older SDKs expose max_queue_size; newer ones keep it on the batch processor they delegate to
+        inner = getattr(processor, "_batch_processor", processor)
+        return getattr(inner, "max_queue_size", None) or inner._max_queue_size
+    return processor.max_queue_size
+
+
+def _filtered(
+    processors: list[SpanProcessor],
+    rules: FilterRules,
+    offloader: Optional[PayloadOffloader] = None,
+    redactor: Optional[Redactor] = None,
+    on_discard: Optional[Callable[[Sequence[ReadableSpan]], None]] = None,
+) -> SpanProcessor:
+    """Combine processors into one, behind the payload, redaction and filter processors that are configured."""
+    if len(processors) == 1:
+        combined = processors[0]
+    else:
+        combined = SynchronousMultiSpanProcessor()
+        for processor in processors:
+            combined.add_span_processor(processor)
+    if offloader is not None:
+        # Offload after filtering, so dropped attributes are never hashed or written
+        combined = PayloadSpanProcessor(combined, offloader)
+    if redactor is not None:
+        # Redact before offloading, so blob bodies are redacted too
+        combined = RedactionSpanProcessor(combined, redactor)
+    if rules.is_empty():
+        return combined
+    return FilterSpanProcessor(combined, rules, on_drop=on_discard)
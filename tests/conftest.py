@@ -0,0 +1,38 @@
+"""Shared fixtures for the SDK tests."""
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from value.internal.span_processor import UserContextSpanProcessor
+from value.internal.standins import StandInCollector
+
+
+@pytest.fixture
+def span_exporter() -> InMemorySpanExporter:
+    """In-memory exporter collecting every span ended by the `tracer` fixture."""
+    return InMemorySpanExporter()
+
+
+@pytest.fixture
+def tracer_provider(span_exporter: InMemorySpanExporter) -> TracerProvider:
+    """Tracer provider with the user context processor and a synchronous in-memory exporter."""
+    provider = TracerProvider()
+    provider.add_span_processor(UserContextSpanProcessor())
+    provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+    return provider
+
+
+@pytest.fixture
+def tracer(tracer_provider: TracerProvider):
+    """Tracer bound to the local `tracer_provider` (not the global one)."""
+    return tracer_provider.get_tracer("value-tests")
+
+
+@pytest.fixture
+def collector():
+    """Running stand-in OTLP collector."""
+    instance = StandInCollector().start()
+    yield instance
+    instance.stop()
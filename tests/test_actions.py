@@ -0,0 +1,180 @@
+"""Tests for action emission."""
+
+import json
+import threading
+import time
+
+from value.internal.actions import ActionContext, ActionEmitter
+
+
+def test_send_creates_action_span(tracer, span_exporter) -> None:
+    """Test that an action is exported as a standalone value.action span."""
+    emitter = ActionEmitter(tracer=tracer)
+    emitter.send(action_name="checkout", anonymous_id="anon1", user_id="user1", plan="pro")
+
+    (span,) = span_exporter.get_finished_spans()
+    assert span.name == "value.action"
+    assert span.attributes["value.action.name"] == "checkout"
+    assert span.attributes["value.action.user_id"] == "user1"
+    assert json.loads(span.attributes["value.action.user_attributes"]) == {"plan": "pro"}
+
+
+def test_send_normalizes_large_attributes(tracer, span_exporter) -> None:
+    """Test that embeddings and arbitrary objects are summarized instead of breaking json.dumps."""
+    emitter = ActionEmitter(tracer=tracer)
+    emitter.send(action_name="retrieve", anonymous_id="anon1", embedding=[0.5] * 4096, source=object())
+
+    (span,) = span_exporter.get_finished_spans()
+    user_attributes = json.loads(span.attributes["value.action.user_attributes"])
+    assert user_attributes["embedding"] == {
+        "type": "list",
+        "length": 4096,
+        "min": 0.5,
+        "max": 0.5,
+        "mean": 0.5,
+        "norm": 32.0,
+    }
+    assert user_attributes["source"].startswith("<object object")
+
+
+def test_user_attributes_share_one_size_budget(tracer, span_exporter) -> None:
+    """Test that many large user attributes are held to one total size."""
+    emitter = ActionEmitter(tracer=tracer)
+    attributes = {f"attr_{i}": {f"k{j}": "x" * 5000 for j in range(100)} for i in range(100)}
+    emitter.send(action_name="dump", anonymous_id="anon1", **attributes)
+
+    (span,) = span_exporter.get_finished_spans()
+    user_attributes = json.loads(span.attributes["value.action.user_attributes"])
+    assert len(span.attributes["value.action.user_attributes"]) < 80000
+    assert user_attributes["__truncated__"] > 0
+
+
+def test_send_as_event_on_active_span(tracer, span_exporter) -> None:
+    """Test that as_event attaches the action to the active span."""
+    emitter = ActionEmitter(tracer=tracer)
+    with tracer.start_as_current_span("llm.call"):
+        with ActionContext(emitter=emitter, anonymous_id="anon1", user_id="user1") as ctx:
+            ctx.send(action_name="tool_used", as_event=True, tool="search")
+
+    (span,) = span_exporter.get_finished_spans()
+    assert span.name == "llm.call"
+    (event,) = span.events
+    assert event.name == "value.action"
+    assert event.attributes["value.action.name"] == "tool_used"
+    assert event.attributes["value.action.anonymous_id"] == "anon1"
+
+
+def test_event_actions_configured_by_name(tracer, span_exporter) -> None:
+    """Test that configured event actions are recorded as events by default."""
+    emitter = ActionEmitter(tracer=tracer, event_actions=["tool_used"])
+    with tracer.start_as_current_span("llm.call"):
+        emitter.send(action_name="tool_used", anonymous_id="anon1")
+        emitter.send(action_name="checkout", anonymous_id="anon1")
+        emitter.send(action_name="tool_used", anonymous_id="anon1", as_event=False)
+
+    names = [span.name for span in span_exporter.get_finished_spans()]
+    assert names == ["value.action", "value.action", "llm.call"]
+    assert len(span_exporter.get_finished_spans()[-1].events) == 1
+
+
+def test_send_as_event_falls_back_without_active_span(tracer, span_exporter) -> None:
+    """Test that event mode falls back to a standalone span when no span is active."""
+    emitter = ActionEmitter(tracer=tracer)
+    emitter.send(action_name="tool_used", anonymous_id="anon1", as_event=True)
+
+    (span,) = span_exporter.get_finished_spans()
+    assert span.name == "value.action"
+    assert span.attributes["value.action.name"] == "tool_used"
+
+
+def test_coalesced_context_exports_one_batch_span(tracer, span_exporter) -> None:
+    """Test that coalesced sends are exported as one batch span on exit."""
+    emitter = ActionEmitter(tracer=tracer)
+    with ActionContext(emitter=emitter, anonymous_id="anon1", user_id="user1", coalesce=True, pipeline="ocr") as ctx:
+        ctx.send(action_name="detect", boxes=3)
+        ctx.send(action_name="classify", **{"value.action.description": "invoice"})
+        assert span_exporter.get_finished_spans() == ()
+
+    (span,) = span_exporter.get_finished_spans()
+    assert span.name == "value.action.batch"
+    assert span.attributes["value.action.batch.size"] == 2
+    assert span.attributes["value.action.user_id"] == "user1"
+    assert json.loads(span.attributes["value.action.context_attributes"]) == {"pipeline": "ocr"}
+    assert [event.attributes["value.action.name"] for event in span.events] == ["detect", "classify"]
+    assert "value.action.user_id" not in span.events[0].attributes
+    assert json.loads(span.events[0].attributes["value.action.user_attributes"]) == {"boxes": 3}
+
+
+def test_coalesced_context_flushes_at_size_cap(tracer, span_exporter) -> None:
+    """Test that reaching coalesce_max_actions forces an early flush."""
+    emitter = ActionEmitter(tracer=tracer)
+    with ActionContext(emitter=emitter, anonymous_id="anon1", coalesce=True, coalesce_max_actions=2) as ctx:
+        for index in range(5):
+            ctx.send(action_name=f"step_{index}")
+        assert len(span_exporter.get_finished_spans()) == 2
+
+    sizes = [span.attributes["value.action.batch.size"] for span in span_exporter.get_finished_spans()]
+    assert sizes == [2, 2, 1]
+
+
+def test_coalesced_context_flushes_at_age_cap(tracer, span_exporter) -> None:
+    """Test that an expired buffer is flushed on the next send."""
+    emitter = ActionEmitter(tracer=tracer)
+    with ActionContext(emitter=emitter, anonymous_id="anon1", coalesce=True, coalesce_max_age=0) as ctx:
+        ctx.send(action_name="step")
+        assert len(span_exporter.get_finished_spans()) == 1
+
+
+def test_coalesced_context_flushes_on_timer_without_further_sends(tracer, span_exporter) -> None:
+    """Test that the age cap flushes the buffer even if no further send comes, in the sender's trace."""
+    emitter = ActionEmitter(tracer=tracer)
+    with ActionContext(emitter=emitter, anonymous_id="anon1", coalesce=True, coalesce_max_age=0.05) as ctx:
+        with tracer.start_as_current_span("request") as request:
+            ctx.send(action_name="step")
+        deadline = time.monotonic() + 5
+        while len(span_exporter.get_finished_spans()) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        (batch,) = [span for span in span_exporter.get_finished_spans() if span.name == "value.action.batch"]
+        assert batch.parent.span_id == request.get_span_context().span_id
+
+
+def test_coalescing_contexts_share_one_flush_thread(tracer, span_exporter) -> None:
+    """Test that many open coalescing contexts are flushed by one thread rather than one timer each."""
+    emitter = ActionEmitter(tracer=tracer)
+    contexts = [ActionContext(emitter=emitter, anonymous_id=f"anon{index}", coalesce=True) for index in range(50)]
+    for context in contexts:
+        context.__enter__()
+        context.send(action_name="step")
+
+    assert len([thread for thread in threading.enumerate() if thread.name == "value-coalesce-flush"]) == 1
+    for context in reversed(contexts):
+        context.__exit__(None, None, None)
+    assert len(span_exporter.get_finished_spans()) == 50
+
+
+def test_coalesced_context_records_configured_event_actions_as_events(tracer, span_exporter) -> None:
+    """Test that event_actions are recorded on the active span rather than coalesced into a batch."""
+    emitter = ActionEmitter(tracer=tracer, event_actions=["tool_used"])
+    with ActionContext(emitter=emitter, anonymous_id="anon1", coalesce=True) as ctx:
+        with tracer.start_as_current_span("request"):
+            ctx.send(action_name="tool_used")
+
+    (span,) = span_exporter.get_finished_spans()
+    assert span.name == "request"
+    assert span.events[0].attributes["value.action.name"] == "tool_used"
+
+
+def test_nested_context_inherits_user_ids(tracer, span_exporter) -> None:
+    """Test that a nested action context only overrides the IDs it sets."""
+    emitter = ActionEmitter(tracer=tracer)
+    with ActionContext(emitter, anonymous_id="anon-1", user_id="user-1"):
+        with ActionContext(emitter, anonymous_id="anon-2"):
+            with tracer.start_as_current_span("work"):
+                pass
+        with tracer.start_as_current_span("after"):
+            pass
+
+    spans = {span.name: span for span in span_exporter.get_finished_spans()}
+    assert spans["work"].attributes["value.action.user_id"] == "user-1"
+    assert spans["work"].attributes["value.action.anonymous_id"] == "anon-2"
+    assert spans["after"].attributes["value.action.anonymous_id"] == "anon-1"
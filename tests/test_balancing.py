@@ -0,0 +1,133 @@
+"""Tests for multi-endpoint balancing, failover and concurrent export."""
+
+import threading
+import time
+
+import grpc
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from value.internal.balancing import BalancedSpanExporter, ConcurrentSpanExporter
+from value.internal.resilience import OPEN
+from value.internal.standins import StandInCollector
+
+
+def make_spans(count: int) -> list:
+    tracer = TracerProvider(shutdown_on_exit=False).get_tracer("value-tests")
+    spans = []
+    for index in range(count):
+        span = tracer.start_span(f"span_{index}")
+        span.end()
+        spans.append(span)
+    return spans
+
+
+def test_batches_are_spread_over_endpoints(collector) -> None:
+    """Test that concurrent exports use every endpoint."""
+    other = StandInCollector().start()
+    collector.delay = other.delay = 0.05
+    exporter = BalancedSpanExporter([collector.endpoint, other.endpoint], channels_per_endpoint=2)
+    try:
+        threads = [threading.Thread(target=exporter.export, args=(make_spans(2),)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert collector.spans + other.spans == 16
+        assert collector.requests and other.requests
+    finally:
+        exporter.shutdown()
+        other.stop()
+
+
+def test_failed_endpoint_fails_over_and_leaves_rotation(collector) -> None:
+    """Test that a failing endpoint's batches go to a healthy one, and that it is skipped once its breaker opens."""
+    healthy = StandInCollector().start()
+    collector.fail_with = grpc.StatusCode.UNAVAILABLE
+    exporter = BalancedSpanExporter([collector.endpoint, healthy.endpoint], failure_threshold=2, backoff_base=60)
+    try:
+        for _ in range(6):
+            assert exporter.export(make_spans(1)) == SpanExportResult.SUCCESS
+
+        assert healthy.spans == 6
+        assert collector.requests == 2
+        stats = {entry["endpoint"]: entry for entry in exporter.endpoint_stats()}
+        assert stats[collector.endpoint]["state"] == OPEN
+        assert stats[healthy.endpoint]["exported"] == 6
+    finally:
+        exporter.shutdown()
+        healthy.stop()
+
+
+def test_export_fails_when_every_endpoint_is_down() -> None:
+    """Test that the batch fails once no endpoint accepted it, leaving spooling to the caller."""
+    exporter = BalancedSpanExporter(["127.0.0.1:1", "127.0.0.1:2"], timeout=0.2)
+
+    assert exporter.export(make_spans(1)) == SpanExportResult.FAILURE
+    assert [entry["failed"] for entry in exporter.endpoint_stats()] == [1, 1]
+    exporter.shutdown()
+
+
+class BlockingExporter(SpanExporter):
+    def __init__(self):
+        self.release = threading.Event()
+        self.active = 0
+        self.peak = 0
+        self.exported = 0
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        self.release.wait(5)
+        with self._lock:
+            self.active -= 1
+            self.exported += len(spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def test_concurrent_exporter_bounds_batches_in_flight() -> None:
+    """Test that up to max_in_flight batches export at once and flush waits for all of them."""
+    inner = BlockingExporter()
+    exporter = ConcurrentSpanExporter(inner, max_in_flight=3)
+    for _ in range(3):
+        assert exporter.export(make_spans(1)) == SpanExportResult.SUCCESS
+
+    # A fourth batch waits for a free worker
+    fourth = threading.Thread(target=exporter.export, args=(make_spans(1),))
+    fourth.start()
+    fourth.join(0.2)
+    assert fourth.is_alive()
+    assert not exporter.force_flush(100)
+
+    inner.release.set()
+    fourth.join(5)
+    assert exporter.force_flush(5000)
+    assert inner.peak == 3
+    assert inner.exported == 4
+    exporter.shutdown()
+    assert exporter.export(make_spans(1)) == SpanExportResult.FAILURE
+
+
+def test_concurrent_exporter_shutdown_is_bounded_by_its_timeout() -> None:
+    """Test that shutdown abandons batches still queued behind a stuck export after shutdown_timeout."""
+    inner = BlockingExporter()
+    exporter = ConcurrentSpanExporter(inner, max_in_flight=1, shutdown_timeout=0.1)
+    exporter.export(make_spans(1))
+    queued = threading.Thread(target=exporter.export, args=(make_spans(1),))
+    queued.start()
+
+    started = time.monotonic()
+    exporter.shutdown()
+    assert time.monotonic() - started < 2
+    inner.release.set()
+    queued.join(5)
+    assert inner.exported <= 1
@@ -0,0 +1,76 @@
+"""Tests for the per-thread buffered span processor."""
+
+import threading
+import time
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from value.internal.buffering import ThreadBufferedSpanProcessor
+
+
+def make_tracer(processor: ThreadBufferedSpanProcessor):
+    provider = TracerProvider(shutdown_on_exit=False)
+    provider.add_span_processor(processor)
+    return provider.get_tracer("value-tests")
+
+
+def test_spans_from_many_threads_exported_once() -> None:
+    """Test that force_flush exports full and partial buffers of every thread exactly once."""
+    exporter = InMemorySpanExporter()
+    processor = ThreadBufferedSpanProcessor(exporter, buffer_size=16, max_export_batch_size=64, schedule_delay=30)
+    tracer = make_tracer(processor)
+
+    def _emit(thread_index: int) -> None:
+        for index in range(101):
+            tracer.start_span(f"span_{thread_index}_{index}").end()
+
+    threads = [threading.Thread(target=_emit, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert processor.force_flush(5000)
+    names = [span.name for span in exporter.get_finished_spans()]
+    assert len(names) == 8 * 101
+    assert len(set(names)) == len(names)
+    processor.shutdown()
+
+
+def test_partial_buffer_drained_on_schedule() -> None:
+    """Test that spans of an idle thread are exported without waiting for a full buffer."""
+    exporter = InMemorySpanExporter()
+    processor = ThreadBufferedSpanProcessor(exporter, buffer_size=64, schedule_delay=0.05)
+    tracer = make_tracer(processor)
+    tracer.start_span("lonely").end()
+
+    deadline = time.monotonic() + 2
+    while not exporter.get_finished_spans() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [span.name for span in exporter.get_finished_spans()] == ["lonely"]
+    processor.shutdown()
+
+
+def test_queue_overflow_reported_and_shutdown_drains() -> None:
+    """Test that hand-offs beyond max_queue_size are dropped and the rest is exported at shutdown."""
+    exporter = InMemorySpanExporter()
+    dropped = []
+    processor = ThreadBufferedSpanProcessor(
+        exporter,
+        buffer_size=4,
+        max_queue_size=8,
+        max_export_batch_size=1000,
+        schedule_delay=30,
+        on_drop=dropped.extend,
+    )
+    tracer = make_tracer(processor)
+    for index in range(14):
+        tracer.start_span(f"span_{index}").end()
+
+    # Two buffers fill the queue, the third is dropped and two spans are still buffered
+    assert len(dropped) == 4
+    processor.force_flush(5000)
+    assert len(exporter.get_finished_spans()) == 10
+    assert len(dropped) == 4
+    processor.shutdown()
@@ -0,0 +1,130 @@
+"""Tests for delivery receipts."""
+
+import asyncio
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from value import DeliveryError
+from value.internal.actions import ActionContext, ActionEmitter
+from value.internal.delivery import DeliveryTracker, TrackingSpanExporter
+from value.internal.filtering import FilterRules, FilterSpanProcessor
+from value.internal.remote_config import RuntimeConfig, RuntimeSampler, RuntimeSettings
+
+
+class FailingSpanExporter(SpanExporter):
+    """Exporter that rejects every batch."""
+
+    def export(self, spans):
+        return SpanExportResult.FAILURE
+
+
+def make_emitter(exporter: SpanExporter, awaitable_receipts: bool = False) -> tuple[ActionEmitter, DeliveryTracker]:
+    tracker = DeliveryTracker()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(TrackingSpanExporter(exporter, tracker)))
+    emitter = ActionEmitter(
+        tracer=provider.get_tracer("value-tests"),
+        delivery_tracker=tracker,
+        awaitable_receipts=awaitable_receipts,
+    )
+    return emitter, tracker
+
+
+def test_receipt_resolves_on_export() -> None:
+    """Test that a receipt resolves once the exporter acknowledges the span."""
+    emitter, tracker = make_emitter(InMemorySpanExporter())
+    receipt = emitter.send(action_name="charge", anonymous_id="anon1", receipt=True)
+
+    assert receipt.result(timeout=1) is True
+    assert len(tracker) == 0
+
+
+def test_no_receipt_by_default() -> None:
+    """Test that send returns None and allocates nothing unless asked."""
+    emitter, tracker = make_emitter(InMemorySpanExporter())
+    assert emitter.send(action_name="charge", anonymous_id="anon1") is None
+    assert len(tracker) == 0
+
+
+def test_receipt_fails_on_export_failure() -> None:
+    """Test that a receipt fails when the exporter rejects the batch."""
+    emitter, _ = make_emitter(FailingSpanExporter())
+    receipt = emitter.send(action_name="charge", anonymous_id="anon1", receipt=True)
+
+    with pytest.raises(DeliveryError):
+        receipt.result(timeout=1)
+
+
+def test_pending_receipts_fail_on_shutdown() -> None:
+    """Test that receipts still pending at shutdown are failed."""
+    tracker = DeliveryTracker()
+    future = tracker.register(span_id=1234)
+    TrackingSpanExporter(InMemorySpanExporter(), tracker).shutdown()
+
+    with pytest.raises(DeliveryError):
+        future.result(timeout=1)
+
+
+def test_coalesced_receipts_resolve_with_batch() -> None:
+    """Test that receipts for coalesced sends resolve when the batch span is exported."""
+    emitter, _ = make_emitter(InMemorySpanExporter())
+    with ActionContext(emitter=emitter, anonymous_id="anon1", coalesce=True) as ctx:
+        receipts = [ctx.send(action_name=f"step_{index}", receipt=True) for index in range(3)]
+        assert not any(receipt.done() for receipt in receipts)
+
+    assert all(receipt.result(timeout=1) for receipt in receipts)
+
+
+def test_receipt_without_tracker_raises(tracer) -> None:
+    """Test that asking for a receipt without a tracker is an error."""
+    emitter = ActionEmitter(tracer=tracer)
+    with pytest.raises(ValueError):
+        emitter.send(action_name="charge", anonymous_id="anon1", receipt=True)
+
+
+@pytest.mark.asyncio
+async def test_awaitable_receipts() -> None:
+    """Test that the async client's receipts can be awaited together."""
+    emitter, _ = make_emitter(InMemorySpanExporter(), awaitable_receipts=True)
+    receipts = [emitter.send(action_name="charge", anonymous_id="anon1", receipt=True) for _ in range(3)]
+
+    assert await asyncio.gather(*receipts) == [True, True, True]
+
+
+def test_receipt_fails_at_once_when_the_span_is_sampled_out() -> None:
+    """Test that a span the sampler drops fails its receipt instead of leaving it pending."""
+    tracker = DeliveryTracker()
+    provider = TracerProvider(sampler=RuntimeSampler(RuntimeConfig(RuntimeSettings(sample_ratio=0.0))))
+    provider.add_span_processor(SimpleSpanProcessor(TrackingSpanExporter(InMemorySpanExporter(), tracker)))
+    emitter = ActionEmitter(tracer=provider.get_tracer("value-tests"), delivery_tracker=tracker)
+
+    receipt = emitter.send(action_name="charge", anonymous_id="anon1", receipt=True)
+    with ActionContext(emitter, anonymous_id="anon1", coalesce=True) as ctx:
+        coalesced = ctx.send(action_name="step", receipt=True)
+    for future in (receipt, coalesced):
+        with pytest.raises(DeliveryError):
+            future.result(timeout=0)
+    assert len(tracker) == 0
+
+
+def test_receipt_fails_when_a_filter_drops_the_span() -> None:
+    """Test that spans discarded by the filter processor fail their receipts."""
+    tracker = DeliveryTracker()
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(
+        FilterSpanProcessor(
+            SimpleSpanProcessor(TrackingSpanExporter(exporter, tracker)),
+            FilterRules(drop_spans=("value.action",)),
+            on_drop=lambda spans: tracker.fail(spans, "filtered"),
+        )
+    )
+    emitter = ActionEmitter(tracer=provider.get_tracer("value-tests"), delivery_tracker=tracker)
+
+    receipt = emitter.send(action_name="charge", anonymous_id="anon1", receipt=True)
+    with pytest.raises(DeliveryError):
+        receipt.result(timeout=0)
+    assert len(tracker) == 0
@@ -0,0 +1,87 @@
+"""Tests for carrying the action context into executors."""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from opentelemetry import trace
+
+from value import AsyncValueClient, ValueClient
+from value.internal.actions import ActionContext, ActionEmitter, _current_action_context
+from value.internal.executors import ContextPreservingExecutor
+from value.internal.span_processor import _user_context
+
+
+def child_context() -> tuple:
+    """Report the user context and trace parent seen inside a child process."""
+    span_context = trace.get_current_span().get_span_context()
+    return _user_context.get(), span_context.trace_id, span_context.span_id
+
+
+def test_thread_pool_spans_keep_attribution(tracer, span_exporter) -> None:
+    """Test that spans created in pool threads keep the user context and parent span."""
+    emitter = ActionEmitter(tracer=tracer)
+
+    def _tool_call(index: int) -> None:
+        with tracer.start_as_current_span(f"tool_{index}"):
+            pass
+
+    with ContextPreservingExecutor(ThreadPoolExecutor(max_workers=4)) as executor:
+        with ActionContext(emitter, anonymous_id="anon-1", user_id="user-1"):
+            with tracer.start_as_current_span("agent") as parent:
+                list(executor.map(_tool_call, range(4)))
+
+    spans = [span for span in span_exporter.get_finished_spans() if span.name.startswith("tool_")]
+    assert len(spans) == 4
+    for span in spans:
+        assert span.attributes["value.action.user_id"] == "user-1"
+        assert span.attributes["value.action.anonymous_id"] == "anon-1"
+        assert span.parent.span_id == parent.get_span_context().span_id
+
+
+def test_process_pool_restores_carrier(tracer) -> None:
+    """Test that a child process sees the submitter's user context and trace parent."""
+    emitter = ActionEmitter(tracer=tracer)
+    with ContextPreservingExecutor(ProcessPoolExecutor(max_workers=1)) as executor:
+        with ActionContext(emitter, anonymous_id="anon-2", user_id="user-2"):
+            with tracer.start_as_current_span("agent") as parent:
+                attributes, trace_id, span_id = executor.submit(child_context).result(timeout=30)
+
+    assert attributes == {"value.action.user_id": "user-2", "value.action.anonymous_id": "anon-2"}
+    assert trace_id == parent.get_span_context().trace_id
+    assert span_id == parent.get_span_context().span_id
+
+
+async def test_client_run_in_executor_default_pool(tracer) -> None:
+    """Test that run_in_executor on the default executor keeps the action context."""
+    client = AsyncValueClient(secret="test-secret")
+    emitter = ActionEmitter(tracer=tracer)
+    with ActionContext(emitter, anonymous_id="anon-3"):
+        attributes, _, _ = await client.run_in_executor(None, child_context)
+    assert attributes == {"value.action.anonymous_id": "anon-3"}
+    assert await asyncio.wait_for(client.run_in_executor(None, child_context), 5) == (None, 0, 0)
+
+
+def child_action_context() -> tuple:
+    """Report the action context seen inside a child process."""
+    context = _current_action_context.get()
+    return context._anonymous_id, context._user_id, context._attributes
+
+
+def test_process_pool_restores_action_context_ids(tracer) -> None:
+    """Test that a child process sees the submitting action context's IDs and attributes."""
+    emitter = ActionEmitter(tracer=tracer)
+    with ContextPreservingExecutor(ProcessPoolExecutor(max_workers=1)) as executor:
+        with ActionContext(emitter, anonymous_id="anon-4", user_id="user-4", tenant="acme"):
+            result = executor.submit(child_action_context).result(timeout=30)
+
+    assert result == ("anon-4", "user-4", {"tenant": "acme"})
+
+
+def test_sync_client_run_in_executor(tracer) -> None:
+    """Test that the sync client's run_in_executor keeps the action context."""
+    client = ValueClient(secret="test-secret")
+    emitter = ActionEmitter(tracer=tracer)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with ActionContext(emitter, anonymous_id="anon-5"):
+            attributes, _, _ = client.run_in_executor(executor, child_context).result(timeout=5)
+    assert attributes == {"value.action.anonymous_id": "anon-5"}
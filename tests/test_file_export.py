@@ -0,0 +1,180 @@
+"""Tests for the local file exporter and the ship replay tool."""
+
+import gzip
+import json
+import os
+import struct
+import time
+
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+from opentelemetry.sdk.trace import TracerProvider
+
+from value.__main__ import main
+from value.internal.file_export import (
+    FORMAT_NDJSON,
+    FileSpanExporter,
+    iter_ndjson_spans,
+    iter_otlp_records,
+    list_span_files,
+    span_from_json,
+)
+from value.internal.otlp_encoder import OTLPSpanEncoder
+from value.internal.ship import Checkpoint, ship
+
+
+def make_spans(count: int) -> list:
+    tracer = TracerProvider(shutdown_on_exit=False).get_tracer("value-tests")
+    spans = []
+    for index in range(count):
+        span = tracer.start_span(f"span_{index}", attributes={"value.action.name": "act"})
+        span.end()
+        spans.append(span)
+    return spans
+
+
+def write_files(directory: str, batches: int, per_batch: int, max_bytes: int = 1) -> None:
+    exporter = FileSpanExporter(str(directory), max_bytes=max_bytes)
+    for _ in range(batches):
+        exporter.export(make_spans(per_batch))
+    exporter.shutdown()
+
+
+def test_otlp_files_rotate_and_round_trip(tmp_path) -> None:
+    """Test that full files are rotated and their records decode as export requests."""
+    exporter = FileSpanExporter(str(tmp_path), max_bytes=1)
+    exporter.export(make_spans(3))
+    exporter.export(make_spans(2))
+    exporter.export(make_spans(1))
+
+    # Every batch fills a file, so each one is published as soon as it is written
+    assert len(list_span_files(str(tmp_path))) == 3
+    exporter.shutdown()
+    files = list_span_files(str(tmp_path))
+    assert not any(name.endswith(".part") for name in os.listdir(tmp_path))
+
+    counts = []
+    for path in files:
+        for record in iter_otlp_records(path):
+            request = ExportTraceServiceRequest.FromString(record)
+            counts.append(len(request.resource_spans[0].scope_spans[0].spans))
+    assert counts == [3, 2, 1]
+
+
+def test_ndjson_files(tmp_path) -> None:
+    """Test that the ndjson format writes one JSON object per span."""
+    exporter = FileSpanExporter(str(tmp_path), fmt=FORMAT_NDJSON, compress=False)
+    exporter.export(make_spans(2))
+    # Files still being written are not listed until they are rotated
+    assert list_span_files(str(tmp_path), FORMAT_NDJSON) == []
+    exporter.shutdown()
+
+    (path,) = list_span_files(str(tmp_path), FORMAT_NDJSON)
+    spans = list(iter_ndjson_spans(path))
+    assert [span["name"] for span in spans] == ["span_0", "span_1"]
+    assert spans[0]["attributes"]["value.action.name"] == "act"
+
+
+def test_ship_replays_and_resumes_from_checkpoint(tmp_path, collector) -> None:
+    """Test that ship sends every span once and skips files completed by an earlier run."""
+    spans_dir = tmp_path / "spans"
+    checkpoint = str(tmp_path / "checkpoint.json")
+    write_files(spans_dir, batches=4, per_batch=5)
+
+    report = ship(str(spans_dir), collector.endpoint, workers=2, checkpoint_path=checkpoint)
+    assert report.files == 4
+    assert report.records == 4
+    assert not report.failed_files
+    assert collector.spans == 20
+
+    requests = collector.requests
+    report = ship(str(spans_dir), collector.endpoint, checkpoint_path=checkpoint)
+    assert report.files == 0
+    assert collector.requests == requests
+
+
+def test_ship_coalesces_records_into_requests(tmp_path, collector) -> None:
+    """Test that the records of one file are concatenated into a single request."""
+    write_files(tmp_path, batches=6, per_batch=2, max_bytes=1 << 20)
+
+    report = ship(str(tmp_path), collector.endpoint)
+    assert report.records == 6
+    assert report.requests == 1
+    assert collector.spans == 12
+
+
+def test_ship_cli(tmp_path, collector, capsys) -> None:
+    """Test the ship command line entry point and --delete."""
+    write_files(tmp_path, batches=2, per_batch=3)
+
+    assert main(["ship", str(tmp_path), "--endpoint", collector.endpoint, "--delete"]) == 0
+    assert collector.spans == 6
+    assert list_span_files(str(tmp_path)) == []
+    assert "Shipped 2 records from 2 files" in capsys.readouterr().out
+
+
+def test_files_rotate_by_age_without_further_exports(tmp_path) -> None:
+    """Test that a file older than max_age is published even if no more spans arrive."""
+    exporter = FileSpanExporter(str(tmp_path), max_age=0.05)
+    exporter.export(make_spans(1))
+    assert list_span_files(str(tmp_path)) == []
+
+    deadline = time.monotonic() + 5
+    while not list_span_files(str(tmp_path)) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(list_span_files(str(tmp_path))) == 1
+    exporter.shutdown()
+
+
+def test_part_files_of_crashed_writers_are_recovered(tmp_path) -> None:
+    """Test that a stale .part file of a dead process, truncated mid-record, is published and readable."""
+    encoder = OTLPSpanEncoder()
+    records = [encoder.encode(make_spans(2)), encoder.encode(make_spans(3))]
+    crashed = str(tmp_path / "spans-20240101T000000-99999999-000001.otlp.gz.part")
+    with gzip.open(crashed, "wb") as stream:
+        stream.write(b"".join(struct.pack(">I", len(record)) + record for record in records)[:-8])
+    os.utime(crashed, (0, 0))
+
+    FileSpanExporter(str(tmp_path)).shutdown()
+    (path,) = list_span_files(str(tmp_path))
+    assert path == crashed[: -len(".part")]
+    assert list(iter_otlp_records(path)) == records[:1]
+
+
+def test_ship_replays_ndjson_files(tmp_path, collector) -> None:
+    """Test that ndjson files are re-encoded and shipped alongside otlp files."""
+    exporter = FileSpanExporter(str(tmp_path), fmt=FORMAT_NDJSON)
+    exporter.export(make_spans(3))
+    exporter.shutdown()
+    write_files(tmp_path, batches=1, per_batch=2)
+
+    report = ship(str(tmp_path), collector.endpoint)
+    assert report.files == 2
+    assert not report.failed_files
+    assert collector.spans == 5
+
+
+def test_span_from_json_round_trips_ndjson_lines() -> None:
+    """Test that a span rebuilt from its ndjson line keeps its identity, timing and attributes."""
+    (span,) = make_spans(1)
+    rebuilt = span_from_json(json.loads(span.to_json(indent=None)))
+    assert rebuilt.context.trace_id == span.context.trace_id
+    assert rebuilt.context.span_id == span.context.span_id
+    assert abs(rebuilt.start_time - span.start_time) < 1000
+    assert rebuilt.attributes["value.action.name"] == "act"
+    assert rebuilt.resource.attributes == span.resource.attributes
+
+
+def test_checkpoint_batches_writes(tmp_path) -> None:
+    """Test that in-progress updates are persisted at most once per interval, and on flush."""
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = Checkpoint(path, interval=3600)
+    checkpoint.update("a", 1)
+    checkpoint.update("a", 2)
+    assert not os.path.exists(path)
+
+    checkpoint.update("b", 5, complete=True)
+    assert Checkpoint(path).get("a") == (2, False)
+    checkpoint.update("a", 3)
+    checkpoint.flush()
+    assert Checkpoint(path).get("a") == (3, False)
+    assert Checkpoint(path).get("b") == (5, True)
@@ -0,0 +1,106 @@
+"""Tests for the span filter processor."""
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from value.internal.filtering import FilterRules, FilterSpanProcessor
+
+
+def make_tracer(rules: FilterRules):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(shutdown_on_exit=False)
+    provider.add_span_processor(FilterSpanProcessor(SimpleSpanProcessor(exporter), rules))
+    return provider, exporter
+
+
+def test_drop_spans_by_name_and_scope() -> None:
+    """Test that spans matching name or scope patterns are not exported."""
+    provider, exporter = make_tracer(FilterRules(drop_spans=("Runnable*",), drop_scopes=("noisy.*",)))
+
+    provider.get_tracer("value-tests").start_span("RunnableLambda").end()
+    provider.get_tracer("noisy.lib").start_span("anything").end()
+    provider.get_tracer("value-tests").start_span("llm.call").end()
+
+    assert [span.name for span in exporter.get_finished_spans()] == ["llm.call"]
+
+
+def test_drop_and_truncate_attributes() -> None:
+    """Test attribute removal and truncation by key pattern."""
+    rules = FilterRules(
+        drop_attributes=("gen_ai.prompt.*",),
+        truncate_attributes=("gen_ai.completion.*",),
+        max_attribute_length=5,
+    )
+    provider, exporter = make_tracer(rules)
+
+    span = provider.get_tracer("value-tests").start_span(
+        "llm.call",
+        attributes={
+            "gen_ai.prompt.0.content": "secret prompt",
+            "gen_ai.completion.0.content": "a long completion",
+            "gen_ai.request.model": "gemini-2.5-flash",
+        },
+    )
+    span.end()
+
+    (exported,) = exporter.get_finished_spans()
+    assert dict(exported.attributes) == {
+        "gen_ai.completion.0.content": "a lon",
+        "gen_ai.request.model": "gemini-2.5-flash",
+    }
+
+
+def test_event_attributes_are_filtered() -> None:
+    """Test that the attribute rules also apply to event attributes, e.g. of actions recorded as events."""
+    rules = FilterRules(drop_attributes=("gen_ai.prompt.*",), max_attribute_length=5)
+    provider, exporter = make_tracer(rules)
+
+    span = provider.get_tracer("value-tests").start_span("llm.call")
+    span.add_event("value.action", {"gen_ai.prompt.0.content": "secret prompt", "value.action.name": "summarize"})
+    span.end()
+
+    (exported,) = exporter.get_finished_spans()
+    assert dict(exported.events[0].attributes) == {"value.action.name": "summa"}
+
+
+def test_unchanged_attributes_are_not_copied() -> None:
+    """Test that attribute mappings untouched by the rules are returned as-is."""
+    processor = FilterSpanProcessor(
+        SimpleSpanProcessor(InMemorySpanExporter()), FilterRules(drop_attributes=("secret",))
+    )
+    attributes = {"model": "x"}
+
+    assert processor.filter_attributes(attributes) is attributes
+    assert processor.filter_attributes({"secret": "y", "model": "x"}) == {"model": "x"}
+
+
+def test_collapse_children_into_parent() -> None:
+    """Test that collapsed children are summarized on their parent."""
+    provider, exporter = make_tracer(FilterRules(collapse_spans=("Runnable*",)))
+    tracer = provider.get_tracer("value-tests")
+
+    with tracer.start_as_current_span("chain"):
+        for _ in range(3):
+            tracer.start_span("RunnableLambda").end()
+
+    (parent,) = exporter.get_finished_spans()
+    assert parent.name == "chain"
+    assert parent.attributes["value.collapsed.count"] == 3
+    assert parent.attributes["value.collapsed.duration_ns"] >= 0
+
+
+def test_children_of_collapsed_spans_are_reparented() -> None:
+    """Test that spans under a collapsed span are attached to the nearest exported ancestor, not orphaned."""
+    provider, exporter = make_tracer(FilterRules(collapse_spans=("Runnable*",)))
+    tracer = provider.get_tracer("value-tests")
+
+    with tracer.start_as_current_span("chain") as chain:
+        with tracer.start_as_current_span("RunnableSequence"):
+            with tracer.start_as_current_span("RunnableLambda"):
+                tracer.start_span("llm.call").end()
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert set(spans) == {"chain", "llm.call"}
+    assert spans["llm.call"].parent.span_id == chain.get_span_context().span_id
+    assert spans["chain"].attributes["value.collapsed.count"] == 2
@@ -0,0 +1,100 @@
+"""Tests for the priority lane processor."""
+
+import threading
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from value.internal.lanes import DROP_OLDEST, LaneConfig, LaneSpanProcessor, default_lanes
+
+
+class GatedSpanExporter(SpanExporter):
+    """Exporter that holds every export until the gate opens."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.exported = []
+
+    def export(self, spans):
+        self.gate.wait(5)
+        self.exported.extend(spans)
+        return SpanExportResult.SUCCESS
+
+
+def make_provider(processor: LaneSpanProcessor) -> TracerProvider:
+    provider = TracerProvider(shutdown_on_exit=False)
+    provider.add_span_processor(processor)
+    return provider
+
+
+def test_spans_routed_to_lanes() -> None:
+    """Test routing by span name and instrumentation scope."""
+    exporter = InMemorySpanExporter()
+    processor = LaneSpanProcessor(exporter, lanes=default_lanes())
+    provider = make_provider(processor)
+
+    provider.get_tracer("value-tests").start_span("value.action").end()
+    provider.get_tracer("opentelemetry.instrumentation.langchain").start_span("RunnableSequence").end()
+    provider.get_tracer("my-app").start_span("handler").end()
+
+    assert processor.force_flush(5000)
+    spans = exporter.get_finished_spans()
+    assert {span.name: processor._route(span).config.name for span in spans} == {
+        "value.action": "actions",
+        "RunnableSequence": "instrumentation",
+        "handler": "default",
+    }
+    processor.shutdown()
+
+
+def test_low_priority_lane_shed_first() -> None:
+    """Test that instrumentation spans are evicted before action and manual spans."""
+    exporter = GatedSpanExporter()
+    dropped = []
+    lanes = [
+        LaneConfig(name="actions", span_names=("value.action*",), priority=100, reserved=True, max_queue_size=10),
+        LaneConfig(name="instrumentation", scopes=("auto.*",), priority=0, max_queue_size=10),
+        LaneConfig(name="default", priority=10, max_queue_size=10),
+    ]
+    processor = LaneSpanProcessor(exporter, lanes=lanes, max_total_spans=4, on_drop=dropped.extend)
+    provider = make_provider(processor)
+
+    for index in range(4):
+        provider.get_tracer("auto.langchain").start_span(f"auto_{index}").end()
+    for index in range(3):
+        provider.get_tracer("my-app").start_span(f"manual_{index}").end()
+    for index in range(5):
+        provider.get_tracer("value-tests").start_span("value.action").end()
+
+    stats = processor.lane_stats()
+    assert stats["instrumentation"] == {"queued": 1, "dropped": 3}
+    assert stats["default"]["queued"] == 3
+    assert stats["actions"]["queued"] == 5
+    assert [span.name for span in dropped] == ["auto_0", "auto_1", "auto_2"]
+
+    exporter.gate.set()
+    assert processor.force_flush(5000)
+    assert len(exporter.exported) == 9
+    processor.shutdown()
+
+
+def test_lane_drop_policies() -> None:
+    """Test drop-newest and drop-oldest when a lane queue is full."""
+    exporter = GatedSpanExporter()
+    dropped = []
+    lanes = [
+        LaneConfig(name="oldest", span_names=("old*",), max_queue_size=2, drop_policy=DROP_OLDEST),
+        LaneConfig(name="newest", max_queue_size=2),
+    ]
+    processor = LaneSpanProcessor(exporter, lanes=lanes, on_drop=dropped.extend)
+    provider = make_provider(processor)
+    tracer = provider.get_tracer("value-tests")
+
+    for name in ("old_0", "old_1", "old_2", "new_0", "new_1", "new_2"):
+        tracer.start_span(name).end()
+
+    assert [span.name for span in dropped] == ["old_0", "new_2"]
+    exporter.gate.set()
+    processor.shutdown()
+    assert sorted(span.name for span in exporter.exported) == ["new_0", "new_1", "old_1", "old_2"]
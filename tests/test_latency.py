@@ -0,0 +1,118 @@
+"""Tests for the per-action-context latency analyzer."""
+
+import json
+
+from opentelemetry import trace
+
+from value.internal.actions import ActionContext, ActionEmitter
+from value.internal.latency import LatencyAnalyzerSpanProcessor, LatencyTracker
+
+MS = 1_000_000
+
+
+def ended_span(tracer, name: str, start_ms: int, end_ms: int, parent=None, **attributes):
+    context = trace.set_span_in_context(parent) if parent is not None else None
+    span = tracer.start_span(name, context=context, attributes=attributes, start_time=start_ms * MS)
+    span.end(end_time=end_ms * MS)
+    return span
+
+
+def test_breakdown_and_critical_path(tracer) -> None:
+    """Test exclusive category times and the critical path of a small span tree."""
+    tracker = LatencyTracker()
+    tracker.started = 0
+    agent = ended_span(tracer, "agent", 0, 100)
+    spans = [
+        agent,
+        ended_span(tracer, "chat", 10, 60, parent=agent, **{"gen_ai.system": "gemini"}),
+        ended_span(tracer, "tool_search", 60, 90, parent=agent),
+    ]
+    for span in spans:
+        tracker.add(span)
+
+    breakdown = tracker.compute(end=120 * MS)
+    assert breakdown.wall_ms == 120
+    assert (breakdown.llm_ms, breakdown.tool_ms, breakdown.other_ms, breakdown.self_ms) == (50, 30, 20, 20)
+    assert [name for name, _ in breakdown.critical_path] == ["agent", "chat", "tool_search"]
+    assert breakdown.critical_path_ms == 100
+
+
+def test_memory_bounded_keeps_longest_spans(tracer) -> None:
+    """Test that past max_spans only the longest spans are kept and the result is flagged."""
+    tracker = LatencyTracker(max_spans=3)
+    tracker.started = 0
+    for index in range(1, 6):
+        tracker.add(ended_span(tracer, f"span_{index}", 0, index))
+
+    breakdown = tracker.compute(end=10 * MS)
+    assert breakdown.span_count == 5
+    assert breakdown.truncated
+    assert sorted(record.name for record in tracker._records) == ["span_3", "span_4", "span_5"]
+
+
+def test_action_context_summary_span(tracer_provider, tracer, span_exporter) -> None:
+    """Test that an analyzed action context exports a summary span and exposes its breakdown."""
+    analyzer = LatencyAnalyzerSpanProcessor()
+    tracer_provider.add_span_processor(analyzer)
+    emitter = ActionEmitter(tracer=tracer, latency_analyzer=analyzer)
+
+    with ActionContext(emitter, anonymous_id="anon-1") as ctx:
+        with tracer.start_as_current_span("step"):
+            ctx.send("step_done")
+        assert ctx.latency_breakdown().span_count == 2
+    with tracer.start_as_current_span("outside"):
+        pass
+
+    breakdown = ctx.latency_breakdown()
+    assert breakdown.span_count == 2
+    parts = breakdown.llm_ms + breakdown.tool_ms + breakdown.action_ms + breakdown.other_ms + breakdown.self_ms
+    assert abs(parts - breakdown.wall_ms) < 1e-6
+    (summary,) = [span for span in span_exporter.get_finished_spans() if span.name == "value.action.context"]
+    assert summary.attributes["value.latency.span_count"] == 2
+    assert summary.attributes["value.action.anonymous_id"] == "anon-1"
+    assert json.loads(summary.attributes["value.latency.critical_path"])[0][0] == "step"
+    assert not analyzer._live
+
+
+def test_breakdown_disabled_without_analyzer(tracer) -> None:
+    """Test that latency_breakdown returns None when analysis is off."""
+    with ActionContext(ActionEmitter(tracer=tracer), anonymous_id="anon-1") as ctx:
+        pass
+    assert ctx.latency_breakdown() is None
+
+
+def test_critical_path_of_a_deep_span_chain(tracer) -> None:
+    """Test that the critical path of a chain deeper than the recursion limit is computed."""
+    tracker = LatencyTracker(max_spans=5000)
+    tracker.started = 0
+    parent = None
+    depth = 3000
+    for index in range(depth):
+        parent = ended_span(tracer, f"level_{index}", index, 2 * depth - index, parent=parent)
+        tracker.add(parent)
+
+    breakdown = tracker.compute(end=2 * depth * MS)
+    assert len(breakdown.critical_path) == depth
+    assert breakdown.critical_path[0][0] == "level_0"
+    assert breakdown.critical_path_ms == 2 * depth
+
+
+def test_live_spans_are_evicted_by_age_and_the_cap_is_logged_once(tracer_provider, tracer, caplog) -> None:
+    """Test that spans that never end do not stop the analysis for good."""
+    analyzer = LatencyAnalyzerSpanProcessor(max_live_spans=2, max_live_age=3600)
+    tracer_provider.add_span_processor(analyzer)
+    tracker, token = analyzer.begin()
+    try:
+        leaked = [tracer.start_span(f"leaked_{index}") for index in range(4)]
+        assert len(analyzer._live) == 2
+        assert len([record for record in caplog.records if "Latency analysis" in record.message]) == 1
+
+        # Once the oldest entries are past max_live_age, new spans take their place
+        analyzer._max_live_age_ns = 0
+        with tracer.start_as_current_span("fresh"):
+            pass
+    finally:
+        analyzer.end(tracker, token)
+    assert [record.name for record in tracker._records] == ["fresh"]
+    for span in leaked:
+        span.end()
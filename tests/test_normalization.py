@@ -0,0 +1,81 @@
+"""Tests for action attribute normalization."""
+
+import array
+import enum
+import json
+import math
+
+import pytest
+
+from value.internal.normalization import MAX_TOTAL, Budget, normalize, to_attribute_value
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+def test_native_values_unchanged() -> None:
+    """Test that JSON-native values pass through."""
+    assert normalize({"a": [1, 2.5, "x", None, True]}) == {"a": [1, 2.5, "x", None, True]}
+    assert normalize(Color.RED) == "red"
+
+
+def test_containers_capped_by_length_and_depth() -> None:
+    """Test that containers are cut to max_items entries and max_depth levels."""
+    assert normalize(list("abcdef"), max_items=3) == ["a", "b", "c", {"__truncated__": 3}]
+    assert normalize({i: i for i in range(5)}, max_items=2) == {"0": 0, "1": 1, "__truncated__": 3}
+    assert normalize({"a": {"b": {"c": 1}}}, max_depth=2) == {"a": {"b": "<dict len=1>"}}
+    assert normalize("x" * 10, max_string=4) == "xxxx"
+
+
+def test_total_size_bounded_across_levels() -> None:
+    """Test that a value within every per-level limit is still held to the total budget."""
+    wide = {f"k{i}": {f"j{j}": "x" * 5000 for j in range(100)} for i in range(100)}
+    encoded = json.dumps(normalize(wide))
+    assert len(encoded) < MAX_TOTAL * 1.1
+    assert '"__truncated__"' in encoded
+
+    budget = Budget(100)
+    assert normalize("x" * 60, budget=budget) == "x" * 60
+    assert normalize(["y" * 60, "z"], budget=budget) == ["y" * 34, {"__truncated__": 1}]
+
+
+def test_long_numeric_list_summarized() -> None:
+    """Test that an embedding passed as a list becomes a summary."""
+    summary = normalize([3.0, 4.0] + [0.0] * 100)
+    assert summary == {"type": "list", "length": 102, "min": 0.0, "max": 4.0, "mean": 7.0 / 102, "norm": 5.0}
+
+
+def test_buffer_summarized() -> None:
+    """Test that buffer-protocol objects are summarized without copying their contents into JSON."""
+    summary = normalize(array.array("f", [1.0, -2.0, 2.0]))
+    assert summary["type"] == "array"
+    assert summary["shape"] == [3] and summary["format"] == "f" and summary["nbytes"] == 12
+    assert (summary["min"], summary["max"], summary["norm"]) == (-2.0, 2.0, 3.0)
+    assert normalize(b"\x00" * 1000) == {"type": "bytes", "shape": [1000], "format": "B", "nbytes": 1000}
+
+
+def test_unserializable_objects_become_strings() -> None:
+    """Test that arbitrary objects no longer break json.dumps."""
+    json.dumps(normalize({"obj": object(), "set": {1}}))
+
+
+def test_to_attribute_value() -> None:
+    """Test conversion to native OpenTelemetry attribute types."""
+    assert to_attribute_value(3) == 3
+    assert to_attribute_value((1, 2)) == [1, 2]
+    assert to_attribute_value([1, "a"]) == '[1, "a"]'
+    assert to_attribute_value({"k": 1}) == '{"k": 1}'
+
+
+def test_numpy_arrays_summarized() -> None:
+    """Test vectorized summaries of NumPy arrays and unwrapping of NumPy scalars."""
+    numpy = pytest.importorskip("numpy")
+    embedding = numpy.zeros((2, 384), dtype=numpy.float32)
+    embedding[0, 0] = 3
+    embedding[1, 1] = 4
+    summary = normalize(embedding)
+    assert summary["shape"] == [2, 384] and summary["dtype"] == "float32"
+    assert math.isclose(summary["norm"], 5.0)
+    assert to_attribute_value(numpy.int64(7)) == 7
+    assert type(to_attribute_value(numpy.float32(0.5))) is float
@@ -0,0 +1,91 @@
+"""Tests for the direct OTLP encoder and exporter."""
+
+from opentelemetry import trace
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import (
+    Link,
+    NonRecordingSpan,
+    SpanContext,
+    SpanKind,
+    Status,
+    StatusCode,
+    TraceFlags,
+    TraceState,
+)
+
+from value.internal.otlp_encoder import DirectOTLPSpanExporter, OTLPSpanEncoder
+
+REMOTE = SpanContext(0xABC, 0xDEF, is_remote=True, trace_flags=TraceFlags(1), trace_state=TraceState([("k", "v")]))
+
+
+def finished_spans() -> list:
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(resource=Resource.create({"service.name": "tests", "deploy.count": 3}))
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer("value-tests", "1.0")
+    other = provider.get_tracer("other", schema_url="https://opentelemetry.io/schemas/1.21.0")
+    attributes = {
+        "value.action.name": "search",
+        "flag": True,
+        "count": -5,
+        "big": 2**62,
+        "ratio": 1.5,
+        "empty": "",
+        "ints": [1, 2, 3],
+        "names": ("a", "b"),
+        "text": "é" * 300,
+    }
+    with tracer.start_as_current_span(
+        "root", attributes=attributes, kind=SpanKind.CLIENT, links=[Link(REMOTE, {"n": 1})]
+    ):
+        trace.get_current_span().add_event("retry", {"attempt": 2})
+        trace.get_current_span().set_status(Status(StatusCode.ERROR, "failed"))
+        with other.start_as_current_span("child") as child:
+            child.set_status(Status(StatusCode.OK))
+    with tracer.start_as_current_span("remote-child", context=trace.set_span_in_context(NonRecordingSpan(REMOTE))):
+        pass
+    return list(exporter.get_finished_spans())
+
+
+def test_encoding_matches_stock_encoder() -> None:
+    """Test that the encoded request is byte-identical to the SDK's protobuf serialization."""
+    spans = finished_spans()
+    encoder = OTLPSpanEncoder()
+
+    assert encoder.encode(spans) == encode_spans(spans).SerializeToString()
+    # Second pass goes through the resource, scope and attribute caches
+    assert encoder.encode(spans) == encode_spans(spans).SerializeToString()
+    assert encoder.encode(spans[:1]) == encode_spans(spans[:1]).SerializeToString()
+    assert encoder.encode([]) == b""
+
+
+def test_invalid_attribute_is_skipped(tracer) -> None:
+    """Test that an attribute the stock encoder rejects is dropped rather than failing the batch."""
+    span = tracer.start_span("span", attributes={"ok": 1})
+    span._attributes._dict["bad"] = object()
+    span.end()
+
+    assert OTLPSpanEncoder().encode([span]) == encode_spans([span]).SerializeToString()
+
+
+def test_direct_exporter_sends_to_collector(collector) -> None:
+    """Test that the direct exporter delivers spans through a raw Export call."""
+    exporter = DirectOTLPSpanExporter(collector.endpoint, timeout=5.0)
+
+    assert exporter.export(finished_spans()) == SpanExportResult.SUCCESS
+    assert collector.requests == 1
+    assert collector.spans == 3
+    exporter.shutdown()
+    assert exporter.export(finished_spans()) == SpanExportResult.FAILURE
+
+
+def test_direct_exporter_reports_unreachable_endpoint() -> None:
+    """Test that a failed call is reported as a failure, leaving retries to the caller."""
+    exporter = DirectOTLPSpanExporter("localhost:1", timeout=0.2)
+
+    assert exporter.export(finished_spans()) == SpanExportResult.FAILURE
+    exporter.shutdown()
@@ -0,0 +1,153 @@
+"""Tests for adaptive telemetry degradation under load."""
+
+import json
+import time
+
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from value.internal import overload
+from value.internal.actions import ActionEmitter
+from value.internal.overload import (
+    DROP_PAYLOADS,
+    ESSENTIAL_ONLY,
+    NORMAL,
+    ROLLUP_ACTIONS,
+    SAMPLE_INSTRUMENTATION,
+    OverloadController,
+    OverloadSignals,
+    OverloadSpanProcessor,
+)
+from value.internal.shutdown import ExportStats
+
+OVERLOADED = OverloadSignals(queue_fill=0.9)
+BETWEEN = OverloadSignals(queue_fill=0.5)
+CALM = OverloadSignals(queue_fill=0.1)
+
+
+def test_level_steps_up_under_pressure_and_recovers_with_hysteresis() -> None:
+    """Test that the level rises one step per overloaded tick and falls only after sustained calm."""
+    controller = OverloadController(ExportStats(), queue_capacity=100, max_level=3, recover_ticks=3)
+
+    assert [controller.evaluate(OVERLOADED) for _ in range(4)] == [1, 2, 3, 3]
+    # Between the recovery and overload thresholds the level holds, and the calm streak restarts
+    assert [controller.evaluate(signals) for signals in (CALM, CALM, BETWEEN, CALM, CALM)] == [3] * 5
+    assert controller.evaluate(CALM) == 2
+    assert [controller.evaluate(CALM) for _ in range(6)] == [2, 2, 1, 1, 1, NORMAL]
+
+
+def test_sample_reads_queue_fill_and_drop_rate_from_stats() -> None:
+    """Test that the signals are derived from the pipeline's export stats."""
+    stats = ExportStats()
+    controller = OverloadController(stats, queue_capacity=100)
+    stats.record_ended(80)
+    stats.record_export(20, SpanExportResult.FAILURE)
+
+    signals = controller.sample()
+    assert signals.queue_fill == 0.6
+    assert signals.drop_rate == 0.25
+
+
+def test_cpu_signal_is_a_fraction_of_the_available_cpus(monkeypatch) -> None:
+    """Test that process CPU time is divided by the CPUs the process may use."""
+    monkeypatch.setattr(overload, "_available_cpus", lambda: 4)
+    controller = OverloadController(ExportStats(), queue_capacity=100)
+    # Two CPU seconds over the last wall second
+    controller._last = (time.monotonic() - 1.0, time.process_time() - 2.0, 0, 0)
+
+    assert controller.sample().cpu == pytest.approx(0.5, abs=0.05)
+
+
+def make_emitter(controller: OverloadController) -> tuple[ActionEmitter, InMemorySpanExporter]:
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return ActionEmitter(provider.get_tracer("value-tests"), overload=controller), exporter
+
+
+def test_emitter_drops_payloads_then_rolls_up_then_keeps_essential_actions() -> None:
+    """Test the action-side degradation levels."""
+    controller = OverloadController(ExportStats(), queue_capacity=100)
+    emitter, exporter = make_emitter(controller)
+
+    controller.level = DROP_PAYLOADS
+    emitter.send("answer", anonymous_id="anon", **{"value.action.llm.prompt": "hi", "value.action.llm.model": "m"})
+    (span,) = exporter.get_finished_spans()
+    assert "value.action.llm.prompt" not in span.attributes
+    assert span.attributes["value.action.llm.model"] == "m"
+
+    exporter.clear()
+    controller.level = ROLLUP_ACTIONS
+    for _ in range(3):
+        emitter.send("click", anonymous_id="anon")
+    emitter.send("answer", anonymous_id="anon", **{"value.action.llm.total_tokens": 12})
+    controller.tick()
+    names = [span.name for span in exporter.get_finished_spans()]
+    assert names == ["value.action", "value.action.rollup"]
+    rollup = exporter.get_finished_spans()[1]
+    assert json.loads(rollup.attributes["value.action.rollup.counts"]) == {"click": 3}
+
+    exporter.clear()
+    controller.level = ESSENTIAL_ONLY
+    emitter.send("click", anonymous_id="anon")
+    emitter.send("fail", anonymous_id="anon", **{"value.action.status": "error"})
+    controller.stop()
+    assert [span.attributes["value.action.name"] for span in exporter.get_finished_spans()] == ["fail"]
+    assert controller.rolled_up == 3
+    assert controller.shed == 1
+
+
+def test_processor_samples_instrumentation_spans_and_strips_payloads() -> None:
+    """Test the export-side degradation of auto-instrumented spans."""
+    controller = OverloadController(ExportStats(), queue_capacity=100)
+    exporter = InMemorySpanExporter()
+    shed = []
+    provider = TracerProvider()
+    provider.add_span_processor(
+        OverloadSpanProcessor(
+            SimpleSpanProcessor(exporter), controller, instrumentation_ratio=0.25, on_drop=shed.extend
+        )
+    )
+    instrumented = provider.get_tracer("opentelemetry.instrumentation.langchain")
+    manual = provider.get_tracer("value-tests")
+
+    controller.level = DROP_PAYLOADS
+    instrumented.start_span("llm", attributes={"gen_ai.prompt.0.content": "hi", "gen_ai.system": "x"}).end()
+    assert dict(exporter.get_finished_spans()[0].attributes) == {"gen_ai.system": "x"}
+
+    exporter.clear()
+    controller.level = SAMPLE_INSTRUMENTATION
+    for _ in range(400):
+        instrumented.start_span("llm").end()
+    manual.start_span("work").end()
+    kept = [span.name for span in exporter.get_finished_spans()]
+    assert 50 < kept.count("llm") < 150
+    assert kept.count("work") == 1
+    assert len(shed) + kept.count("llm") == 400
+
+    exporter.clear()
+    controller.level = ESSENTIAL_ONLY
+    instrumented.start_span("llm").end()
+    failed = instrumented.start_span("llm")
+    failed.set_status(Status(StatusCode.ERROR))
+    failed.end()
+    assert [span.status.status_code for span in exporter.get_finished_spans()] == [StatusCode.ERROR]
+
+
+def test_level_is_exported_as_a_gauge() -> None:
+    """Test the value.telemetry.degradation_level gauge."""
+    reader = InMemoryMetricReader()
+    controller = OverloadController(
+        ExportStats(), queue_capacity=100, meter_provider=MeterProvider(metric_readers=[reader])
+    )
+    controller.evaluate(OVERLOADED)
+    controller.evaluate(OVERLOADED)
+
+    metrics = reader.get_metrics_data().resource_metrics[0].scope_metrics[0].metrics
+    (gauge,) = [metric for metric in metrics if metric.name == "value.telemetry.degradation_level"]
+    assert gauge.data.data_points[0].value == 2
@@ -0,0 +1,100 @@
+"""Tests for payload offloading."""
+
+import gzip
+import hashlib
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from value.internal.payloads import FileBlobSink, PayloadOffloader, PayloadSpanProcessor
+
+
+def make_tracer(offloader: PayloadOffloader):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(shutdown_on_exit=False)
+    provider.add_span_processor(PayloadSpanProcessor(SimpleSpanProcessor(exporter), offloader))
+    return provider.get_tracer("value-tests"), exporter
+
+
+def test_large_attribute_offloaded_to_sink(tmp_path) -> None:
+    """Test that a large value is replaced by preview, size and hash, and its body written compressed."""
+    sink = FileBlobSink(str(tmp_path))
+    tracer, exporter = make_tracer(PayloadOffloader(max_inline_bytes=100, preview_chars=10, sink=sink))
+    prompt = "context " * 1000
+
+    tracer.start_span("llm.call", attributes={"value.action.llm.prompt": prompt, "model": "m"}).end()
+    sink.flush()
+
+    (span,) = exporter.get_finished_spans()
+    digest = hashlib.sha256(prompt.encode()).hexdigest()
+    assert dict(span.attributes) == {
+        "value.action.llm.prompt": prompt[:10],
+        "value.action.llm.prompt.size": len(prompt),
+        "value.action.llm.prompt.sha256": digest,
+        "model": "m",
+    }
+    with gzip.open(sink.path(digest)) as file:
+        assert file.read() == prompt.encode()
+
+
+def test_small_attributes_untouched() -> None:
+    """Test that mappings without large values are returned as-is."""
+    offloader = PayloadOffloader(max_inline_bytes=100, preview_chars=10)
+    attributes = {"short": "x" * 100, "number": 1}
+    assert offloader.offload_attributes(attributes) is attributes
+    # Multi-byte characters count in UTF-8 bytes
+    assert offloader.offload_attributes({"big": "é" * 60})["big.size"] == 120
+
+
+def test_system_prompt_written_once(tmp_path) -> None:
+    """Test that a repeated system prompt is offloaded by hash on every span but written once."""
+    sink = FileBlobSink(str(tmp_path))
+    tracer, exporter = make_tracer(PayloadOffloader(max_inline_bytes=10000, preview_chars=8, sink=sink))
+    system_prompt = "You are a helpful assistant."
+    for question in ("first?", "second?"):
+        tracer.start_span(
+            "chat",
+            attributes={
+                "gen_ai.prompt.0.role": "system",
+                "gen_ai.prompt.0.content": system_prompt,
+                "gen_ai.prompt.1.role": "user",
+                "gen_ai.prompt.1.content": question * 10,
+            },
+        ).end()
+    sink.shutdown()
+
+    first, second = exporter.get_finished_spans()
+    assert first.attributes["gen_ai.prompt.0.content"] == "You are "
+    assert first.attributes["gen_ai.prompt.0.content.sha256"] == second.attributes["gen_ai.prompt.0.content.sha256"]
+    assert second.attributes["gen_ai.prompt.1.content"] == "second?" * 10
+    assert (sink.written, sink.deduplicated) == (1, 0)
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_digest_cache_does_not_keep_payloads() -> None:
+    """Test that deduplicated digests are cached by fingerprint, without holding on to the values."""
+    offloader = PayloadOffloader(preview_chars=4, dedupe_attributes=["prompt"])
+    prompt = "é" * 5000
+    first = offloader.offload_attributes({"prompt": prompt})
+    second = offloader.offload_attributes({"prompt": "".join(["é"] * 5000)})
+
+    assert not any(isinstance(key, str) for key in offloader._digests)
+    assert first == second
+    assert first["prompt.size"] == len(prompt.encode())
+    assert first["prompt.sha256"] == hashlib.sha256(prompt.encode()).hexdigest()
+
+
+def test_event_attributes_offloaded() -> None:
+    """Test that action events carrying large payloads are offloaded too."""
+    tracer, exporter = make_tracer(PayloadOffloader(max_inline_bytes=20, preview_chars=4))
+    span = tracer.start_span("parent")
+    span.add_event("value.action", attributes={"value.action.llm.response": "r" * 50})
+    span.end()
+
+    (exported,) = exporter.get_finished_spans()
+    assert dict(exported.events[0].attributes) == {
+        "value.action.llm.response": "rrrr",
+        "value.action.llm.response.size": 50,
+        "value.action.llm.response.sha256": hashlib.sha256(b"r" * 50).hexdigest(),
+    }
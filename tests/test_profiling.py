@@ -0,0 +1,62 @@
+"""Tests for CPU-time, GC and allocation profiling of actions."""
+
+import gc
+import tracemalloc
+
+import pytest
+
+from value.internal.actions import ActionContext, ActionEmitter
+
+
+def busy(iterations: int = 200_000) -> int:
+    return sum(index * index for index in range(iterations))
+
+
+def test_timed_action_records_profile(tracer, span_exporter) -> None:
+    """Test that a profiled timed action carries CPU and GC deltas and parents its children."""
+    emitter = ActionEmitter(tracer=tracer)
+    with ActionContext(emitter, anonymous_id="anon-1") as ctx:
+        with ctx.timed("plan", profile=True) as action:
+            busy()
+            gc.collect()
+            with tracer.start_as_current_span("llm_call"):
+                pass
+
+    spans = {span.name: span for span in span_exporter.get_finished_spans()}
+    attributes = spans["value.action"].attributes
+    assert attributes["value.action.name"] == "plan"
+    assert attributes["value.action.anonymous_id"] == "anon-1"
+    assert attributes["value.profile.thread_cpu_ns"] > 0
+    assert attributes["value.profile.process_cpu_ns"] >= attributes["value.profile.thread_cpu_ns"] // 2
+    assert attributes["value.profile.gc_collections"] >= 1
+    assert "value.profile.alloc_peak_bytes" not in attributes
+    assert spans["llm_call"].parent.span_id == action.get_span_context().span_id
+
+
+def test_timed_action_without_profile_and_with_error(tracer, span_exporter) -> None:
+    """Test that unprofiled timed actions carry no profile attributes and record exceptions."""
+    emitter = ActionEmitter(tracer=tracer)
+    with pytest.raises(RuntimeError):
+        with emitter.timed("fail", anonymous_id="anon-2"):
+            raise RuntimeError("boom")
+
+    (span,) = span_exporter.get_finished_spans()
+    assert not any(key.startswith("value.profile.") for key in span.attributes)
+    assert span.events[0].name == "exception"
+
+
+def test_profiled_context_summary_with_memory(tracer, span_exporter) -> None:
+    """Test that a profiled action context exports a summary span with the allocation peak."""
+    emitter = ActionEmitter(tracer=tracer, profile_actions=True, profile_memory=True)
+    tracemalloc.start()
+    try:
+        with ActionContext(emitter, anonymous_id="anon-3"):
+            block = bytearray(2_000_000)
+            del block
+    finally:
+        tracemalloc.stop()
+
+    (summary,) = [span for span in span_exporter.get_finished_spans() if span.name == "value.action.context"]
+    assert summary.attributes["value.profile.alloc_peak_bytes"] >= 2_000_000
+    assert summary.attributes["value.action.anonymous_id"] == "anon-3"
+    assert "value.latency.wall_ms" not in summary.attributes
@@ -0,0 +1,77 @@
+"""Tests for cross-service context propagation."""
+
+import httpx
+
+from value import ValueClient, extract, inject, instrument_httpx
+from value.internal.actions import ActionContext, ActionEmitter
+
+
+def test_inject_extract_round_trip(tracer, span_exporter) -> None:
+    """Test that the remote side continues the trace with the caller's user IDs."""
+    emitter = ActionEmitter(tracer=tracer)
+    with ActionContext(emitter, anonymous_id="anon 1", user_id="user-1"):
+        with tracer.start_as_current_span("caller") as caller:
+            headers = inject({})
+
+    assert headers["traceparent"].split("-")[1] == format(caller.get_span_context().trace_id, "032x")
+    remote = extract(headers)
+    assert (remote.user_id, remote.anonymous_id) == ("user-1", "anon 1")
+
+    client = ValueClient(secret="test-secret")
+    client.actions_emitter = emitter
+    with client.action_context_from(headers) as ctx:
+        with tracer.start_as_current_span("callee"):
+            ctx.send("remote_action")
+
+    spans = {span.name: span for span in span_exporter.get_finished_spans()}
+    for name in ("callee", "value.action"):
+        assert spans[name].context.trace_id == caller.get_span_context().trace_id
+        assert spans[name].attributes["value.action.user_id"] == "user-1"
+        assert spans[name].attributes["value.action.anonymous_id"] == "anon 1"
+    assert spans["callee"].parent.span_id == caller.get_span_context().span_id
+
+
+def test_extract_without_headers() -> None:
+    """Test that a carrier without propagation headers yields no user IDs."""
+    remote = extract({"content-type": "application/json"})
+    assert remote.user_id is None
+    assert remote.anonymous_id is None
+
+
+def _capture(seen: list):
+    def _handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers)
+        return httpx.Response(200)
+
+    return _handler
+
+
+def test_instrumented_httpx_client_sends_context(tracer) -> None:
+    """Test that an instrumented sync client injects headers and others do not."""
+    seen: list = []
+    emitter = ActionEmitter(tracer=tracer)
+    instrumented = instrument_httpx(httpx.Client(transport=httpx.MockTransport(_capture(seen))))
+    instrument_httpx(instrumented)
+    plain = httpx.Client(transport=httpx.MockTransport(_capture(seen)))
+
+    with ActionContext(emitter, anonymous_id="anon-2"):
+        with tracer.start_as_current_span("caller"):
+            instrumented.get("http://service.internal/run")
+            plain.get("http://third-party.example/api")
+
+    assert len(instrumented.event_hooks["request"]) == 1
+    assert "traceparent" in seen[0]
+    assert "value.anonymous_id=anon-2" in seen[0]["baggage"]
+    assert "traceparent" not in seen[1]
+
+
+async def test_instrumented_async_httpx_client(tracer) -> None:
+    """Test that an instrumented async client injects headers."""
+    seen: list = []
+    emitter = ActionEmitter(tracer=tracer)
+    client = instrument_httpx(httpx.AsyncClient(transport=httpx.MockTransport(_capture(seen))))
+    with ActionContext(emitter, anonymous_id="anon-3", user_id="user-3"):
+        await client.get("http://service.internal/run")
+    await client.aclose()
+
+    assert extract(seen[0]).user_id == "user-3"
@@ -0,0 +1,92 @@
+"""Tests for per-key emission quotas."""
+
+import json
+
+import pytest
+
+from value.internal.actions import ActionContext, ActionEmitter
+from value.internal.quotas import SAMPLE, CountMinSketch, EmissionQuota, QuotaRule
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def admit_many(quota: EmissionQuota, user_id: str, count: int) -> int:
+    return sum(quota.admit("click", user_id, None, {}) for _ in range(count))
+
+
+def test_hot_key_is_limited_to_its_rate_while_others_are_not() -> None:
+    """Test that one key over quota is throttled to rate and burst without affecting other keys."""
+    clock = FakeClock()
+    quota = EmissionQuota(QuotaRule(rate=10, burst=20), clock=clock)
+
+    # The sketch admits a burst, the exact bucket then starts with another one
+    assert admit_many(quota, "bot", 100) == 40
+    assert admit_many(quota, "human", 5) == 5
+    clock.now += 0.5
+    assert admit_many(quota, "bot", 100) == 5
+
+    report = quota.report()
+    assert report["total"] == 155
+    assert report["keys"] == {"bot": 155}
+    assert report["actions"] == {"click": 155}
+    assert quota.report() is None
+
+
+def test_sample_overflow_sends_a_fraction_of_over_quota_actions() -> None:
+    """Test that overflow="sample" still sends one in 1/sample_ratio over-quota actions."""
+    quota = EmissionQuota(QuotaRule(rate=1, burst=1, overflow=SAMPLE, sample_ratio=0.1), clock=FakeClock())
+
+    assert admit_many(quota, "bot", 102) == 2 + 10
+
+
+def test_memory_stays_bounded_with_many_quiet_keys() -> None:
+    """Test that quiet keys cost no bucket and buckets are capped at max_keys."""
+    clock = FakeClock()
+    quota = EmissionQuota(QuotaRule(rate=5, burst=5, max_keys=100), clock=clock)
+
+    assert sum(quota.admit("click", f"user-{index}", None, {}) for index in range(20000)) == 20000
+    assert len(quota._buckets) <= 100
+    assert admit_many(quota, "bot", 50) <= 15
+
+
+def test_count_min_sketch_never_undercounts() -> None:
+    """Test the sketch's estimates against exact counts."""
+    sketch = CountMinSketch(width=64, depth=4)
+    for index in range(1000):
+        sketch.add(f"key-{index % 100}")
+    assert all(sketch.add(f"key-{index}", 0) >= 10 for index in range(100))
+
+    sketch.decay()
+    assert sketch.add("key-0", 0) >= 5
+
+
+def test_quota_rejects_unknown_overflow() -> None:
+    """Test rule validation."""
+    with pytest.raises(ValueError):
+        QuotaRule(overflow="drop")
+
+
+def test_emitter_rolls_up_over_quota_actions_and_reports_them(tracer, span_exporter) -> None:
+    """Test that a hot tenant's context sends are limited and reported on a value.quota.report span."""
+    quota = EmissionQuota(QuotaRule(key="tenant", rate=1, burst=3), tracer=tracer, clock=FakeClock())
+    emitter = ActionEmitter(tracer, quota=quota)
+
+    with ActionContext(emitter, anonymous_id="anon", tenant="noisy") as context:
+        for _ in range(20):
+            context.send("search")
+    with ActionContext(emitter, anonymous_id="anon", tenant="quiet") as context:
+        context.send("search")
+    quota.stop()
+
+    spans = span_exporter.get_finished_spans()
+    assert len([span for span in spans if span.name == "value.action"]) == 6 + 1
+    (report,) = [span for span in spans if span.name == "value.quota.report"]
+    assert report.attributes["value.quota.key"] == "tenant"
+    assert report.attributes["value.quota.over_quota.total"] == 14
+    assert json.loads(report.attributes["value.quota.over_quota.keys"]) == {"noisy": 14}
@@ -0,0 +1,79 @@
+"""Tests for PII redaction."""
+
+import json
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from value.internal.actions import ActionEmitter
+from value.internal.redaction import RedactionSpanProcessor, Redactor
+
+
+def test_redacts_each_rule() -> None:
+    """Test the built-in rules."""
+    redactor = Redactor()
+    text = (
+        "Contact jane.doe@example.com or +1 415-555-0123, card 4111 1111 1111 1111, "
+        "key sk-proj-abcdefghijklmnopqrstuvwx, header Bearer abcdefghijklmnopqrstu"
+    )
+    assert redactor.redact(text) == (
+        "Contact [REDACTED:email] or [REDACTED:phone], card [REDACTED:card], "
+        "key [REDACTED:secret], header Bearer [REDACTED:secret]"
+    )
+
+
+def test_numbers_are_not_redacted() -> None:
+    """Test that Luhn-invalid digit runs, timestamps and plain integers are kept."""
+    redactor = Redactor()
+    text = '{"order": 4111111111111112, "ts": 1700000000000000000, "count": 1234567890, "f": 12.3456789}'
+    assert redactor.redact(text) is text
+
+
+def test_attributes_copied_only_when_redacted() -> None:
+    """Test that unchanged mappings are returned as-is and identity attributes are skipped."""
+    redactor = Redactor(skip_attributes=("internal.*",))
+    attributes = {"prompt": "hello there", "tokens": 12, "value.action.user_id": "jane@example.com"}
+    assert redactor.redact_attributes(attributes) is attributes
+
+    redacted = redactor.redact_attributes({"prompt": "mail jane@example.com", "internal.email": "a@b.io"})
+    assert redacted == {"prompt": "mail [REDACTED:email]", "internal.email": "a@b.io"}
+
+
+def test_extra_patterns_and_unknown_rules() -> None:
+    """Test custom patterns and validation of rule names."""
+    redactor = Redactor(rules=("email",), extra_patterns={"ticket": r"TICKET-\d+"})
+    assert redactor.redact("see TICKET-42") == "see [REDACTED:ticket]"
+    with pytest.raises(ValueError):
+        Redactor(rules=("ssn",))
+
+
+def test_emitter_redacts_user_attributes(tracer, span_exporter) -> None:
+    """Test that actions are redacted before serialization, user attributes JSON included."""
+    emitter = ActionEmitter(tracer=tracer, redactor=Redactor())
+    emitter.send(
+        action_name="signup", anonymous_id="anon1", user_id="jane@example.com", **{"contact": "jane@example.com"}
+    )
+
+    (span,) = span_exporter.get_finished_spans()
+    assert span.attributes["value.action.user_id"] == "jane@example.com"
+    assert json.loads(span.attributes["value.action.user_attributes"]) == {"contact": "[REDACTED:email]"}
+
+
+def test_processor_redacts_instrumented_spans() -> None:
+    """Test that auto-instrumented span and event attributes are redacted before export."""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(shutdown_on_exit=False)
+    provider.add_span_processor(RedactionSpanProcessor(SimpleSpanProcessor(exporter), Redactor()))
+
+    span = provider.get_tracer("value-tests").start_span(
+        "chat", attributes={"gen_ai.prompt.0.content": "my email is jane@example.com", "gen_ai.usage.input_tokens": 9}
+    )
+    span.add_event("message", attributes={"content": "call 415-555-0123"})
+    span.end()
+
+    (exported,) = exporter.get_finished_spans()
+    assert exported.attributes["gen_ai.prompt.0.content"] == "my email is [REDACTED:email]"
+    assert exported.attributes["gen_ai.usage.input_tokens"] == 9
+    assert exported.events[0].attributes["content"] == "call [REDACTED:phone]"
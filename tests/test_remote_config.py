@@ -0,0 +1,132 @@
+"""Tests for runtime settings polled from the control plane."""
+
+import threading
+import time
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from value.internal._api import SyncValueControlPlaneAPI
+from value.internal.actions import ActionEmitter
+from value.internal.delivery import DeliveryError, DeliveryTracker
+from value.internal.remote_config import RemoteConfigPoller, RuntimeConfig, RuntimeSampler, RuntimeSettings
+from value.internal.standins import StandInAgentInfoServer
+
+
+@pytest.fixture
+def control_plane():
+    """Running stand-in control plane."""
+    server = StandInAgentInfoServer(runtime_config={"sample_ratio": 0.5}).start()
+    yield server
+    server.stop()
+
+
+def make_poller(server: StandInAgentInfoServer, runtime: RuntimeConfig, **kwargs) -> RemoteConfigPoller:
+    return RemoteConfigPoller(SyncValueControlPlaneAPI(secret="test-secret", base_url=server.url), runtime, **kwargs)
+
+
+def test_poll_applies_settings_and_revalidates_with_etag(control_plane) -> None:
+    """Test that a poll applies new settings and an unchanged configuration costs a 304."""
+    runtime = RuntimeConfig()
+    poller = make_poller(control_plane, runtime)
+
+    assert poller.poll()
+    assert runtime.settings == RuntimeSettings(sample_ratio=0.5)
+    assert not poller.poll()
+    assert control_plane.not_modified == 1
+
+    control_plane.set_runtime_config({"enabled": False, "disabled_actions": ["search"]})
+    assert poller.poll()
+    assert runtime.settings == RuntimeSettings(enabled=False, disabled_actions=frozenset({"search"}))
+
+
+def test_invalid_settings_keep_the_current_ones(control_plane) -> None:
+    """Test that an invalid document is ignored."""
+    runtime = RuntimeConfig()
+    poller = make_poller(control_plane, runtime)
+    poller.poll()
+
+    control_plane.set_runtime_config({"sample_ratio": 2})
+    assert not poller.poll()
+    assert runtime.settings.sample_ratio == 0.5
+    assert poller.failures == 1
+
+
+def test_long_poll_applies_a_change_without_waiting_for_the_interval(control_plane) -> None:
+    """Test that a change published during a long poll is applied within the round trip."""
+    runtime = RuntimeConfig()
+    poller = make_poller(control_plane, runtime, interval=60, long_poll=5).start()
+    try:
+        deadline = time.monotonic() + 5
+        while runtime.settings.sample_ratio != 0.5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+
+        started = time.monotonic()
+        control_plane.set_runtime_config({"max_attribute_length": 8})
+        while runtime.settings.max_attribute_length != 8 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert runtime.settings.max_attribute_length == 8
+        assert time.monotonic() - started < 2
+    finally:
+        poller.stop()
+
+
+class ImmediateAPI:
+    """Control plane stub answering every long poll at once with a 304."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_runtime_config(self, etag=None, wait=0.0):
+        self.calls += 1
+        return etag, None
+
+    def close(self):
+        pass
+
+
+def test_long_poll_answered_at_once_waits_the_interval() -> None:
+    """Test that a server ignoring wait is not polled in a tight loop."""
+    api = ImmediateAPI()
+    poller = RemoteConfigPoller(api, RuntimeConfig(), interval=60, long_poll=5).start()
+    time.sleep(0.3)
+    poller.stop()
+    assert api.calls == 1
+
+
+def test_emitter_and_sampler_follow_swapped_settings() -> None:
+    """Test that disabled actions, the length limit, the sample ratio and the kill switch apply on the next span."""
+    runtime = RuntimeConfig()
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(sampler=RuntimeSampler(runtime))
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    emitter = ActionEmitter(provider.get_tracer("value-tests"), delivery_tracker=DeliveryTracker(), runtime=runtime)
+
+    runtime.update(RuntimeSettings(disabled_actions=frozenset({"noisy"}), max_attribute_length=4))
+    assert emitter.send("noisy", anonymous_id="anon") is None
+    with pytest.raises(DeliveryError):
+        emitter.send("noisy", anonymous_id="anon", receipt=True).result(0)
+    emitter.send("search", anonymous_id="anon", **{"value.action.description": "abcdefgh"})
+    spans = exporter.get_finished_spans()
+    assert [span.attributes["value.action.name"] for span in spans] == ["search"]
+    assert spans[0].attributes["value.action.description"] == "abcd"
+
+    exporter.clear()
+    runtime.update(RuntimeSettings(sample_ratio=0.0))
+    tracer = provider.get_tracer("value-tests")
+    for _ in range(20):
+        tracer.start_span("root").end()
+    assert not exporter.get_finished_spans()
+
+    runtime.update(RuntimeSettings(enabled=False))
+    threads = [threading.Thread(target=emitter.send, args=("search", "anon")) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with emitter.timed("search", anonymous_id="anon") as span:
+        assert not span.is_recording()
+    assert not exporter.get_finished_spans()
@@ -0,0 +1,142 @@
+"""Tests for export retry, circuit breaking and spooling."""
+
+import threading
+
+import grpc
+from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SpanExportResult
+
+from value.internal.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ResilientSpanExporter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_spans(count: int) -> list:
+    tracer = TracerProvider(shutdown_on_exit=False).get_tracer("value-tests")
+    spans = []
+    for index in range(count):
+        span = tracer.start_span(f"span_{index}")
+        span.end()
+        spans.append(span)
+    return spans
+
+
+def test_breaker_opens_and_probes() -> None:
+    """Test that the breaker opens at the threshold and half-opens after its backoff."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, backoff_base=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow_request() is False
+
+    clock.now = 10
+    assert breaker.allow_request() is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request() is False
+
+    # A failed probe reopens with a longer, jittered backoff
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now = 19.9
+    assert breaker.allow_request() is False
+    clock.now = 30
+    assert breaker.allow_request() is True
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_concurrent_failures_trip_the_breaker_once() -> None:
+    """Test that failures reported by requests in flight when the breaker opened do not extend its backoff."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, backoff_base=1, clock=clock)
+    workers = [threading.Thread(target=breaker.record_failure) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert breaker.state == OPEN
+    assert breaker._trips == 1
+    clock.now = 1
+    assert breaker.allow_request() is True
+
+
+def test_breaker_with_zero_threshold_never_opens() -> None:
+    """Test that failure_threshold=0 leaves the breaker closed, so its exporter only spools."""
+    breaker = CircuitBreaker(failure_threshold=0, clock=FakeClock())
+    for _ in range(10):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request() is True
+
+
+def test_spooled_spans_replayed_after_recovery(collector) -> None:
+    """Test that spans exported while the collector is down are replayed once it recovers."""
+    clock = FakeClock()
+    exporter = ResilientSpanExporter(
+        OTLPSpanExporter(endpoint=collector.endpoint, insecure=True, timeout=0.5),
+        breaker=CircuitBreaker(failure_threshold=1, backoff_base=5, clock=clock),
+    )
+
+    collector.fail_with = grpc.StatusCode.INVALID_ARGUMENT
+    assert exporter.export(make_spans(3)) is SpanExportResult.FAILURE
+    assert exporter.breaker.state == OPEN
+
+    # While open the collector is not contacted at all
+    requests = collector.requests
+    assert exporter.export(make_spans(2)) is SpanExportResult.FAILURE
+    assert collector.requests == requests
+    assert exporter.spooled == 5
+
+    collector.fail_with = None
+    clock.now = 5
+    assert exporter.export(make_spans(1)) is SpanExportResult.SUCCESS
+    assert exporter.breaker.state == CLOSED
+    assert exporter.spooled == 0
+    assert collector.spans == 6
+    exporter.shutdown()
+
+
+def test_spool_overflow_drops_oldest() -> None:
+    """Test that the spool stays within its footprint and reports drops."""
+    dropped = []
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, clock=clock)
+    breaker.record_failure()
+    exporter = ResilientSpanExporter(
+        OTLPSpanExporter(endpoint="127.0.0.1:1", insecure=True),
+        breaker=breaker,
+        spool_size=4,
+        on_drop=dropped.extend,
+    )
+
+    first, second = make_spans(3), make_spans(3)
+    exporter.export(first)
+    exporter.export(second)
+
+    assert exporter.spooled == 3
+    assert dropped == first
+    assert exporter.dropped == 3
+
+
+def test_drop_policy_without_spool() -> None:
+    """Test that a zero-sized spool drops batches while the breaker is open."""
+    breaker = CircuitBreaker(failure_threshold=1, clock=FakeClock())
+    breaker.record_failure()
+    exporter = ResilientSpanExporter(
+        OTLPSpanExporter(endpoint="127.0.0.1:1", insecure=True), breaker=breaker, spool_size=0
+    )
+
+    exporter.export(make_spans(2))
+    assert exporter.spooled == 0
+    assert exporter.dropped == 2
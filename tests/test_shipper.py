@@ -0,0 +1,205 @@
+"""Tests for the shared-memory span ring and the shipper process."""
+
+import os
+import signal
+import threading
+import time
+import uuid
+
+import grpc
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SpanExportResult
+
+from value.internal.shipper import Shipper, ShipperSpanExporter, SpanRing
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="the span shipper requires POSIX shared memory")
+
+
+@pytest.fixture
+def ring_name():
+    name = f"value-test-{uuid.uuid4().hex[:8]}"
+    yield name
+    try:
+        ring = SpanRing.attach(name)
+    except FileNotFoundError:
+        return
+    try:
+        ring.unlink()
+    except FileNotFoundError:
+        # A shipper retiring the empty ring may unlink it first
+        pass
+    ring.close()
+
+
+def make_spans(count: int) -> list:
+    tracer = TracerProvider(shutdown_on_exit=False).get_tracer("value-tests")
+    spans = []
+    for index in range(count):
+        span = tracer.start_span(f"span_{index}")
+        span.end()
+        spans.append(span)
+    return spans
+
+
+def ring_exists(name: str) -> bool:
+    try:
+        SpanRing.attach(name).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_ring_wraps_and_drops_when_full(ring_name) -> None:
+    """Test that records wrap around the end of the ring and are dropped once it is full."""
+    ring = SpanRing.create(ring_name, capacity=64)
+    ring.shipper_pid = os.getpid()
+
+    assert ring.write(b"a" * 20) == 24
+    assert ring.write(b"b" * 20) == 48
+    assert ring.write(b"c" * 20) is None
+    assert ring.dropped == 1
+    records, tail = ring.read(max_bytes=20)
+    assert records == [b"a" * 20]
+    ring.consume(tail, len(records))
+
+    # 16 bytes are left before the end, so the record wraps to the start
+    assert ring.write(b"c" * 20) == 64 + 24
+    records, tail = ring.read(max_bytes=1024)
+    assert records == [b"b" * 20, b"c" * 20]
+    ring.consume(tail, len(records))
+    assert ring.tail == ring.head
+    assert ring.write(b"x" * 100) is None
+    ring.close()
+
+
+def test_ring_refuses_writes_once_retired(ring_name) -> None:
+    """Test that a ring without a shipper drops records."""
+    ring = SpanRing.create(ring_name, capacity=1024)
+
+    assert ring.write(b"record") is None
+    ring.close()
+
+
+def test_shipper_coalesces_and_retries(ring_name, collector) -> None:
+    """Test that the shipper sends available records in one request and keeps them until acknowledged."""
+    from value.internal.otlp_encoder import OTLPSpanEncoder
+
+    ring = SpanRing.create(ring_name, capacity=1 << 20)
+    ring.shipper_pid = os.getpid()
+    encoder = OTLPSpanEncoder()
+    collector.fail_with = grpc.StatusCode.UNAVAILABLE
+    for _ in range(3):
+        ring.write(encoder.encode(make_spans(2)))
+
+    shipper = Shipper(SpanRing.attach(ring_name), collector.endpoint, poll_interval=0.01, idle_timeout=0.2)
+    thread = threading.Thread(target=shipper.run)
+    thread.start()
+    assert wait_for(lambda: ring.failed >= 1)
+    assert ring.tail == 0
+    collector.fail_with = None
+
+    assert wait_for(lambda: ring.shipped == 3)
+    assert collector.spans == 6
+    # Every record was pending, so the successful attempt was a single request
+    assert collector.requests == ring.failed + 1
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    # Retired after idling: removed, and producers holding the mapping are refused
+    assert ring.shipper_pid == 0
+    with pytest.raises(FileNotFoundError):
+        SpanRing.attach(ring_name)
+    ring.close()
+
+
+def test_shipper_discards_records_the_collector_rejects(ring_name, collector) -> None:
+    """Test that a permanently rejected request does not block the ring, and its records are counted as dropped."""
+    from value.internal.otlp_encoder import OTLPSpanEncoder
+
+    ring = SpanRing.create(ring_name, capacity=1 << 20)
+    ring.shipper_pid = os.getpid()
+    encoder = OTLPSpanEncoder()
+    collector.fail_with = grpc.StatusCode.INVALID_ARGUMENT
+    for _ in range(3):
+        ring.write(encoder.encode(make_spans(2)))
+
+    shipper = Shipper(SpanRing.attach(ring_name), collector.endpoint, poll_interval=0.01, idle_timeout=60)
+    thread = threading.Thread(target=shipper.run)
+    thread.start()
+    try:
+        assert wait_for(lambda: ring.dropped == 3)
+        assert ring.tail == ring.head
+        # One coalesced request, then one per record
+        assert collector.requests == 4
+
+        collector.fail_with = None
+        ring.write(encoder.encode(make_spans(1)))
+        assert wait_for(lambda: ring.shipped == 1)
+    finally:
+        shipper.stop_event.set()
+        thread.join(timeout=5)
+    ring.close()
+
+
+def test_exporter_refuses_batches_larger_than_a_request(ring_name, collector) -> None:
+    """Test that a batch no request could carry fails at once instead of entering the ring."""
+    exporter = ShipperSpanExporter(collector.endpoint, ring=ring_name, ring_bytes=1 << 20, max_request_bytes=64)
+    pid = exporter.ring.shipper_pid
+    try:
+        assert exporter.export(make_spans(20)) == SpanExportResult.FAILURE
+        assert exporter.ring.head == 0
+    finally:
+        exporter.shutdown()
+        os.kill(pid, signal.SIGTERM)
+
+
+def test_exporter_starts_and_shares_a_shipper_process(ring_name, collector) -> None:
+    """Test that exporters start one shipper subprocess, share it, and wait for their records on shutdown."""
+    first = ShipperSpanExporter(collector.endpoint, ring=ring_name, ring_bytes=1 << 20)
+    second = ShipperSpanExporter(collector.endpoint, ring=ring_name)
+    pid = first.ring.shipper_pid
+    try:
+        assert pid and second.ring.shipper_pid == pid
+
+        assert first.export(make_spans(3)) == SpanExportResult.SUCCESS
+        assert second.export(make_spans(2)) == SpanExportResult.SUCCESS
+        assert first.force_flush(10000)
+        assert second.force_flush(10000)
+        assert collector.spans == 5
+        first.shutdown()
+        second.shutdown()
+        assert first.export(make_spans(1)) == SpanExportResult.FAILURE
+    finally:
+        os.kill(pid, signal.SIGTERM)
+    # The stopped shipper retires the empty ring
+    assert wait_for(lambda: not ring_exists(ring_name))
+
+
+def test_exporter_restarts_an_exited_shipper(ring_name, collector, monkeypatch) -> None:
+    """Test that records written after the shipper died are shipped by a replacement."""
+    monkeypatch.setattr("value.internal.shipper._LIVENESS_INTERVAL", 0.0)
+    exporter = ShipperSpanExporter(collector.endpoint, ring=ring_name, ring_bytes=1 << 20)
+    pid = exporter.ring.shipper_pid
+    os.kill(pid, signal.SIGKILL)
+    assert wait_for(lambda: exporter._process.poll() is not None)
+
+    assert exporter.export(make_spans(2)) == SpanExportResult.SUCCESS
+    replacement = exporter.ring.shipper_pid
+    try:
+        assert replacement != pid
+        assert exporter.force_flush(10000)
+        assert collector.spans == 2
+    finally:
+        exporter.shutdown()
+        os.kill(replacement, signal.SIGTERM)
+    # The replacement is our child, so poll() reaps it; it retires the ring before exiting
+    assert wait_for(lambda: exporter._process.poll() is not None)
@@ -0,0 +1,135 @@
+"""Tests for graceful shutdown."""
+
+import signal
+import threading
+from unittest.mock import MagicMock
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from value import ValueClient
+from value.internal.shutdown import (
+    CountingSpanExporter,
+    EndedSpanCounter,
+    ExportStats,
+    register_shutdown_hooks,
+    shutdown_processors,
+)
+
+
+class BlockingSpanExporter(SpanExporter):
+    """Exporter that blocks until released, simulating an unreachable collector."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def export(self, spans):
+        self.release.wait(5)
+        return SpanExportResult.SUCCESS
+
+
+def make_pipeline(exporter: SpanExporter) -> tuple[TracerProvider, BatchSpanProcessor, ExportStats]:
+    stats = ExportStats()
+    provider = TracerProvider(shutdown_on_exit=False)
+    processor = BatchSpanProcessor(CountingSpanExporter(exporter, stats), schedule_delay_millis=60000)
+    provider.add_span_processor(EndedSpanCounter(stats))
+    provider.add_span_processor(processor)
+    return provider, processor, stats
+
+
+def test_shutdown_reports_flushed_spans() -> None:
+    """Test that queued spans are flushed and counted."""
+    exporter = InMemorySpanExporter()
+    provider, processor, stats = make_pipeline(exporter)
+    for index in range(10):
+        provider.get_tracer("value-tests").start_span(f"span_{index}").end()
+
+    report = shutdown_processors([processor], stats, timeout=5)
+
+    assert report.flushed == 10
+    assert report.lost == 0
+    assert report.timed_out is False
+    assert len(exporter.get_finished_spans()) == 10
+
+
+def test_shutdown_respects_deadline() -> None:
+    """Test that a stuck exporter cannot hold shutdown past the deadline."""
+    exporter = BlockingSpanExporter()
+    provider, processor, stats = make_pipeline(exporter)
+    for index in range(3):
+        provider.get_tracer("value-tests").start_span(f"span_{index}").end()
+
+    report = shutdown_processors([processor], stats, timeout=0.2)
+    exporter.release.set()
+
+    assert report.timed_out is True
+    assert report.lost == 3
+    assert report.duration < 2
+
+
+def test_ended_cells_of_exited_threads_are_folded() -> None:
+    """Test that thread churn does not grow the per-thread cells, and no count is lost."""
+    stats = ExportStats()
+    for _ in range(20):
+        threads = [threading.Thread(target=stats.record_ended, args=(2,)) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    stats.record_ended()
+
+    assert stats.ended == 401
+    assert len(stats._ended_cells) <= 2
+
+
+def test_sigterm_hook_chains_previous_handler(monkeypatch) -> None:
+    """Test that the SIGTERM hook runs the callback and then the previous handler."""
+    monkeypatch.setattr("atexit.register", lambda callback: None)
+    previous_calls = []
+    original = signal.signal(signal.SIGTERM, lambda signum, frame: previous_calls.append(signum))
+    try:
+        callback = MagicMock()
+        register_shutdown_hooks(callback, handle_sigterm=True)
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+    finally:
+        signal.signal(signal.SIGTERM, original)
+
+    callback.assert_called_once()
+    assert previous_calls == [signal.SIGTERM]
+
+
+def test_many_registrations_share_one_sigterm_handler_and_can_be_removed(monkeypatch) -> None:
+    """Test that registrations do not chain handlers and removed ones are neither run nor kept."""
+    registered = []
+    monkeypatch.setattr("atexit.register", registered.append)
+    monkeypatch.setattr("atexit.unregister", registered.remove)
+    original = signal.signal(signal.SIGTERM, lambda signum, frame: None)
+    try:
+        callbacks = [MagicMock() for _ in range(3)]
+        hooks = [register_shutdown_hooks(callback, handle_sigterm=True) for callback in callbacks]
+        handler = signal.getsignal(signal.SIGTERM)
+        hooks[1].remove()
+        assert signal.getsignal(signal.SIGTERM) is handler
+        handler(signal.SIGTERM, None)
+        for hook in (hooks[0], hooks[2]):
+            hook.remove()
+    finally:
+        signal.signal(signal.SIGTERM, original)
+
+    assert [callback.call_count for callback in callbacks] == [1, 0, 1]
+    assert registered == []
+
+
+def test_sync_client_context_manager() -> None:
+    """Test that the sync client initializes on enter and closes on exit."""
+    sdk = ValueClient(secret="test-secret")
+    sdk._api_client.get_agent_info = MagicMock(return_value={})
+    sdk._api_client.close = MagicMock()
+
+    with sdk as client:
+        assert client.actions_emitter is not None
+        client._pipeline.export_processors = []
+
+    sdk._api_client.close.assert_called_once()
+    assert sdk._pipeline._report is not None
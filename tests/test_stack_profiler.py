@@ -0,0 +1,55 @@
+"""Tests for the sampling stack profiler."""
+
+import time
+
+from value.internal.stack_profiler import StackSamplingProfiler
+
+
+def slow_tool_body(seconds: float) -> None:
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        sum(range(1000))
+
+
+def make_profiler(tracer_provider, **kwargs) -> StackSamplingProfiler:
+    profiler = StackSamplingProfiler(**kwargs)
+    profiler.tracer = tracer_provider.get_tracer("value.profiler")
+    tracer_provider.add_span_processor(profiler)
+    return profiler
+
+
+def test_slow_tool_span_gets_linked_profile(tracer_provider, tracer, span_exporter) -> None:
+    """Test that a slow tool span is followed by a linked profile holding its hot stack."""
+    profiler = make_profiler(tracer_provider, threshold=0.1, interval=0.005, max_cpu_percent=50)
+    with tracer.start_as_current_span("tool_search") as tool:
+        slow_tool_body(0.25)
+    profiler.shutdown()
+
+    (profile,) = [span for span in span_exporter.get_finished_spans() if span.name == "value.profile"]
+    assert profile.parent.span_id == tool.get_span_context().span_id
+    assert profile.links[0].context.span_id == tool.get_span_context().span_id
+    assert profile.attributes["value.profile.span_name"] == "tool_search"
+    assert profile.attributes["value.profile.samples"] > 5
+    assert "slow_tool_body" in profile.attributes["value.profile.folded_stacks"]
+
+
+def test_fast_and_unrelated_spans_not_profiled(tracer_provider, tracer, span_exporter) -> None:
+    """Test that fast candidate spans and non LLM/tool spans produce no profile."""
+    profiler = make_profiler(tracer_provider, threshold=10, interval=0.005)
+    with tracer.start_as_current_span("tool_lookup"):
+        slow_tool_body(0.05)
+    with tracer.start_as_current_span("plain"):
+        assert not profiler._active
+    profiler.shutdown()
+
+    assert not [span for span in span_exporter.get_finished_spans() if span.name == "value.profile"]
+
+
+def test_sampler_backs_off_under_cpu_cap(tracer_provider, tracer) -> None:
+    """Test that an unattainable CPU budget backs the sampling interval off."""
+    profiler = make_profiler(tracer_provider, threshold=10, interval=0.001, max_cpu_percent=0.0001)
+    with tracer.start_as_current_span("chat", attributes={"gen_ai.system": "gemini"}):
+        slow_tool_body(0.1)
+    assert profiler.interval > 0.001
+    assert profiler.overhead > 0
+    profiler.shutdown()
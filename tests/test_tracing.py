@@ -0,0 +1,102 @@
+"""Tests for the tracing pipeline shared by clients in one process."""
+
+import threading
+from collections import Counter
+from dataclasses import replace
+
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+
+from value.internal.config import SDKConfig
+from value.internal.file_export import iter_otlp_records, list_span_files
+from value.internal.tracing import initialize_tracing, register_tracing
+
+
+def test_clients_share_one_pipeline_and_keep_their_resources(tmp_path) -> None:
+    """Test that registered clients share processors but export spans under their own agent resource."""
+    config = SDKConfig(exporter="file", file_export_dir=str(tmp_path))
+    pipelines = [
+        register_tracing("shared-test:4317", attributes={"value.agent.id": f"agent-{index}"}, config=config)
+        for index in range(3)
+    ]
+
+    assert pipelines[0].shared is pipelines[1].shared is pipelines[2].shared
+    assert pipelines[0].export_processors is pipelines[2].export_processors
+    assert pipelines[0].delivery_tracker is pipelines[1].delivery_tracker
+    assert pipelines[0].provider is not pipelines[1].provider
+    for index, pipeline in enumerate(pipelines):
+        for _ in range(index + 1):
+            pipeline.tracer.start_span("work").end()
+
+    # Releasing an earlier client only flushes; the last one shuts the pipeline down
+    assert pipelines[0].shutdown().flushed == 6
+    assert pipelines[0].shared.clients == 2
+    pipelines[1].shutdown()
+    pipelines[2].shutdown()
+    assert pipelines[2].shared.clients == 0
+
+    spans_per_agent: Counter = Counter()
+    for path in list_span_files(str(tmp_path)):
+        for record in iter_otlp_records(path):
+            for resource_spans in ExportTraceServiceRequest.FromString(record).resource_spans:
+                attributes = {item.key: item.value.string_value for item in resource_spans.resource.attributes}
+                count = sum(len(scope_spans.spans) for scope_spans in resource_spans.scope_spans)
+                spans_per_agent[attributes["value.agent.id"]] += count
+    assert spans_per_agent == {"agent-0": 1, "agent-1": 2, "agent-2": 3}
+
+
+def test_clients_with_different_export_settings_get_separate_pipelines(tmp_path) -> None:
+    """Test that a client's export settings are never silently replaced by those of an earlier registration."""
+    config = SDKConfig(exporter="file", file_export_dir=str(tmp_path))
+    first = register_tracing("shared-test:4320", config=config)
+    # Client-level settings do not split the pipeline
+    same = register_tracing("shared-test:4320", config=replace(config, quota_rate=5.0, event_actions=("send",)))
+    filtered = register_tracing("shared-test:4320", config=replace(config, filter_drop_spans=("Runnable*",)))
+
+    assert same.shared is first.shared
+    assert filtered.shared is not first.shared
+    for pipeline in (first, same, filtered):
+        pipeline.shutdown()
+
+
+def test_released_pipeline_is_rebuilt(tmp_path) -> None:
+    """Test that registering after every client released the pipeline builds a new one."""
+    config = SDKConfig(exporter="file", file_export_dir=str(tmp_path))
+    first = register_tracing("shared-test:4318", config=config)
+    first.shutdown()
+
+    second = register_tracing("shared-test:4318", config=config)
+    assert second.shared is not first.shared
+    second.shutdown()
+
+
+def test_registration_racing_the_last_release_gets_a_live_pipeline(tmp_path) -> None:
+    """Test that a client registering while the last one releases never gets a shut down pipeline."""
+    config = SDKConfig(exporter="file", file_export_dir=str(tmp_path))
+    for _ in range(50):
+        first = register_tracing("shared-test:4319", config=config)
+        releaser = threading.Thread(target=first.shutdown)
+        releaser.start()
+        second = register_tracing("shared-test:4319", config=config)
+        releaser.join()
+        assert second.shared.base._report is None
+        second.shutdown()
+
+
+def test_overload_queue_capacity_is_read_from_the_export_processor(tmp_path, monkeypatch) -> None:
+    """Test that overload control measures queue fill against the capacity of the processor actually built."""
+    monkeypatch.setenv("OTEL_BSP_MAX_QUEUE_SIZE", "1000")
+    base = SDKConfig(exporter="file", file_export_dir=str(tmp_path), overload_control=True)
+    lanes = replace(base, priority_lanes=True, lane_queue_size=100, action_lane_queue_size=50)
+    cases = [
+        (base, 1000),
+        (replace(base, thread_buffers=True), 2048),
+        # Two shared lanes of 100 under the shared budget, plus the reserved action lane
+        (replace(lanes, lane_max_total_spans=500), 250),
+        (replace(lanes, lane_max_total_spans=150), 200),
+    ]
+    for config, capacity in cases:
+        pipeline = initialize_tracing("capacity-test:4317", config=config)
+        try:
+            assert pipeline.overload._queue_capacity == capacity
+        finally:
+            pipeline.shutdown()